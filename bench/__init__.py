@@ -0,0 +1,13 @@
+"""
+Бенчмарки сборщика: разбор страниц и таблиц, нормализация, хранение ставок, запросы, запись, прогон против
+заглушки банков (src/mockserver.py). Прежний код для сравнения — bench/legacy.py.
+
+    python -m bench scale --scale 5,50,500
+    python -m bench tables --rows 1000,100000
+    python -m bench split
+    python -m bench normalize --cells 100000
+    python -m bench records --rows 1000000
+    python -m bench query --banks 50 --days 365
+    python -m bench db --rows 10000,100000
+    python -m bench aggregates --days 30,365,1000
+"""
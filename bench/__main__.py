@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+
+from src.log import setup_logging
+from src.mockserver import KINDS
+
+from .parsing import bench_normalize, bench_records, bench_split, bench_tables
+from .scale import bench_scale
+from .storage import bench_aggregates, bench_db, bench_query
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(prog='python -m bench')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    p = sub.add_parser('scale')
+    p.add_argument('--scale', default='5,50,500', help='числа банков через запятую')
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8765)
+    p.add_argument('--products', type=int, default=5, help='продуктов на банк')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--kinds', default=','.join(KINDS),
+                   help='виды разметки через запятую (Privatbank - только http, без Chromium)')
+    p.add_argument('--latency', type=float, default=0.0, help='задержка ответа, секунды')
+    p.add_argument('--jitter', type=float, default=0.0, help='добавка к задержке до N секунд (детерминированно по url)')
+    p.add_argument('--error-rate', type=float, default=0.0, help='доля url, отвечающих 500')
+    p.add_argument('--memory-limit', type=float, default=0, help='пиковый RSS, МБ; превышение — код выхода 1')
+    p.add_argument('--profile-memory', action='store_true', help='отчёт memory_profile.json на каждый масштаб')
+    p = sub.add_parser('tables')
+    p.add_argument('--rows', default='1000,100000,1000000', help='строк в синтетической таблице через запятую')
+    p.add_argument('--repeat', type=int, default=1000, help='повторов разбора каждой эталонной страницы')
+    p.add_argument('--seed', type=int, default=0)
+    p = sub.add_parser('split')
+    p.add_argument('--rows', default='20,200,1000,5000,10000,100000', help='строк в таблице через запятую')
+    p.add_argument('--cells', type=int, default=20000, help='строк на замер: повторы = cells / rows')
+    p.add_argument('--seed', type=int, default=1)
+    p = sub.add_parser('records')
+    p.add_argument('--rows', type=int, default=1000000, help='ставок в выборке')
+    p.add_argument('--seed', type=int, default=0)
+    p = sub.add_parser('normalize')
+    p.add_argument('--cells', type=int, default=100000, help='ячеек в выборке')
+    p.add_argument('--seed', type=int, default=0)
+    p = sub.add_parser('query')
+    p.add_argument('--banks', type=int, default=50)
+    p.add_argument('--products', type=int, default=5, help='продуктов на банк')
+    p.add_argument('--days', type=int, default=365, help='дней истории')
+    p.add_argument('--queries', type=int, default=200)
+    p.add_argument('--seed', type=int, default=0)
+    p = sub.add_parser('aggregates')
+    p.add_argument('--banks', type=int, default=50)
+    p.add_argument('--products', type=int, default=5, help='продуктов на банк')
+    p.add_argument('--days', default='30,365,1000', help='дней уже собранной истории через запятую')
+    p.add_argument('--repeat', type=int, default=5)
+    p.add_argument('--seed', type=int, default=0)
+    p = sub.add_parser('db')
+    p.add_argument('--rows', default='10000,100000', help='строк в прогоне через запятую')
+    p.add_argument('--products', type=int, default=5, help='продуктов на банк')
+    p.add_argument('--seed', type=int, default=0)
+    args = ap.parse_args()
+    setup_logging('INFO')
+    if args.cmd == 'scale':
+        asyncio.run(bench_scale(args))
+    elif args.cmd == 'split':
+        bench_split(args)
+    elif args.cmd == 'tables':
+        bench_tables(args)
+    elif args.cmd == 'query':
+        bench_query(args)
+    elif args.cmd == 'db':
+        bench_db(args)
+    elif args.cmd == 'aggregates':
+        bench_aggregates(args)
+    elif args.cmd == 'records':
+        bench_records(args)
+    elif args.cmd == 'normalize':
+        bench_normalize(args)
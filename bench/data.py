@@ -0,0 +1,60 @@
+"""Синтетические данные и замер времени для бенчмарков"""
+import random
+import time
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.mockserver import CURRENCIES, TERMS, MockBank
+from src.xlsx import COLUMNS
+
+
+def sizes(value: str) -> List[int]:
+    return [int(s) for s in value.split(',') if s.strip()]
+
+
+def timed(fn, repeat: int = 1):
+    """(секунд на вызов, результат последнего вызова)"""
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) / repeat, result
+
+
+def synthetic_table(rows: int, seed: int = 0) -> List[List[Optional[str]]]:
+    """
+    Большая таблица «срок × валюта» в сыром виде, как из PDF-паспорта Sensbank: '10,5 %', пустые ячейки и строки.
+    Сроки только в месяцах, по одной записи на срок: на них прежний разбор (первое число) и rate_frame совпадают.
+    """
+    rnd = random.Random(seed)
+    terms = [f'{t} міс' for t in TERMS] + ['36 місяців', 'Без терміну', '']
+    table = [['Термін', 'Гривня', 'Долар США', 'Євро']]
+    for _ in range(rows):
+        table.append([rnd.choice(terms)] + [None if rnd.random() < 0.1 else f"{rnd.uniform(0.5, 16):.2f} %".replace('.', ',')
+                                            for _ in CURRENCIES])
+    return table
+
+
+def synthetic_history(banks: int, products: int, days: int, seed: int = 0) -> pd.DataFrame:
+    """
+    История ставок в формате листа Select Rates: ставки MockBank, строка на ставку в день,
+    за день примерно 5% ставок сдвигается на 0,25 п.п.
+    """
+    mocks = [MockBank(i, products, seed) for i in range(1, banks + 1)]
+    base = pd.DataFrame(
+        [(b.id, b.idx, f'Mock bank {b.id}', ('Державний', 'Приватний')[b.idx % 2], b.products[p], c, f'{TERMS[t]}m',
+          rate, f'/bank/{b.id}/product/{p + 1}') for b in mocks for (p, c, t), rate in b.rates.items()],
+        columns=['bank', 'nkb', 'full_name', 'group_1', 'product', 'currency', 'term', 'rate', 'source_url'])
+    n = len(base)
+    rng = np.random.default_rng(seed)
+    steps = rng.choice([-0.25, 0.0, 0.25], size=(days, n), p=[0.025, 0.95, 0.025]).cumsum(axis=0)
+    df = base.iloc[np.tile(np.arange(n), days)].reset_index(drop=True)
+    df['rate'] = (base['rate'].to_numpy() + steps).clip(0.01).round(2).ravel()
+    df['date'] = np.repeat(pd.date_range(end=pd.Timestamp.today().normalize(), periods=days), n)
+    df['day'] = df['date'].dt.day
+    df['month'] = df['date'].dt.month
+    df['year'] = df['date'].dt.year
+    df['week'] = df['date'].dt.isocalendar().week.to_numpy()
+    df['status'] = 'ok'
+    return df[COLUMNS]
@@ -0,0 +1,159 @@
+"""
+Прежний разбор страниц и таблиц банков (до общего движка src/tables.py) — точка отсчёта для бенчмарков.
+Код заморожен: менять его можно только вместе с цифрами в README.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+
+_OSCHAD_CURRENCY_MAP = {
+    r"(грн|гривня)": "UAH",
+    r"(usd|долар\s*сша)": "USD",
+    r"(eur|євро)": "EUR",
+}
+
+
+def _oschad_currency(text: str) -> str:
+    text_lower = text.lower()
+    for pattern, currency in _OSCHAD_CURRENCY_MAP.items():
+        if re.search(pattern, text_lower):
+            return currency
+    return None
+
+
+def legacy_normalize_cell(text: str):
+    """Прежняя нормализация ячейки: первое число как срок, валюта перебором шаблонов currency_map"""
+    m = re.search(r"(\d+)\s*", text.lower())
+    return (m.group(1) if m else text), _oschad_currency(text)
+
+
+def legacy_oschadbank(html: str) -> List[Dict[str, Any]]:
+    soup = BeautifulSoup(html, "html.parser").find("section", class_="block-table-rates")
+    headers = [th.get_text(strip=True).lower() for th in soup.find_all("th")]
+    currency_columns = {idx: c for idx, c in ((i, _oschad_currency(h)) for i, h in enumerate(headers)) if c}
+    results = []
+    for row in soup.select("tbody tr"):
+        cols = [td.get_text(strip=True) for td in row.find_all("td")]
+        if len(cols) < 2:
+            continue
+        term_raw = cols[0]
+        term_match = re.search(r"(\d+)\s*", term_raw.lower())
+        term = term_match.group(1) if term_match else term_raw
+        for idx, cell in enumerate(cols[1:], start=1):
+            if idx in currency_columns:
+                rate_raw = cell.replace(',', '.').replace('%', '').strip()
+                try:
+                    rate = float(rate_raw)
+                except ValueError:
+                    rate = None
+                results.append({"term": term, "currency": currency_columns[idx], "rate": rate})
+    return results
+
+
+def legacy_pumb(html: str) -> List[Dict[str, Any]]:
+    currency_map = {"Гривня": "UAH", "Долар США": "USD", "Євро": "EUR"}
+    block = re.search(r'<section class="line-tab tabs-wr deposit-rates">.*?<\/section>', html, re.S)
+    soup = BeautifulSoup(block.group(0), "html.parser")
+    curr = {}
+    for a in soup.select("div.tabs-btns-wr a[data-id]"):
+        span_text = "".join(a.find("span").find_all(string=True, recursive=False)).strip()
+        if currency_map.get(span_text):
+            curr[a.get("data-id")] = currency_map[span_text]
+    results = []
+    for tab in soup.select("div.tab-pane"):
+        currency = curr.get(tab.get("data-id"))
+        if not currency:
+            continue
+        for hdr in tab.select(".row.header-row"):
+            if hdr.find_parent("div", class_="transparent-table"):
+                continue
+            terms = []
+            for col in hdr.select(".col"):
+                m = re.search(r'(\d+)\s*міс', col.get_text(" ", strip=True))
+                if m:
+                    terms.append(m.group(1))
+            for row in tab.select(".row:not(.header-row)"):
+                if row.find_parent("div", class_="transparent-table"):
+                    continue
+                rates = [col.get_text(" ", strip=True).replace("%", "").replace(",", ".").strip()
+                         for col in row.select(".col") if "%" in col.get_text(" ", strip=True)]
+                for term, rate in zip(terms, rates):
+                    results.append({"currency": currency, "term": term, "rate": rate})
+    return results
+
+
+def legacy_ukreximbank(html: str) -> List[Dict[str, Any]]:
+    div_html = re.search(r'<div class="additional-info text-block">(.*?)</div>', html, re.DOTALL).group(1)
+    headers = re.findall(r'<th[^>]*>(.*?)</th>', div_html, re.DOTALL)
+    cur_map = {"гривня": "UAH", "долар сша": "USD", "євро": "EUR"}
+    currencies = [cur_map[h.strip().lower()] for h in headers[1:]]
+    result = []
+    for row in re.findall(r'<tr>(.*?)</tr>', html, re.DOTALL):
+        cols = re.findall(r'<td[^>]*>(.*?)</td>', row, re.DOTALL)
+        if not cols:
+            continue
+        term_text = re.sub(r'<.*?>', '', cols[0]).strip()
+        rates = [re.sub(r'<.*?>', '', c).strip().replace("\xa0", "").replace("%", "") for c in cols[1:]]
+        m = re.search(r'(\d+)\s*-\s*(\d+)', term_text)
+        if not m:
+            continue
+        d1, d2 = map(int, m.groups())
+        if d1 == 93 and d2 == 183:
+            m1, m2 = 3, 6
+        elif d1 == 184 and d2 == 367:
+            m1, m2 = 7, 12
+        elif d1 == 368 and d2 == 3650:
+            m1, m2 = 13, 121
+        else:
+            m1, m2 = 0, 0
+        for month in (m1, m2):
+            for cur, rate in zip(currencies, rates):
+                result.append({"term": month, "currency": cur, "rate": float(rate.replace("&nbsp;", ""))})
+    return result
+
+
+def legacy_sensbank(table: List[List[Optional[str]]]) -> List[Dict[str, Any]]:
+    """
+    Прежний разбор таблицы из PDF-паспорта Sensbank (DataFrame + iterrows): первое число в сроке, колонки
+    UAH/USD/EUR по порядку. Без отладочного print(result) на каждую ставку — он делал разбор квадратичным.
+    """
+    result: List[Dict[str, Any]] = []
+    df = pd.DataFrame(table[1:], columns=table[0])
+    df.columns = ["term_raw", "UAH", "USD", "EUR"]
+    for _, row in df.iterrows():
+        term_raw = str(row.get("term_raw", "")).strip()
+        if not term_raw:
+            continue
+        match = re.search(r"(\d+)", term_raw)
+        if not match:
+            continue
+        term = int(match.group(1))
+        for currency in ["UAH", "USD", "EUR"]:
+            rate_raw = str(row[currency]).strip().replace("%", "").replace(",", ".")
+            if rate_raw == "" or rate_raw.lower() == "nan":
+                continue
+            try:
+                rate = float(rate_raw)
+            except ValueError:
+                continue
+            result.append({"term": term, "currency": currency, "rate": rate})
+    return result
+
+
+# тексты ячеек таблиц ставок для микробенчмарка нормализации
+CELL_TEXTS = [
+    'Строк вкладу', 'Строк', 'Термін', 'Гривня', 'Долар США', 'Євро', 'UAH', 'USD', 'EUR',
+    '1 міс.', '3 міс.', '6 міс.', '12 міс.', '3 місяці', '6 місяців', '12 місяців', '24 місяці',
+    '1 рік', '2 роки', '93 - 183 дні', '184 - 367 днів', '368 - 3650 днів', '12 місяців (грн)',
+    '6 місяців (долар США)', 'Без терміну', '11,00%', '12,5 %', '0,75%', '—',
+]
+
+
+LEGACY_PARSERS = {
+    'Oschadbank': legacy_oschadbank,
+    'Pumb': legacy_pumb,
+    'Ukreximbank': legacy_ukreximbank,
+}
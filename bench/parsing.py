@@ -0,0 +1,133 @@
+"""Разбор страниц и таблиц, нормализация ячеек, память под строки ставок"""
+import gc
+import importlib
+import random
+import time
+import tracemalloc
+
+import pandas as pd
+
+from src.log import get_logger
+from src.mockserver import CURRENCIES, TERMS
+from src.normalize import find_currency, normalize_cell, parse_terms
+from src.records import RateBatch, RateRecord, product_meta
+from src.tables import (SMALL_TABLE_ROWS, _by_unique, _cell_records, extract_rates, frame_records, rate_frame,
+                        term_currency, term_months)
+from tests.fixtures import TABLE_FIXTURES
+
+from .data import sizes, synthetic_table, timed
+from .legacy import CELL_TEXTS, LEGACY_PARSERS, legacy_normalize_cell, legacy_sensbank
+
+log = get_logger()
+
+
+def bench_pages(repeat: int):
+    """Разбор эталонных страниц банков: общий движок (extract_rates) против прежнего кода каждого банка"""
+    print(f"{'bank':<12} {'rows old':>8} {'rows new':>8} {'old us':>8} {'new us':>8} {'speedup':>8}")
+    for name, module, html, expected in TABLE_FIXTURES:
+        legacy = LEGACY_PARSERS[name]
+        spec = importlib.import_module(module).RATES_SPEC
+        old_s, old = timed(lambda: legacy(html), repeat)
+        new_s, new = timed(lambda: extract_rates(html, spec), repeat)
+        print(f"{name:<12} {len(old):>8} {len(new):>8} {old_s * 1e6:>8.0f} {new_s * 1e6:>8.0f} "
+              f"{old_s / new_s if new_s else 0:>7.1f}x")
+
+
+def bench_tables(args):
+    """Время разбора: страницы банков и синтетические таблицы (rate_frame против прежнего iterrows Sensbank)"""
+    bench_pages(args.repeat)
+    print()
+    print(f"{'rows':>9} {'records':>9} {'iterrows s':>11} {'vector s':>9} {'speedup':>8}")
+    for n in sizes(args.rows):
+        table = synthetic_table(n, args.seed)
+        t0 = time.perf_counter()
+        expected = legacy_sensbank(table)
+        scalar = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        got = frame_records(rate_frame(table[0], table[1:], first_term_only=True).dropna(subset=['rate']))
+        vector = time.perf_counter() - t0
+        if got != expected:
+            log.error("rate_frame differs from iterrows parsing on %s rows", n)
+            raise SystemExit(1)
+        print(f"{n:>9} {len(got):>9} {scalar:>11.3f} {vector:>9.3f} {scalar / vector if vector else 0:>7.1f}x")
+
+
+def bench_split(args):
+    """
+    Порог SMALL_TABLE_ROWS: разбор таблицы по ячейкам (кэш normalize_cell) против rate_frame на таблицах
+    разного размера, мс на таблицу. Порог - там, где векторный путь начинает выигрывать.
+    """
+    print(f"SMALL_TABLE_ROWS = {SMALL_TABLE_ROWS}")
+    print(f"{'rows':>9} {'cells ms':>9} {'vector ms':>10} {'vector/cells':>13}")
+    for n in sizes(args.rows):
+        table = synthetic_table(n, args.seed)
+        repeat = max(3, args.cells // n)
+        cell_s, cells = timed(lambda: _cell_records(table[0], table[1:], first_term_only=True), repeat)
+        vector_s, vector = timed(lambda: frame_records(rate_frame(table[0], table[1:], first_term_only=True)), repeat)
+        if cells != vector:
+            log.error("rate_frame differs from per-cell parsing on %s rows", n)
+            raise SystemExit(1)
+        print(f"{n:>9} {cell_s * 1000:>9.3f} {vector_s * 1000:>10.3f} {vector_s / cell_s if cell_s else 0:>12.2f}x")
+
+
+def bench_normalize(args):
+    """
+    Стоимость нормализации одной ячейки (срок + валюта), нс: прежний код, скомпилированные выражения без кэша,
+    normalize_cell (с промахами кэша на первых вхождениях), векторно по уникальным текстам колонки (как в rate_frame)
+    """
+    rnd = random.Random(args.seed)
+    cells = [rnd.choice(CELL_TEXTS) for _ in range(args.cells)]
+    column = pd.Series(cells, dtype=object)
+    normalize_cell.cache_clear()
+    cases = [
+        ('legacy', lambda: [legacy_normalize_cell(c) for c in cells]),
+        ('compiled', lambda: [(parse_terms.__wrapped__(c), find_currency.__wrapped__(c)) for c in cells]),
+        ('cached', lambda: [normalize_cell(c) for c in cells]),
+        ('vector', lambda: (_by_unique(column, term_months), _by_unique(column, term_currency))),
+    ]
+    print(f"{len(cells)} cells, {len(set(cells))} unique")
+    print(f"{'method':<10} {'ns/cell':>8}")
+    for name, fn in cases:
+        seconds, _ = timed(fn)
+        print(f"{name:<10} {seconds / len(cells) * 1e9:>8.0f}")
+
+
+def bench_records(args):
+    """
+    Память под N ставок: словарь на строку (как до RateRecord), список RateRecord, RateBatch,
+    и DataFrame из RateBatch.to_pandas. tracemalloc, удерживаемая после построения память, МБ.
+    """
+    rnd = random.Random(args.seed)
+    per_product = len(TERMS) * len(CURRENCIES)
+    products = max(1, args.rows // per_product)
+    metas = [product_meta(f"Mock{p // 20:04d}", p // 20, f'АТ "Mock{p // 20:04d}"', 'Приватний',
+                          f"Депозит {p}", f"http://127.0.0.1/bank/{p // 20}/product/{p}") for p in range(products)]
+    rates = [(m, t, c, round(rnd.uniform(0.5, 16.0), 2)) for m in metas for t in TERMS for c in CURRENCIES]
+
+    def dicts():
+        return [dict(m._asdict(), term=t, currency=c, rate=r) for m, t, c, r in rates]
+
+    def records():
+        return [RateRecord(m, t, c, r) for m, t, c, r in rates]
+
+    def batch():
+        b = RateBatch()
+        for m, t, c, r in rates:
+            b.append(m, t, c, r)
+        return b
+
+    cases = [('dicts', dicts), ('RateRecord', records), ('RateBatch', batch),
+             ('to_pandas', lambda: batch().to_pandas()), ('categorical', lambda: batch().to_pandas(categorical=True))]
+    print(f"{len(rates)} rates, {products} products")
+    print(f"{'storage':<12} {'MB':>8} {'bytes/row':>10} {'build s':>8}")
+    for name, build in cases:
+        gc.collect()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        result = build()
+        seconds = time.perf_counter() - t0
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del result
+        print(f"{name:<12} {size / 2 ** 20:>8.1f} {size / len(rates):>10.0f} {seconds:>8.2f}")
@@ -0,0 +1,43 @@
+"""run_all против заглушки банков (src/mockserver.py) при разном числе банков"""
+import os
+import time
+
+from src.log import get_logger
+from src.main import run_all
+from src.memprof import peak_rss_mb
+from src.mockserver import MOCK_DIR, _kinds, _start, make_app, write_config
+
+from .data import sizes
+
+log = get_logger()
+
+
+async def bench_scale(args):
+    """run_all против заглушки для каждого числа банков из --scale"""
+    rows = []
+    for n in sizes(args.scale):
+        app = make_app(n, args.products, args.seed, args.latency, args.jitter, args.error_rate, _kinds(args.kinds))
+        runner = await _start(app, args.host, args.port)
+        out_dir = os.path.join(MOCK_DIR, f'scale_{n}')
+        path = write_config(os.path.join(out_dir, 'mock.env'), f"http://{args.host}:{args.port}", app['banks'],
+                            out_dir=out_dir)
+        t0 = time.perf_counter()
+        try:
+            status = await run_all(config_path=path, profile_memory=args.profile_memory) or {}
+        finally:
+            await runner.cleanup()
+        elapsed = time.perf_counter() - t0
+        counts = {}
+        for s in status.values():
+            counts[s['status']] = counts.get(s['status'], 0) + 1
+        rows.append((n, elapsed, sum(s['rows'] for s in status.values()), app['stats']['requests'],
+                     peak_rss_mb() or 0, counts))
+
+    print(f"{'banks':>6} {'seconds':>9} {'rows':>8} {'requests':>9} {'rows/s':>8} {'peak MB':>8}  status")
+    for n, sec, nrows, reqs, rss, counts in rows:
+        print(f"{n:>6} {sec:>9.1f} {nrows:>8} {reqs:>9} {nrows / sec if sec else 0:>8.0f} {rss:>8.0f}  {counts}")
+    # регрессия по памяти: пиковый RSS всего бенчмарка не должен превышать лимит
+    peak = peak_rss_mb()
+    if args.memory_limit and peak and peak > args.memory_limit:
+        log.error("Peak RSS %.0f MB exceeds --memory-limit %s MB", peak, args.memory_limit)
+        raise SystemExit(1)
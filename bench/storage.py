@@ -0,0 +1,101 @@
+"""Запросы к истории, сравнительные срезы, запись прогона"""
+import os
+import pickle
+import random
+import shutil
+import tempfile
+from datetime import timedelta
+
+import pandas as pd
+
+from src.aggregates import AggregateState
+from src.db import save_all_to_db
+from src.log import setup_logging
+from src.mockserver import CURRENCIES, TERMS
+from src.query import RateIndex
+from src.xlsx import save_all_to_xlsx
+
+from .data import sizes, synthetic_history, timed
+
+
+def bench_query(args):
+    """Точечные и диапазонные запросы: RateIndex (bisect + вторичные индексы) против фильтрации всего DataFrame"""
+    df = synthetic_history(args.banks, args.products, args.days, args.seed)
+    build, index = timed(lambda: RateIndex(df))
+    rnd = random.Random(args.seed)
+    keys = rnd.sample(index.keys(), min(args.queries, len(index.series)))
+    dates = [index.dates[rnd.randrange(len(index.dates))] for _ in keys]
+    ts = pd.to_datetime(df['date'])
+
+    def scan_point():
+        for (bank, product, currency, term), d in zip(keys, dates):
+            hit = df[(df['bank'] == bank) & (df['product'] == product) & (df['currency'] == currency)
+                     & (df['term'] == term) & (ts <= pd.Timestamp(d))]
+            hit['rate'].iloc[-1] if len(hit) else None
+
+    def index_point():
+        for key, d in zip(keys, dates):
+            index.rate_on(key, d)
+
+    def scan_range():
+        for (bank, _, currency, term), d in zip(keys, dates):
+            df[(df['bank'] == bank) & (df['currency'] == currency) & (df['term'] == term)
+               & (ts >= pd.Timestamp(d) - pd.Timedelta(days=30)) & (ts <= pd.Timestamp(d))]
+
+    def index_range():
+        for (bank, _, currency, term), d in zip(keys, dates):
+            index.get_rates(bank=bank, currency=currency, term=term, date_range=(d - timedelta(days=30), d))
+
+    n = len(keys)
+    print(f"{len(df)} rows, {len(index.series)} keys, {len(index.dates)} days; index build {build:.2f}s")
+    print(f"{'query':>12} {'scan ms':>9} {'index ms':>9} {'speedup':>8}")
+    for name, scan, indexed in (('point as-of', scan_point, index_point), ('range 30d', scan_range, index_range)):
+        scan_s, _ = timed(scan)
+        index_s, _ = timed(indexed)
+        print(f"{name:>12} {scan_s / n * 1000:>9.3f} {index_s / n * 1000:>9.3f} {scan_s / index_s:>7.0f}x")
+
+
+def bench_aggregates(args):
+    """
+    Обновление сравнительных срезов за один прогон (AggregateState.update + sheets) при разной длине истории:
+    состояние хранит последние ставки и keep_days срезов, поэтому время и размер не растут с числом дней.
+    Для сравнения — пересчёт тех же срезов из всей истории (фильтр последних дней по полному DataFrame).
+    """
+    setup_logging('WARNING')
+    print(f"{'days':>6} {'rows':>9} {'update ms':>10} {'state KB':>9} {'history ms':>11}")
+    for days in sizes(args.days):
+        history = synthetic_history(args.banks, args.products, days + 1, args.seed)
+        by_day = [frame for _, frame in history.groupby('date', sort=True)]
+        state = AggregateState()
+        for frame in by_day[:-1]:
+            state.update(frame)
+        today = by_day[-1]
+        # повторный прогон за тот же день заменяет его срез, поэтому повторы меряют одно и то же обновление
+        update_s, _ = timed(lambda: (state.update(today), state.sheets()), args.repeat)
+        size_kb = len(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)) / 1024
+
+        def from_history():
+            fresh = AggregateState()
+            recent = history[history['date'] >= history['date'].max() - pd.Timedelta(days=fresh.keep_days - 1)]
+            for _, frame in recent.groupby('date', sort=True):
+                fresh.update(frame)
+            fresh.sheets()
+
+        history_s, _ = timed(from_history, args.repeat)
+        print(f"{days:>6} {len(history) - len(today):>9} {update_s * 1000:>10.1f} {size_kb:>9.0f} {history_s * 1000:>11.1f}")
+
+
+def bench_db(args):
+    """Скорость записи одного прогона: SQLite (save_all_to_db) против openpyxl (save_all_to_xlsx)"""
+    setup_logging('WARNING')
+    print(f"{'rows':>9} {'xlsx s':>8} {'sqlite s':>9} {'xlsx rows/s':>12} {'sqlite rows/s':>14}")
+    for n in sizes(args.rows):
+        keys = len(CURRENCIES) * len(TERMS) * args.products
+        df = synthetic_history(max(1, -(-n // keys)), args.products, 1, args.seed).head(n)
+        tmp = tempfile.mkdtemp(prefix='bench_db_')
+        try:
+            xlsx_s, _ = timed(lambda: save_all_to_xlsx(df, os.path.join(tmp, 'bench.xlsx')))
+            db_s, _ = timed(lambda: save_all_to_db(df, os.path.join(tmp, 'bench.sqlite')))
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        print(f"{len(df):>9} {xlsx_s:>8.2f} {db_s:>9.2f} {len(df) / xlsx_s:>12.0f} {len(df) / db_s:>14.0f}")
@@ -0,0 +1,180 @@
+import os, pickle, sqlite3
+from datetime import timedelta
+from typing import Dict, Optional
+
+import pandas as pd
+
+from .log import get_logger
+from .query import get_index
+from .xlsx import DATE_FORMAT, OUTPUT_DIR, RATE_FORMAT, save_sheets_to_xlsx
+
+log = get_logger()
+
+STATE_PATH = os.path.join(OUTPUT_DIR, '.cache', 'aggregates.pkl')
+
+KEY_COLS = ['bank', 'product', 'currency', 'term']
+INFO_COLS = ['nkb', 'full_name', 'group_1']
+
+BEST_SHEET = "Best Rates"
+CHANGES_SHEET = "Weekly Changes"
+GROUPS_SHEET = "State vs Private"
+
+
+def _term_order(frame: pd.DataFrame) -> pd.Series:
+    return pd.to_numeric(frame['term'].astype(str).str.extract(r'(\d+)')[0], errors='coerce')
+
+
+class AggregateState:
+    """
+    Состояние сравнительных срезов, обновляемое инкрементально:
+    latest    - последняя ставка по каждому ключу (bank, product, currency, term);
+    snapshots - ставки по ключам за последние keep_days дней прогонов (для изменений за неделю).
+    Размер состояния зависит от числа продуктов, а не от длины истории, поэтому
+    обновление за прогон стоит одинаково независимо от того, сколько дней уже собрано.
+    """
+
+    def __init__(self, keep_days: int = 8):
+        self.keep_days = keep_days
+        self.latest = pd.DataFrame(columns=KEY_COLS + INFO_COLS + ['rate', 'date']).set_index(KEY_COLS)
+        self.snapshots: Dict[pd.Timestamp, pd.Series] = {}
+
+    @classmethod
+    def load(cls, path: str = STATE_PATH, keep_days: int = 8) -> Optional['AggregateState']:
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        state.keep_days = keep_days
+        return state
+
+    def save(self, path: str = STATE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def update(self, df: pd.DataFrame):
+        """Учесть строки прогона (один день); повторный прогон за тот же день заменяет его срез"""
+        if df.empty:
+            return
+        today = df[KEY_COLS + INFO_COLS + ['rate', 'date']].drop_duplicates(KEY_COLS, keep='last').set_index(KEY_COLS)
+        kept = self.latest[~self.latest.index.isin(today.index)]
+        self.latest = pd.concat([kept, today]) if len(kept) else today
+        day = pd.Timestamp(today['date'].max()).normalize()
+        self.snapshots[day] = today['rate'].astype(float)
+        for old in sorted(self.snapshots)[:-self.keep_days]:
+            del self.snapshots[old]
+
+    def current(self) -> pd.DataFrame:
+        """Рыночный срез: ключи, встреченные в последнем прогоне"""
+        if self.latest.empty:
+            return self.latest.reset_index()
+        return self.latest[self.latest['date'] == self.latest['date'].max()].reset_index()
+
+    def best_rates(self) -> pd.DataFrame:
+        """Лучшая ставка по валюте и сроку среди всех банков"""
+        cur = self.current().dropna(subset=['rate'])
+        if cur.empty:
+            return pd.DataFrame(columns=['currency', 'term', 'rate', 'bank', 'product', 'group_1', 'offers', 'date'])
+        cur['rate'] = cur['rate'].astype(float)
+        best = cur.loc[cur.groupby(['currency', 'term'])['rate'].idxmax()]
+        offers = cur.groupby(['currency', 'term'])['bank'].nunique().rename('offers')
+        best = best.join(offers, on=['currency', 'term'])
+        best = best.assign(_t=_term_order(best)).sort_values(['currency', '_t'])
+        return best[['currency', 'term', 'rate', 'bank', 'product', 'group_1', 'offers', 'date']].reset_index(drop=True)
+
+    def weekly_changes(self, days: int = 7) -> pd.DataFrame:
+        """Изменения ставок к срезу неделю назад (или к самому раннему из сохранённых)"""
+        columns = KEY_COLS + ['group_1', 'rate_before', 'rate', 'change', 'status', 'date_before', 'date']
+        if len(self.snapshots) < 2:
+            return pd.DataFrame(columns=columns)
+        dates = sorted(self.snapshots)
+        now = dates[-1]
+        target = now - timedelta(days=days)
+        earlier = [d for d in dates[:-1] if d <= target]
+        before_day = earlier[-1] if earlier else dates[0]
+        both = pd.concat({'rate_before': self.snapshots[before_day], 'rate': self.snapshots[now]}, axis=1)
+        both['change'] = (both['rate'] - both['rate_before']).round(2)
+        both['status'] = 'changed'
+        both.loc[both['rate_before'].isna(), 'status'] = 'new'
+        both.loc[both['rate'].isna(), 'status'] = 'removed'
+        both = both[(both['status'] != 'changed') | (both['change'] != 0)]
+        both = both.join(self.latest[['group_1']], how='left')
+        both['date_before'], both['date'] = before_day, now
+        both = both.reset_index()
+        both = both.assign(_abs=both['change'].abs()).sort_values(['status', '_abs'], ascending=[True, False])
+        return both[columns].reset_index(drop=True)
+
+    def group_summary(self) -> pd.DataFrame:
+        """Державні vs приватні банки (group_1): max / mean / кількість банків по валюті і терміну"""
+        cur = self.current().dropna(subset=['rate'])
+        if cur.empty:
+            return pd.DataFrame(columns=['currency', 'term'])
+        cur['rate'] = cur['rate'].astype(float)
+        stats = cur.groupby(['currency', 'term', 'group_1']).agg(
+            max=('rate', 'max'), mean=('rate', 'mean'), banks=('bank', 'nunique'))
+        wide = stats.unstack('group_1')
+        wide.columns = [f"{group} {stat}" for stat, group in wide.columns]
+        wide = wide[sorted(wide.columns)].reset_index()
+        wide = wide.assign(_t=_term_order(wide)).sort_values(['currency', '_t']).drop(columns='_t')
+        return wide.round(2).reset_index(drop=True)
+
+    def sheets(self) -> Dict[str, pd.DataFrame]:
+        return {BEST_SHEET: self.best_rates(), CHANGES_SHEET: self.weekly_changes(), GROUPS_SHEET: self.group_summary()}
+
+
+def seed_from_history(state: AggregateState, history_path: str):
+    """Первый запуск: срезы на последние keep_days дат уже записанной истории (однократно)"""
+    if not history_path or not os.path.exists(history_path):
+        return
+    try:
+        index = get_index(history_path)
+    except Exception as e:
+        log.warning("Aggregates seed skipped: %s", e)
+        return
+    for day in index.dates[-state.keep_days:]:
+        rows = []
+        for key in index.keys():
+            as_of, rate = index.rate_on(key, day)
+            if as_of is not None:
+                rows.append(index._row(key, day, rate))
+        if rows:
+            frame = pd.DataFrame(rows)
+            for c in INFO_COLS:
+                if c not in frame.columns:
+                    frame[c] = ''
+            frame['date'] = pd.to_datetime(frame['date'])
+            state.update(frame)
+
+
+def update_aggregates(df: pd.DataFrame, history_path: str = '', state_path: str = STATE_PATH) -> AggregateState:
+    """
+    Обновить состояние строками прогона, ничего не записывая.
+    history_path - основной файл истории, из него засевается состояние при первом запуске.
+    Выгрузка (write_aggregates) и state.save(state_path) - за вызывающим и только после успешной записи истории,
+    иначе при сбое записи в срезах и состоянии остался бы день, которого нет в истории.
+    """
+    state = AggregateState.load(state_path)
+    if state is None:
+        state = AggregateState()
+        seed_from_history(state, history_path)
+    state.update(df)
+    return state
+
+
+def write_aggregates(state: AggregateState, out_path: str, db_file: str = '') -> None:
+    """Сравнительные срезы: листы в out_path и (если задан db_file) таблицы agg_* в SQLite"""
+    sheets = state.sheets()
+    save_sheets_to_xlsx(sheets, out_path, {'rate': RATE_FORMAT, 'rate_before': RATE_FORMAT,
+                                           'date': DATE_FORMAT, 'date_before': DATE_FORMAT})
+    if db_file:
+        con = sqlite3.connect(db_file)
+        try:
+            with con:
+                for name, frame in sheets.items():
+                    table = 'agg_' + name.lower().replace(' ', '_')
+                    frame.to_sql(table, con, if_exists='replace', index=False)
+        finally:
+            con.close()
@@ -0,0 +1,142 @@
+import hashlib, os, sqlite3, threading, zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Optional, Union
+
+from .log import get_logger
+
+try:
+    import zstandard
+except ImportError:  # zstandard не обязателен, без него используется zlib
+    zstandard = None
+
+log = get_logger()
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    bank  TEXT NOT NULL,
+    url   TEXT NOT NULL,
+    date  TEXT NOT NULL,
+    hash  TEXT NOT NULL,
+    codec TEXT NOT NULL,
+    size  INTEGER NOT NULL,
+    PRIMARY KEY (bank, url, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pages_hash ON pages (hash);
+"""
+
+
+class PageArchive:
+    """
+    Архив загруженных страниц (HTML/JS/PDF).
+    Содержимое хранится по sha256 (content-addressed), сжато zstd (или zlib),
+    одинаковые страницы за разные дни занимают место один раз.
+    Индекс (bank, url, date) -> hash лежит в SQLite.
+    Во время прогона страницы пишутся через submit: хэш, сжатие и запись индекса выполняет один
+    фоновый поток-писатель, цикл событий не ждёт диска. Уровень сжатия на этом пути невысокий (level),
+    zstd/zlib распаковывают блобы любого уровня.
+    """
+
+    def __init__(self, root: str, retention_days: int = 0, level: int = 3):
+        self.root = root
+        self.retention_days = int(retention_days or 0)
+        self.level = int(level)
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        # соединением пользуются и поток-писатель, и основной поток (get/prune), доступ под _lock
+        self.con = sqlite3.connect(os.path.join(root, 'index.sqlite'), check_same_thread=False)
+        self.con.executescript(INDEX_SCHEMA)
+        self.codec = 'zst' if zstandard else 'zlib'
+        self._lock = threading.Lock()
+        self._writer = None
+
+    def _blob_path(self, digest: str, codec: str) -> str:
+        return os.path.join(self.root, 'objects', digest[:2], f"{digest[2:]}.{codec}")
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == 'zst':
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return zlib.compress(data, max(1, min(self.level, 9)))
+
+    @staticmethod
+    def _decompress(data: bytes, codec: str) -> bytes:
+        if codec == 'zst':
+            if not zstandard:
+                raise RuntimeError("archive blob is zstd-compressed, install zstandard")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return zlib.decompress(data)
+
+    def put(self, bank: str, url: str, content: Union[str, bytes], day: Optional[date] = None) -> str:
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        digest = hashlib.sha256(data).hexdigest()
+        day = (day or datetime.now().date()).isoformat()
+
+        with self._lock:
+            row = self.con.execute("SELECT codec FROM pages WHERE hash = ? LIMIT 1", (digest,)).fetchone()
+        codec = row[0] if row else self.codec
+        path = self._blob_path(digest, codec)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(self._compress(data))
+            os.replace(tmp, path)
+
+        with self._lock, self.con:
+            self.con.execute(
+                "INSERT OR REPLACE INTO pages (bank, url, date, hash, codec, size) VALUES (?, ?, ?, ?, ?, ?)",
+                (bank, url, day, digest, codec, len(data)),
+            )
+        return digest
+
+    def submit(self, bank: str, url: str, content: Union[str, bytes], day: Optional[date] = None) -> Future:
+        """put в фоновом потоке-писателе (один на архив, записи идут по порядку); close() дожидается очереди"""
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='archive')
+        return self._writer.submit(self.put, bank, url, content, day)
+
+    def get(self, bank: str, url: str, day: Optional[date] = None) -> Optional[bytes]:
+        """Содержимое страницы на дату day (последний снимок не позже day)"""
+        day = (day or datetime.now().date()).isoformat()
+        with self._lock:
+            row = self.con.execute(
+                "SELECT hash, codec FROM pages WHERE bank = ? AND url = ? AND date <= ? ORDER BY date DESC LIMIT 1",
+                (bank, url, day),
+            ).fetchone()
+        if not row:
+            return None
+        with open(self._blob_path(*row), 'rb') as f:
+            return self._decompress(f.read(), row[1])
+
+    def get_text(self, bank: str, url: str, day: Optional[date] = None) -> Optional[str]:
+        data = self.get(bank, url, day)
+        return data.decode('utf-8', errors='replace') if data is not None else None
+
+    def prune(self, retention_days: Optional[int] = None) -> int:
+        """Удаляем записи старше retention_days и объекты, на которые больше никто не ссылается"""
+        days = self.retention_days if retention_days is None else int(retention_days)
+        if days <= 0:
+            return 0
+        cutoff = (datetime.now().date() - timedelta(days=days)).isoformat()
+        with self._lock, self.con:
+            stale = self.con.execute(
+                "SELECT DISTINCT hash, codec FROM pages WHERE date < ?", (cutoff,)).fetchall()
+            self.con.execute("DELETE FROM pages WHERE date < ?", (cutoff,))
+        removed = 0
+        for digest, codec in stale:
+            with self._lock:
+                used = self.con.execute("SELECT 1 FROM pages WHERE hash = ? LIMIT 1", (digest,)).fetchone()
+            if used:
+                continue
+            try:
+                os.remove(self._blob_path(digest, codec))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        log.info("Archive prune: %s objects removed (older than %s)", removed, cutoff)
+        return removed
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+        self.con.close()
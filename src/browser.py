@@ -0,0 +1,152 @@
+import asyncio, os, re
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from playwright.async_api import Browser, BrowserContext, Page
+
+from .log import get_logger
+from .xlsx import OUTPUT_DIR
+
+try:
+    from playwright_stealth import Stealth          # playwright-stealth >= 2
+except ImportError:
+    Stealth = None
+try:
+    from playwright_stealth import stealth_async    # playwright-stealth 1.x
+except ImportError:
+    stealth_async = None
+
+log = get_logger()
+
+STORAGE_DIR = os.path.join(OUTPUT_DIR, '.cache', 'storage')
+
+# Признаки страниц-заглушек антибот-защиты (Cloudflare, DDoS-Guard, DataDome): бывают только на самой заглушке
+CHALLENGE_RE = re.compile(
+    r"(cf-challenge|challenge-platform|cf_chl_|Just a moment\.\.\.|Checking your browser|"
+    r"ddos-guard|Attention Required!|captcha-delivery)",
+    re.I,
+)
+# Виджеты капчи встречаются и на обычных страницах (формы заявки, обратная связь): проверкой считаются
+# только вместе с кодом ответа заглушки
+CAPTCHA_RE = re.compile(r"(g-recaptcha|h-captcha|hcaptcha\.com)", re.I)
+CHALLENGE_STATUSES = (403, 429, 503)
+
+
+class ChallengeError(Exception):
+    """Страница-проверка антибот-защиты не пройдена за отведённое время"""
+
+
+def host_of(url: str) -> str:
+    return urlparse(url).hostname or ''
+
+
+def is_challenge(html: str, status: Optional[int] = None) -> bool:
+    """Страница-проверка: маркер заглушки или виджет капчи при коде 403/429/503"""
+    if not html:
+        return False
+    # маркеры ищем только в начале документа: заглушки короткие
+    head = html[:20000]
+    if CHALLENGE_RE.search(head):
+        return True
+    return status in CHALLENGE_STATUSES and bool(CAPTCHA_RE.search(head))
+
+
+async def apply_stealth(target) -> bool:
+    """Маскировка headless-признаков на уровне контекста: скрипты добавляются один раз для всех его страниц"""
+    if Stealth is not None:
+        await Stealth().apply_stealth_async(target)
+        return True
+    if stealth_async is not None:
+        # 1.x вызывает только add_init_script, который есть и у BrowserContext
+        await stealth_async(target)
+        return True
+    return False
+
+
+class ContextPool:
+    """
+    Пул браузерных контекстов: один контекст на хост на весь прогон.
+    Отпечаток (user agent, язык, часовой пояс, viewport) и stealth применяются один раз при создании контекста;
+    cookies и localStorage хоста, прошедшего антибот-проверку, сохраняются в storage_dir/<host>.json
+    и подхватываются следующими страницами и прогонами.
+    """
+
+    def __init__(self, browser: Browser, storage_dir: str = STORAGE_DIR, stealth: bool = True,
+                 locale: str = 'uk-UA', timezone_id: str = 'Europe/Kyiv', challenge_wait: float = 8.0):
+        self.browser = browser
+        self.storage_dir = storage_dir
+        self.stealth = stealth
+        self.locale = locale
+        self.timezone_id = timezone_id
+        self.challenge_wait = challenge_wait
+        self._contexts: Dict[str, BrowserContext] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._stealth_warned = False
+
+    def _state_path(self, host: str) -> str:
+        return os.path.join(self.storage_dir, f"{host}.json")
+
+    async def get(self, url: str, user_agent: Optional[str] = None) -> BrowserContext:
+        host = host_of(url)
+        context = self._contexts.get(host)
+        if context:
+            return context
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            if host in self._contexts:
+                return self._contexts[host]
+            options = {'locale': self.locale, 'timezone_id': self.timezone_id,
+                       'viewport': {'width': 1366, 'height': 768},
+                       'extra_http_headers': {'Accept-Language': 'uk-UA,uk;q=0.9,en;q=0.8'}}
+            if user_agent:
+                options['user_agent'] = user_agent
+            state = self._state_path(host)
+            if os.path.exists(state):
+                options['storage_state'] = state
+            context = await self.browser.new_context(**options)
+            if self.stealth and not await apply_stealth(context) and not self._stealth_warned:
+                self._stealth_warned = True
+                log.warning("playwright-stealth is not installed, stealth disabled")
+            self._contexts[host] = context
+            return context
+
+    async def save_state(self, url: str):
+        """Сохранить cookies/storage хоста (после прохождения проверки и при закрытии)"""
+        host = host_of(url)
+        context = self._contexts.get(host)
+        if not context:
+            return
+        try:
+            os.makedirs(self.storage_dir, exist_ok=True)
+            tmp = self._state_path(host) + '.tmp'
+            await context.storage_state(path=tmp)
+            os.replace(tmp, self._state_path(host))
+        except Exception as e:
+            log.warning("Storage state for %s not saved: %s", host, e)
+
+    async def pass_challenge(self, page: Page, url: str, status: Optional[int]) -> str:
+        """
+        Страница оказалась проверкой: ждём не дольше challenge_wait, пока JS-проверка пройдёт сама.
+        Не прошла — ChallengeError сразу, без ожидания полного таймаута страницы.
+        """
+        deadline = asyncio.get_running_loop().time() + self.challenge_wait
+        while asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.5)
+            try:
+                html = await page.content()
+            except Exception:
+                continue   # страница перезагружается после проверки
+            # код ответа тот же, что у заглушки: капча на месте - проверка ещё не пройдена
+            if not is_challenge(html, status):
+                await self.save_state(url)
+                log.info("Bot challenge passed for %s", host_of(url))
+                return html
+        raise ChallengeError(f"bot challenge on {host_of(url)} (status {status})")
+
+    async def close(self):
+        for host in list(self._contexts):
+            await self.save_state(f"https://{host}/")
+            try:
+                await self._contexts.pop(host).close()
+            except Exception:
+                pass
@@ -0,0 +1,132 @@
+import os, sqlite3
+from typing import Dict, Any, Optional
+
+import pandas as pd
+
+from .xlsx import OUTPUT_DIR, prepare_frame
+from .log import get_logger
+
+log = get_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS banks (
+    bank_id   INTEGER PRIMARY KEY,
+    name      TEXT NOT NULL UNIQUE,     -- секция конфига
+    full_name TEXT,
+    group_1   TEXT,
+    nkb       INTEGER                   -- код НКБ, у секций одного банка может совпадать
+);
+CREATE TABLE IF NOT EXISTS products (
+    product_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    bank_id    INTEGER NOT NULL REFERENCES banks(bank_id),
+    name       TEXT NOT NULL,
+    source_url TEXT,
+    UNIQUE (bank_id, name)
+);
+CREATE TABLE IF NOT EXISTS rates (
+    date       TEXT NOT NULL,
+    bank_id    INTEGER NOT NULL REFERENCES banks(bank_id),
+    product_id INTEGER NOT NULL REFERENCES products(product_id),
+    currency   TEXT NOT NULL,
+    term       INTEGER NOT NULL,        -- месяцев
+    rate       REAL,
+    PRIMARY KEY (date, bank_id, product_id, currency, term)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rates_lookup ON rates (bank_id, currency, term, date);
+"""
+
+VIEWS = """
+DROP VIEW IF EXISTS v_rates;
+CREATE VIEW v_rates AS
+    SELECT r.date, b.name AS bank, b.nkb, b.full_name, b.group_1, p.name AS product,
+           r.currency, r.term, r.rate, p.source_url
+    FROM rates r
+    JOIN banks b ON b.bank_id = r.bank_id
+    JOIN products p ON p.product_id = r.product_id;
+"""
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    con = sqlite3.connect(db_path)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute("PRAGMA foreign_keys=ON")
+    con.executescript(SCHEMA)
+    if 'nkb' not in [row[1] for row in con.execute("PRAGMA table_info(banks)")]:
+        # база прежней схемы: bank_id был кодом НКБ, он же остаётся суррогатным ключом
+        with con:
+            con.execute("ALTER TABLE banks ADD COLUMN nkb INTEGER")
+            con.execute("UPDATE banks SET nkb = bank_id")
+    con.executescript(VIEWS)
+    return con
+
+
+def _nkb(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _bank_rows(df: pd.DataFrame, parsers: Optional[Dict[str, Any]]):
+    """Справочник банков: из атрибутов парсеров (nkb/full_name/group_1), иначе из самих строк"""
+    banks = {}
+    for parser in (parsers or {}).values():
+        banks[parser.name] = (parser.name, _nkb(parser.nkb), parser.full_name, parser.group_1)
+    for row in df[['nkb', 'bank', 'full_name', 'group_1']].drop_duplicates('bank').itertuples(index=False):
+        if row.bank not in banks:
+            banks[row.bank] = (row.bank, _nkb(row.nkb), row.full_name, row.group_1)
+    return list(banks.values())
+
+
+def save_all_to_db(all_products, db_path=None, parsers=None):
+    """
+    Загружаем результаты прогона в SQLite одной транзакцией.
+    Повторный прогон за ту же дату обновляет ставки (upsert по date, bank, product, currency, term).
+    """
+    db_path = db_path or os.path.join(OUTPUT_DIR, 'Deposit_Rate_Data.sqlite')
+    df = all_products if isinstance(all_products, pd.DataFrame) else prepare_frame(all_products)
+    df = df[df['bank'] != ''].copy()
+    df['term'] = pd.to_numeric(df['term'].str.rstrip('m'), errors='coerce')
+    df = df.dropna(subset=['term'])
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+
+    con = connect(db_path)
+    try:
+        with con:  # одна транзакция на весь прогон
+            con.executemany(
+                "INSERT INTO banks (name, nkb, full_name, group_1) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET nkb=excluded.nkb, "
+                "full_name=excluded.full_name, group_1=excluded.group_1",
+                _bank_rows(df, parsers),
+            )
+            bank_ids = dict(con.execute("SELECT name, bank_id FROM banks"))
+            df['bank_id'] = df['bank'].map(bank_ids)
+            unmapped = df['bank_id'].isna()
+            if unmapped.any():
+                log.warning("SQLite: %s rows of banks missing from banks table dropped: %s", int(unmapped.sum()),
+                            ', '.join(sorted(df.loc[unmapped, 'bank'].astype(str).unique())))
+                df = df[~unmapped]
+
+            products = df[['bank_id', 'product', 'source_url']].drop_duplicates(['bank_id', 'product'])
+            con.executemany(
+                "INSERT INTO products (bank_id, name, source_url) VALUES (?, ?, ?) "
+                "ON CONFLICT(bank_id, name) DO UPDATE SET source_url=excluded.source_url",
+                products.itertuples(index=False, name=None),
+            )
+            product_ids = {(b, n): pid for pid, b, n in con.execute("SELECT product_id, bank_id, name FROM products")}
+            df['product_id'] = [product_ids[(b, n)] for b, n in zip(df['bank_id'], df['product'])]
+
+            rates = df[['date', 'bank_id', 'product_id', 'currency', 'term', 'rate']].astype(
+                {'bank_id': int, 'product_id': int, 'term': int})
+            rates = rates.astype(object).where(rates.notna(), None)
+            con.executemany(
+                "INSERT INTO rates (date, bank_id, product_id, currency, term, rate) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(date, bank_id, product_id, currency, term) DO UPDATE SET rate=excluded.rate",
+                rates.itertuples(index=False, name=None),
+            )
+    finally:
+        con.close()
+
+    log.info("Saved SQLite -> %s (%s rows)", db_path, len(df))
+    return db_path
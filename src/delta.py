@@ -0,0 +1,119 @@
+import pandas as pd
+from datetime import datetime
+from openpyxl import load_workbook
+import os
+
+from .xlsx import DATE_FORMAT, OUTPUT_DIR, RATE_FORMAT, iter_chunks, prepare_frame, write_sheet_streaming
+from .log import get_logger
+
+log = get_logger()
+
+HISTORY_SHEET = "Rate History"
+KEY_COLS = ['bank', 'product', 'currency', 'term']
+HISTORY_COLS = [
+    'bank', 'nkb', 'full_name', 'group_1', 'product',
+    'currency', 'term', 'rate', 'source_url',
+    'valid_from', 'valid_to'
+]
+
+
+def load_history(out_path):
+    """Читаем лист истории (SCD-2). Пустой DataFrame, если файла/листа нет"""
+    if not os.path.exists(out_path):
+        return pd.DataFrame(columns=HISTORY_COLS)
+    workbook = load_workbook(out_path, read_only=True)
+    has_sheet = HISTORY_SHEET in workbook.sheetnames
+    workbook.close()
+    if not has_sheet:
+        return pd.DataFrame(columns=HISTORY_COLS)
+    df = pd.read_excel(out_path, sheet_name=HISTORY_SHEET)
+    for c in ('valid_from', 'valid_to'):
+        df[c] = pd.to_datetime(df[c])
+    df['term'] = df['term'].astype(str)
+    return df
+
+
+def apply_delta(history, today_df, today=None, complete_banks=None, keep_open=None):
+    """
+    Сравниваем сегодняшний срез с открытыми записями истории по (bank, product, currency, term).
+    - ставка не изменилась -> ничего не пишем
+    - ставка изменилась    -> закрываем старую запись (valid_to = today) и открываем новую
+    - ключ пропал          -> закрываем запись, но только если банк полностью собран в этом прогоне
+                              (complete_banks; None - все банки) и ключ не ушёл в карантин (keep_open)
+    - новый ключ           -> открываем запись
+    Возвращает (новая история, количество изменений).
+    """
+    today = pd.Timestamp(today or datetime.now().date())
+
+    snap = today_df.drop_duplicates(KEY_COLS, keep='last').copy()
+    snap['valid_from'] = today
+    snap['valid_to'] = pd.NaT
+    snap = snap[HISTORY_COLS]
+
+    if history.empty:
+        return snap.reset_index(drop=True), len(snap)
+
+    is_open = history['valid_to'].isna()
+    closed, opened = history[~is_open], history[is_open]
+
+    merged = opened.merge(snap[KEY_COLS + ['rate']], on=KEY_COLS, how='outer',
+                          suffixes=('', '_new'), indicator=True)
+
+    same_rate = (merged['rate'] == merged['rate_new']) | (merged['rate'].isna() & merged['rate_new'].isna())
+    both = merged['_merge'] == 'both'
+    keep_mask = both & same_rate
+    gone = merged['_merge'] == 'left_only'
+    # упавший / частичный банк или строки в карантине: ключ не исчез, просто сегодня не получен
+    if complete_banks is not None:
+        gone &= merged['bank'].isin(list(complete_banks))
+    if keep_open is not None and len(keep_open):
+        held = pd.MultiIndex.from_frame(pd.DataFrame(keep_open)[KEY_COLS].astype(str))
+        gone &= ~pd.MultiIndex.from_frame(merged[KEY_COLS].astype(str)).isin(held)
+    keep_mask = keep_mask | ((merged['_merge'] == 'left_only') & ~gone)
+    close_mask = gone | (both & ~same_rate)
+    new_keys = merged.loc[(merged['_merge'] == 'right_only') | (both & ~same_rate), KEY_COLS]
+
+    kept = merged.loc[keep_mask, HISTORY_COLS]
+    to_close = merged.loc[close_mask, HISTORY_COLS].copy()
+    to_close['valid_to'] = today
+    to_open = snap.merge(new_keys, on=KEY_COLS, how='inner')[HISTORY_COLS]
+
+    changes = len(to_close) + len(to_open)
+    result = pd.concat([closed, kept, to_close, to_open], ignore_index=True)
+    result = result.sort_values(KEY_COLS + ['valid_from'], kind='stable').reset_index(drop=True)
+    return result, changes
+
+
+def rebuild_daily_view(history, day):
+    """Полный срез ставок на дату day, восстановленный из истории"""
+    day = pd.Timestamp(day)
+    mask = (history['valid_from'] <= day) & (history['valid_to'].isna() | (history['valid_to'] > day))
+    view = history.loc[mask].drop(columns=['valid_from', 'valid_to']).copy()
+    view['date'] = day
+    return view.reset_index(drop=True)
+
+
+def save_delta_to_xlsx(all_products, out_path=None, progress=None, complete_banks=None, keep_open=None):
+    """
+    Дельта-режим: в файл пишутся только изменения ставок с интервалами действия.
+    complete_banks / keep_open - см. apply_delta: записи банков без статуса ok и карантина не закрываются.
+    """
+    out_path = out_path or os.path.join(OUTPUT_DIR, 'Deposit_Rate_Data.xlsx')
+
+    today_df = all_products if isinstance(all_products, pd.DataFrame) else prepare_frame(all_products)
+    history = load_history(out_path)
+    history, changes = apply_delta(history, today_df, today_df['date'].iloc[0] if len(today_df) else None,
+                                   complete_banks, keep_open)
+
+    # история переписывается целиком: потоковая запись write-only, остальные листы сохраняются
+    write_sheet_streaming(out_path, HISTORY_SHEET, iter_chunks(history),
+                          {'valid_from': DATE_FORMAT, 'valid_to': DATE_FORMAT, 'rate': RATE_FORMAT},
+                          progress=progress)
+
+    # Сколько строк сэкономили по сравнению с полным ежедневным срезом
+    full_rows = len(today_df)
+    saved = 100.0 * (1 - changes / full_rows) if full_rows else 0.0
+    log.info("Delta: %s changed rows of %s (history size %s, saved %.1f%% vs full snapshot)",
+             changes, full_rows, len(history), saved)
+    log.info("Saved Excel -> %s", out_path)
+    return out_path
@@ -0,0 +1,71 @@
+import json, os, re
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+
+from .xlsx import OUTPUT_DIR
+
+DEFAULT_CACHE_PATH = os.path.join(OUTPUT_DIR, '.cache', 'allurls.json')
+CACHE_PATH = DEFAULT_CACHE_PATH
+
+LOC_RE = re.compile(r"<loc>\s*([^<\s]+)\s*</loc>", re.I)
+
+_cache: Optional[Dict[str, Dict]] = None
+
+
+def set_cache_path(path: str = ''):
+    """Файл кэша списков продуктов (discovery_cache_file в [GENERAL]; пусто - по умолчанию), читается заново"""
+    global CACHE_PATH, _cache
+    CACHE_PATH = path or DEFAULT_CACHE_PATH
+    _cache = None
+
+
+def _load() -> Dict[str, Dict]:
+    global _cache
+    if _cache is None:
+        try:
+            with open(CACHE_PATH, encoding='utf-8') as f:
+                _cache = json.load(f)
+        except (OSError, ValueError):
+            _cache = {}
+    return _cache
+
+
+def load_allurls(bank: str) -> Dict[str, str]:
+    """Последний известный список продуктов банка {product_name: product_url}"""
+    return dict(_load().get(bank, {}).get('urls', {}))
+
+
+def load_skipped(bank: str) -> List[str]:
+    """url из discovery_url, которых нет на странице списка банка: продуктами не считаются"""
+    return list(_load().get(bank, {}).get('skipped', []))
+
+
+def save_allurls(bank: str, urls: Dict[str, str]):
+    _save(bank, 'urls', urls)
+
+
+def save_skipped(bank: str, urls: List[str]):
+    _save(bank, 'skipped', sorted(urls))
+
+
+def _save(bank: str, key: str, value):
+    cache = _load()
+    entry = cache.get(bank, {})
+    if entry.get(key) == value:
+        return
+    cache[bank] = {**entry, 'updated': datetime.now().isoformat(timespec='seconds'), key: value}
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    tmp = CACHE_PATH + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, CACHE_PATH)
+
+
+def parse_sitemap(text: str, pattern: Optional[str] = None) -> List[str]:
+    """URL из sitemap.xml (<loc>), при заданном pattern — только подходящие под регулярку"""
+    urls = [unquote(u) if '%' in u else u for u in LOC_RE.findall(text or '')]
+    if pattern:
+        rx = re.compile(pattern)
+        urls = [u for u in urls if rx.search(u)]
+    return list(dict.fromkeys(urls))
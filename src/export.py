@@ -0,0 +1,226 @@
+import asyncio, itertools, multiprocessing, queue
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import pandas as pd
+
+from .delta import save_delta_to_xlsx
+from .log import get_logger, setup_logging
+from .xlsx import DATE_FORMAT, RATE_FORMAT, iter_chunks, save_all_to_xlsx, write_sheet_streaming
+
+log = get_logger()
+
+# Виды заданий экспорта
+XLSX = 'xlsx'          # дописать строки на лист (save_all_to_xlsx)
+DELTA = 'delta'        # дельта-история (save_delta_to_xlsx)
+REBUILD = 'rebuild'    # полная перезапись листа потоком, write-only (write_sheet_streaming)
+
+
+# ------------------------------------------------------------
+# Сообщения между основным процессом и воркером
+# ------------------------------------------------------------
+class Begin(NamedTuple):
+    job: int
+    kind: str
+    out_path: str
+    options: Dict[str, Any]
+    total: int
+
+
+class Rows(NamedTuple):
+    """Типизированная порция строк: DataFrame сохраняет dtype колонок при передаче"""
+    job: int
+    frame: pd.DataFrame
+
+
+class End(NamedTuple):
+    job: int
+
+
+class Progress(NamedTuple):
+    job: int
+    stage: str       # 'received' - порция принята воркером, 'written' - строки записаны в книгу
+    rows: int
+    total: int
+
+
+class Done(NamedTuple):
+    job: int
+    path: str
+
+
+class Failed(NamedTuple):
+    job: int
+    error: str
+
+
+def run_job(begin: Begin, chunks: List[pd.DataFrame], progress: Callable[[int], None] = None) -> str:
+    """Выполнение одного задания (в воркере или в потоке при export_worker=False)"""
+    options = dict(begin.options)
+    if begin.kind == REBUILD:
+        return write_sheet_streaming(begin.out_path, options.get('sheet_name', "Select Rates"), iter(chunks),
+                                     options.get('formats', {'date': DATE_FORMAT, 'rate': RATE_FORMAT}), progress)
+
+    frame = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    if begin.kind == DELTA:
+        return save_delta_to_xlsx(frame, begin.out_path, progress=progress,
+                                  complete_banks=options.get('complete_banks'), keep_open=options.get('keep_open'))
+    if begin.kind == XLSX:
+        path = save_all_to_xlsx(frame, begin.out_path, sheet_name=options.get('sheet_name', "Select Rates"))
+        if progress:
+            progress(len(frame))
+        return path
+    raise ValueError(f"Unknown export kind: {begin.kind}")
+
+
+def _worker(inbox, outbox, log_level: str):
+    """Процесс экспорта: собирает порции каждого задания и выполняет его по End, в порядке поступления"""
+    setup_logging(log_level)
+    jobs: Dict[int, Any] = {}
+    while True:
+        msg = inbox.get()
+        if msg is None:
+            break
+        if isinstance(msg, Begin):
+            jobs[msg.job] = (msg, [], [0])
+        elif isinstance(msg, Rows):
+            begin, chunks, received = jobs[msg.job]
+            chunks.append(msg.frame)
+            received[0] += len(msg.frame)
+            outbox.put(Progress(msg.job, 'received', received[0], begin.total))
+        elif isinstance(msg, End):
+            begin, chunks, _ = jobs.pop(msg.job)
+            try:
+                path = run_job(begin, chunks,
+                               lambda n, job=msg.job, total=begin.total: outbox.put(Progress(job, 'written', n, total)))
+                outbox.put(Done(msg.job, path))
+            except Exception as e:
+                outbox.put(Failed(msg.job, f"{type(e).__name__}: {e}"))
+    outbox.put(None)
+
+
+class ExcelExporter:
+    """
+    Экспорт в Excel в отдельном процессе: основной цикл событий не блокируется сериализацией openpyxl.
+    Данные уходят порциями (Rows) по chunk_rows строк, о ходе записи сообщает on_progress(kind, path, stage, rows, total).
+    Задания выполняются строго по очереди, поэтому запись в один файл не перемешивается.
+    worker=False — то же самое в потоке текущего процесса.
+    """
+
+    def __init__(self, on_progress: Optional[Callable] = None, chunk_rows: int = 50000,
+                 worker: bool = True, log_level: str = 'INFO'):
+        self.on_progress = on_progress
+        self.chunk_rows = chunk_rows
+        self.worker = worker
+        self.log_level = log_level
+        self._ids = itertools.count(1)
+        self._jobs: Dict[int, Any] = {}
+        self._proc = None
+        self._inbox = self._outbox = None
+        self._listener: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()   # порции одного задания не перемешиваются с чужими
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def start(self):
+        if not self.worker or self._proc:
+            return self
+        # spawn: одинаково на Windows и Linux, воркер не наследует браузер и сокеты основного процесса
+        ctx = multiprocessing.get_context('spawn')
+        self._inbox = ctx.Queue(maxsize=8)   # ограничение очереди — обратное давление на отправку порций
+        self._outbox = ctx.Queue()
+        self._proc = ctx.Process(target=_worker, args=(self._inbox, self._outbox, self.log_level),
+                                 name='xlsx-export', daemon=True)
+        self._proc.start()
+        self._listener = asyncio.create_task(self._listen())
+        return self
+
+    async def close(self):
+        if not self._proc:
+            return
+        try:
+            await asyncio.to_thread(self._put, None)
+        except RuntimeError as e:
+            log.warning("%s, closing", e)
+        if self._listener:
+            await self._listener
+        await asyncio.to_thread(self._proc.join)
+        self._proc = None
+
+    def _notify(self, job: int, stage: str, rows: int, total: int):
+        info = self._jobs.get(job)
+        if info and self.on_progress:
+            try:
+                self.on_progress(info[1], info[2], stage, rows, total)
+            except Exception as e:
+                log.warning("Export progress callback failed: %s", e)
+
+    def _put(self, msg):
+        """put в ограниченную очередь; если воркер умер, очередь никто не разберёт — ошибка вместо вечного ожидания"""
+        while True:
+            try:
+                return self._inbox.put(msg, timeout=0.5)
+            except queue.Full:
+                if not self._proc or not self._proc.is_alive():
+                    raise RuntimeError("Export worker is not running")
+
+    def _get(self):
+        while True:
+            try:
+                return self._outbox.get(timeout=0.5)
+            except queue.Empty:
+                if not self._proc.is_alive():
+                    return None
+
+    async def _listen(self):
+        while True:
+            msg = await asyncio.to_thread(self._get)
+            if msg is None:
+                break
+            if isinstance(msg, Progress):
+                self._notify(msg.job, msg.stage, msg.rows, msg.total)
+            elif isinstance(msg, (Done, Failed)):
+                future = self._jobs.pop(msg.job)[0]
+                if isinstance(msg, Done):
+                    future.set_result(msg.path)
+                else:
+                    future.set_exception(RuntimeError(msg.error))
+        # воркер завершился (или упал): незавершённые задания — ошибка
+        for future, kind, path in self._jobs.values():
+            if not future.done():
+                future.set_exception(RuntimeError(f"Export worker exited before {kind} -> {path}"))
+        self._jobs.clear()
+
+    async def submit(self, kind: str, out_path: str, frame: Optional[pd.DataFrame] = None, **options) -> str:
+        """Отправить задание и дождаться его выполнения; возвращает путь к файлу"""
+        frame = frame if frame is not None else pd.DataFrame()
+        job = next(self._ids)
+        begin = Begin(job, kind, out_path, options, len(frame))
+        chunks = list(iter_chunks(frame, self.chunk_rows))
+
+        if not self.worker:
+            # в потоке, но тоже по одному заданию за раз
+            async with self._lock:
+                return await asyncio.to_thread(
+                    run_job, begin, chunks,
+                    lambda n: self.on_progress and self.on_progress(kind, out_path, 'written', n, len(frame)))
+
+        future = asyncio.get_running_loop().create_future()
+        self._jobs[job] = (future, kind, out_path)
+        async with self._lock:
+            await self.start()
+            try:
+                for msg in itertools.chain([begin], (Rows(job, c) for c in chunks), [End(job)]):
+                    await asyncio.to_thread(self._put, msg)
+            except RuntimeError:
+                self._jobs.pop(job, None)
+                if future.done():
+                    future.exception()   # ошибку уже выставил _listen, она уходит через raise ниже
+                else:
+                    future.cancel()
+                raise
+        return await future
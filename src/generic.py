@@ -1,72 +1,331 @@
 import re, asyncio, os
 from typing import List, Dict, Any, Optional
+import aiohttp
 from playwright.async_api import Page, Browser
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
+from .log import get_logger
+from .records import RateRecord, product_meta
+from .browser import is_challenge
+from .discovery import load_allurls, load_skipped, parse_sitemap, save_allurls, save_skipped
 
 class GenericBankParser:
     """
     Базовый абстрактный класс для всех банковских парсеров.
     """
     name: str = "GenericBank"
+    full_name: str = ""
+    nkb: int = 0
+    group_1: str = ""
     url: str = ""
     timeout: int = 120
     user_agent: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
     config: Dict[str, Any] = {}
+    archive = None       # PageArchive: сохранять загруженные страницы
+    replay_date = None   # дата: читать страницы из архива вместо сети
+    net = None           # NetworkLayer: общая на прогон aiohttp-сессия с прогретыми соединениями
+    contexts = None      # ContextPool: браузерный контекст на хост (stealth, cookies прошедших проверку)
+    journal = None       # RunJournal: завершённые продукты пишутся в журнал прогона (для --resume)
+    fetch_mode: str = "browser"   # 'browser' - через Playwright, 'http' - простой GET без браузера
+    concurrency: int = 1          # сколько страниц продуктов грузить параллельно
+    ready_selector: Optional[str] = None   # CSS-селектор готовности страницы (вместо ожидания networkidle)
+    cacheable: bool = True        # список продуктов можно брать из кэша прошлого прогона
+    discovery_url: str = ""       # sitemap.xml или JSON API со списком продуктов (GET без браузера) вместо self.url
+    discovery_pattern: str = ""   # регулярка для отбора url продуктов из sitemap
+    manifest = None      # ParserManifest из registry
     
     def __init__(self, config: Dict[str, Any] = None):
         if config:
             self.config = config
             self.timeout = int(config.get('timeout', self.timeout))  # Время ожидания загрузки
             self.user_agent = config.get('user_agent', self.user_agent)
+            # переопределение из config.env: другой стенд (например, src.mockserver) или несколько банков на одном парсере
+            self.name = config.get('name') or self.name
+            self.url = config.get('url') or self.url
+            # discovery_url= в секции: другой источник списка (пусто - только страница self.url)
+            if config.get('discovery_url') is not None:
+                self.discovery_url = config['discovery_url']
+            self.discovery_pattern = config.get('discovery_pattern') or self.discovery_pattern
         self.AllUrls: Dict[str, str] = {}   # {product_name: product_url}
+        self.results: List[RateRecord] = []  # накопленные ставки: при отмене по бюджету остаются частичные данные
+        self.resumed: Dict[tuple, List[RateRecord]] = {}   # --resume: {(product_name, product_url): records} из журнала
+        self.log = get_logger(self.name)
+
+    def from_archive(self, url: str) -> Optional[str]:
+        html = self.archive.get_text(self.name, url, self.replay_date) if self.archive else None
+        if html is None:
+            self.log.warning("No archived page for %s on %s", url, self.replay_date)
+        return html
+
+    async def fetch(self, browser: Browser, url: str, timeout: Optional[int] = None) -> Optional[str]:
+        """Загрузка страницы способом, заданным fetch_mode"""
+        if self.fetch_mode == "http":
+            return await self.fetch_http(url, timeout)
+        return await self.fetch_page(browser, url, timeout)
+
+    async def fetch_http(self, url: str, timeout: Optional[int] = None) -> Optional[str]:
+        """GET без браузера: для JSON/JS/статических страниц, через общую сессию прогона"""
+        timeout = timeout or self.timeout
+        if self.replay_date:
+            return self.from_archive(url)
+        try:
+            if self.net:
+                text = await self.net.get_text(url, timeout)
+            else:
+                headers = {'User-Agent': self.user_agent} if self.user_agent else None
+                async with aiohttp.ClientSession(headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+                    async with session.get(url) as response:
+                        response.raise_for_status()
+                        text = await response.text()
+            self.archive_content(url, text)
+            return text
+        except Exception as e:
+            self.log.error("Fetch_http %s: %s", url, e)
+            return None
 
     async def fetch_page(self, browser: Browser, url: str, timeout: Optional[int] = None) -> Optional[str]:
         timeout = timeout or self.timeout
+        if self.replay_date:
+            return self.from_archive(url)
         page = None
+        context = None
         try:
-            context = await browser.new_context(user_agent=self.user_agent) if self.user_agent else await browser.new_context()
+            if self.contexts:
+                # общий контекст хоста: stealth, отпечаток и cookies уже применены
+                context = await self.contexts.get(url, self.user_agent)
+            else:
+                context = await browser.new_context(user_agent=self.user_agent) if self.user_agent else await browser.new_context()
             page = await context.new_page()
-            await page.goto(url, timeout=timeout*1000, wait_until='domcontentloaded')
+            response = await page.goto(url, timeout=timeout*1000, wait_until='domcontentloaded')
+            if self.contexts:
+                status = response.status if response else None
+                if is_challenge(await page.content(), status):
+                    self.log.warning("Bot challenge on %s, waiting up to %ss", url, self.contexts.challenge_wait)
+                    await self.contexts.pass_challenge(page, url, status)
             # attempt to trigger lazy load
             try:
-                await page.wait_for_load_state('networkidle', timeout=5000)
+                if self.ready_selector:
+                    await page.wait_for_selector(self.ready_selector, timeout=5000)
+                else:
+                    await page.wait_for_load_state('networkidle', timeout=5000)
             except Exception:
                 pass
             for _ in range(3):
                 await page.evaluate('window.scrollBy(0, document.body.scrollHeight/4)')
                 await asyncio.sleep(0.5)
             html = await page.content()
-            await page.close()
-            await context.close()
+            self.archive_content(url, html)
             return html
         except Exception as e:
-            print(f"[ERROR] Fetch_page {self.name} {url}: {e}")
+            self.log.error("Fetch_page %s: %s", url, e)
+            return None
+        finally:
             try:
                 if page:
                     await page.close()
+                if context and not self.contexts:
+                    await context.close()
             except Exception:
                 pass
-            return None
+
+    def archive_content(self, url: str, content) -> None:
+        """Сохраняем загруженную страницу/файл в архив (если он включён), запись идёт в фоновом потоке архива"""
+        if not self.archive or content is None:
+            return
+
+        def done(future):
+            if future.exception():
+                self.log.warning("Archive put failed for %s: %s", url, future.exception())
+
+        try:
+            self.archive.submit(self.name, url, content).add_done_callback(done)
+        except Exception as e:
+            self.log.warning("Archive put failed for %s: %s", url, e)
 
     # ------------------------------------------------------------
     # Основной процесс парсинга
     # ------------------------------------------------------------
     async def parse(self, browser: Browser) -> List[Dict[str,Any]]:
-        print(f"[INFO] [{self.name}] Start parse")
+        self.log.info("Start parse")
         products = []
-        
-        # Шаг 1. Открываем главную страницу
-        # 1) load main page and find all urls
-        main_html = await self.fetch_page(browser, self.url, timeout=self.timeout)
+        self.results = []
+
+        if type(self).parse_detail is not GenericBankParser.parse_detail:
+            # парсер разбирает главную страницу сам (например, JSON со всеми ставками)
+            main_html = await self.fetch(browser, self.url, timeout=self.timeout)
+            if not main_html:
+                return products
+            try:
+                products = await self.parse_detail(browser, main_html)
+            except Exception as e:
+                self.log.error("Failed parse: %s", e)
+            del main_html   # HTML главной страницы не держим до конца работы банка
+        else:
+            try:
+                await self.discover_and_process(browser)
+            except Exception as e:
+                self.log.error("Failed parse: %s", e)
+            products = self.results
+
+        self.log.info("Stop parse. Total records: %s", len(products))
+        return products
+
+    async def discover_and_process(self, browser: Browser):
+        """
+        Продукты из кэша прошлого прогона начинают загружаться сразу, а список продуктов
+        перепроверяется параллельно. Новые продукты догружаются, исчезнувшие — выбрасываются.
+        """
+        self._slots = asyncio.Semaphore(max(1, self.concurrency))
+        cached = load_allurls(self.name) if self.cacheable and not self.replay_date else {}
+        if not cached:
+            self.AllUrls = await self.discover(browser)
+            if not self.AllUrls:
+                self.log.warning("No deposit products found.")
+                return
+            await self.process_products(browser, self.AllUrls)
+            save_allurls(self.name, self.AllUrls)
+            return
+
+        self.log.debug("Starting %s cached products while revalidating the list", len(cached))
+        early = asyncio.create_task(self.process_products(browser, cached))
+        try:
+            fresh = await self.discover(browser)
+            if not fresh:
+                self.log.warning("Product list unavailable, using %s cached products", len(cached))
+                self.AllUrls = cached
+                await early
+                return
+            self.AllUrls = fresh
+            added = {name: url for name, url in fresh.items() if cached.get(name) != url}
+            if added:
+                self.log.info("Product list changed: %s new, %s gone", len(added), len(set(cached) - set(fresh)))
+                await self.process_products(browser, added)
+            await early
+        finally:
+            if not early.done():
+                early.cancel()
+        # ставки продуктов, которых больше нет в списке (или у которых сменился url), не сохраняем
+        valid = set(fresh.items())
+        self.results[:] = [r for r in self.results if (r['product'], r['source_url']) in valid]
+        save_allurls(self.name, fresh)
+
+    async def discover(self, browser: Browser) -> Dict[str, str]:
+        """
+        Список продуктов {product_name: product_url}: из discovery_url, иначе со страницы self.url.
+        Названия и состав продуктов — со страницы списка (или из кэша прошлого прогона): если в ответе
+        discovery_url есть url без известного названия, страница списка читается тоже. url, которых на ней нет,
+        запоминаются (load_skipped) и продуктами не становятся, поэтому повторно страницу списка не вызывают.
+        """
+        if self.discovery_url:
+            text = await self.fetch_http(self.discovery_url, timeout=self.timeout)
+            urls = {}
+            if text:
+                try:
+                    urls = await self.extract_discovery(text)
+                except Exception as e:
+                    self.log.error("extract_discovery raised: %s", e)
+            if urls:
+                known = {url: name for name, url in load_allurls(self.name).items()}
+                skipped = set(load_skipped(self.name))
+                named = {url: name or known.get(url) for url, name in urls.items() if url not in skipped}
+                unknown = [url for url, name in named.items() if not name]
+                if not unknown:
+                    return {name: url for url, name in named.items()}
+                self.log.info("%s products from %s have no known title, reading %s", len(unknown),
+                              self.discovery_url, self.url)
+                listing = await self.list_products(browser)
+                if listing:
+                    listed = set(listing.values())
+                    save_skipped(self.name, [url for url in urls if url not in listed])
+                    return listing
+                # страница списка недоступна: только продукты с известными названиями
+                return {name: url for url, name in named.items() if name}
+            self.log.warning("Discovery via %s failed, falling back to %s", self.discovery_url, self.url)
+        return await self.list_products(browser)
+
+    async def list_products(self, browser: Browser) -> Dict[str, str]:
+        """Список продуктов со страницы self.url"""
+        main_html = await self.fetch(browser, self.url, timeout=self.timeout)
         if not main_html:
-            return products
+            return {}
+        try:
+            return await self.extract_allurls(main_html)
+        except Exception as e:
+            self.log.error("extract_allurls raised: %s", e)
+            return {}
+
+    async def extract_discovery(self, text: str) -> Dict[str, str]:
+        """
+        Ответ discovery_url -> {product_url: product_name}, '' - источник названия не даёт.
+        По умолчанию sitemap.xml: url под discovery_pattern без названий. Для JSON API парсер переопределяет метод.
+        """
+        return {url: '' for url in parse_sitemap(text, self.discovery_pattern)}
+
+    def make_records(self, infos: List[Dict[str, Any]], product_name: str, product_url: str) -> List[RateRecord]:
+        """Строки dep_info -> RateRecord; метаданные продукта общие для всех его ставок"""
+        meta = product_meta(self.name, self.nkb, self.full_name, self.group_1, product_name, product_url)
+        return [RateRecord(meta, inf.get("term"), inf.get("currency"), inf.get("rate"))
+                for inf in infos if isinstance(inf, dict)]
+
+    async def extract_allurls(self, html: str) -> Dict[str, str]:
+        """Главная страница -> {product_name: product_url}"""
+        return {}
 
+    async def dep_info(self, html: str) -> List[Dict[str, Any]]:
+        """Страница продукта -> [{'term':..., 'currency':..., 'rate':...}, ...]"""
+        return []
+
+    async def product_infos(self, browser: Browser, product_name: str, product_url: str) -> List[Dict[str, Any]]:
+        """Ставки одного продукта; по умолчанию — загрузка страницы продукта и dep_info"""
+        html = await self.fetch(browser, product_url, timeout=self.timeout)
+        if not html:
+            self.log.warning("Empty html for %s", product_name)
+            return []
+        return await self.dep_info(html)   # await т.к. dep_info — async
+
+    async def parse_detail(self, browser: Browser, main_html: str) -> List[RateRecord]:
+        """Список продуктов с главной страницы и их ставки (для вызова с уже загруженной страницей)"""
         try:
-            products = await self.parse_detail(browser, main_html)
+            self.AllUrls = await self.extract_allurls(main_html)
         except Exception as e:
-            print(f"[ERROR] [{self.name}] Failed parse: {e}")
+            self.log.error("extract_allurls raised: %s", e)
+            return self.results
 
-        print(f"[INFO] [{self.name}] Stop parse. Total records: {len(products)}")
-        return products
-                                                      
\ No newline at end of file
+        if not self.AllUrls:
+            self.log.warning("No deposit products found.")
+            return self.results
+
+        self._slots = asyncio.Semaphore(max(1, self.concurrency))
+        await self.process_products(browser, self.AllUrls)
+        return self.results
+
+    async def process_products(self, browser: Browser, urls: Dict[str, str]):
+        """Ставки продуктов {product_name: product_url} в self.results, до self.concurrency одновременно"""
+        slots = self._slots
+
+        async def process(idx, product_name, product_url):
+            records = self.resumed.pop((product_name, product_url), None)
+            if records is not None:
+                # продукт уже обработан в прерванном прогоне сегодня
+                self.results.extend(records)
+                return
+            async with slots:
+                self.log.debug("(%s/%s) Processing '%s' -> %s", idx, len(urls), product_name, product_url)
+                try:
+                    infos = await self.product_infos(browser, product_name, product_url)
+                    self.log.debug("infos: %s", infos)
+                    if not infos:
+                        self.log.warning("infos returned empty for %s", product_name)
+                        return
+
+                    # добавляем метаданные продукта
+                    records = self.make_records(infos, product_name, product_url)
+                    self.results.extend(records)
+                    if self.journal:
+                        self.journal.product_done(self.name, product_name, product_url, records)
+
+                except Exception as e:
+                    self.log.error("Error processing %s: %s", product_name, e)
+
+        await asyncio.gather(*[process(idx, name, url)
+                               for idx, (name, url) in enumerate(urls.items(), start=1)])
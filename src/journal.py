@@ -0,0 +1,143 @@
+import asyncio, json, os, time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+
+from .log import get_logger
+from .records import RateRecord
+from .xlsx import OUTPUT_DIR
+
+log = get_logger()
+
+JOURNAL_DIR = os.path.join(OUTPUT_DIR, '.cache', 'journal')
+
+Unit = Tuple[str, str, str]   # (bank, product, url)
+
+
+def journal_path(day: date, journal_dir: str = JOURNAL_DIR) -> str:
+    return os.path.join(journal_dir, f"{day.isoformat()}.jsonl")
+
+
+class RunJournal:
+    """
+    Append-only журнал прогона (JSON Lines): завершённые продукты со ставками и завершённые банки.
+    Записи копятся в буфере и сбрасываются на диск с fsync пачкой — по batch записей
+    или раз в interval секунд (фоновая задача run_flusher). write и fsync идут в фоновом потоке-писателе
+    (один на журнал, пачки пишутся по порядку), поэтому журнал не блокирует цикл событий; close() дожидается очереди.
+    При падении теряется не больше одной несброшенной пачки.
+    """
+
+    def __init__(self, path: str, batch: int = 50, interval: float = 1.0):
+        self.path = path
+        self.batch = batch
+        self.interval = interval
+        self.units: Dict[Unit, List[list]] = {}      # уже записанные продукты -> [[term, currency, rate], ...]
+        self.banks: Dict[str, dict] = {}             # завершённые банки -> {'status', 'rows', 'seconds'}
+        self.written = False                         # результаты прогона уже записаны в выходные файлы
+        self._pending: List[str] = []
+        self._file = None
+        self._writer = None
+        self._last_sync = time.monotonic()
+
+    # ------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------
+    def load(self) -> 'RunJournal':
+        """Прочитать журнал (для --resume); оборванная последняя строка игнорируется"""
+        if not os.path.exists(self.path):
+            return self
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('type') == 'product':
+                    self.units[(entry['bank'], entry['product'], entry['url'])] = entry['rates']
+                elif entry.get('type') == 'bank':
+                    self.banks[entry['bank']] = {k: entry[k] for k in ('status', 'rows', 'seconds')}
+                elif entry.get('type') == 'written':
+                    self.written = True
+        log.info("Journal %s: %s products, %s banks already done", self.path, len(self.units), len(self.banks))
+        return self
+
+    def restore(self, parser) -> Dict[Tuple[str, str], List[RateRecord]]:
+        """Записанные продукты банка как RateRecord: {(product, url): [records]}"""
+        return {(product, url): parser.make_records([{'term': t, 'currency': c, 'rate': r} for t, c, r in rates],
+                                                    product, url)
+                for (bank, product, url), rates in self.units.items() if bank == parser.name}
+
+    # ------------------------------------------------------------
+    # Запись
+    # ------------------------------------------------------------
+    def open(self, truncate: bool = False) -> 'RunJournal':
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, 'w' if truncate else 'a', encoding='utf-8')
+        return self
+
+    def _append(self, entry: dict):
+        self._pending.append(json.dumps(entry, ensure_ascii=False))
+        if len(self._pending) >= self.batch:
+            self.flush()
+
+    def product_done(self, bank: str, product: str, url: str, records: Iterable):
+        unit = (bank, product, url)
+        if unit in self.units or not self._file:
+            return
+        rates = [[r['term'], r['currency'], r['rate']] for r in records]
+        self.units[unit] = rates
+        self._append({'type': 'product', 'bank': bank, 'product': product, 'url': url, 'rates': rates})
+
+    def bank_done(self, bank: str, status: str, records: Iterable, seconds: float = 0.0):
+        """Банк завершён: дописываем продукты, не прошедшие через product_done (парсеры со своим parse_detail)"""
+        if not self._file:
+            return
+        records = list(records)
+        groups: Dict[Tuple[str, str], list] = {}
+        for r in records:
+            groups.setdefault((r['product'], r['source_url']), []).append(r)
+        for (product, url), rows in groups.items():
+            self.product_done(bank, product, url, rows)
+        self.banks[bank] = {'status': status, 'rows': len(records), 'seconds': seconds}
+        self._append({'type': 'bank', 'bank': bank, **self.banks[bank]})
+        self.flush()
+
+    def mark_written(self):
+        """Выходные файлы записаны: --resume по этому журналу не должен дописать те же строки повторно"""
+        if self._file:
+            self._append({'type': 'written'})
+            self.flush()
+
+    def flush(self):
+        """Отдать накопленную пачку потоку-писателю, не дожидаясь fsync"""
+        if not self._pending or not self._file:
+            return
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='journal')
+        self._writer.submit(self._write, '\n'.join(self._pending) + '\n')
+        self._pending = []
+        self._last_sync = time.monotonic()
+
+    def _write(self, text: str):
+        try:
+            self._file.write(text)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except Exception as e:
+            log.error("Journal %s write failed: %s", self.path, e)
+
+    async def run_flusher(self):
+        """Фоновый сброс буфера раз в interval секунд"""
+        while True:
+            await asyncio.sleep(self.interval)
+            if self._pending and time.monotonic() - self._last_sync >= self.interval:
+                self.flush()
+
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+        if self._file:
+            self._file.close()
+            self._file = None
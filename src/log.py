@@ -0,0 +1,97 @@
+import json, logging, sys, time
+from typing import Dict, Optional, Tuple
+
+LOGGER_NAME = 'scraper'
+
+
+class BankAdapter(logging.LoggerAdapter):
+    """Добавляет в каждую запись контекст банка (поле bank)"""
+
+    def process(self, msg, kwargs):
+        extra = kwargs.get('extra') or {}
+        kwargs['extra'] = {**self.extra, **extra}
+        return msg, kwargs
+
+
+class TextFormatter(logging.Formatter):
+    """Привычный формат: [INFO] [Oschadbank] message"""
+
+    def format(self, record):
+        bank = getattr(record, 'bank', None)
+        prefix = f"[{record.levelname}] [{bank}] " if bank else f"[{record.levelname}] "
+        text = prefix + record.getMessage()
+        if record.exc_info:
+            text += '\n' + self.formatException(record.exc_info)
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на событие (для лог-шиппера)"""
+
+    def format(self, record):
+        event = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        bank = getattr(record, 'bank', None)
+        if bank:
+            event['bank'] = bank
+        if record.exc_info:
+            event['exc'] = self.formatException(record.exc_info)
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class DebugRateLimit(logging.Filter):
+    """
+    Ограничение частоты DEBUG-событий: не больше `rate` записей в секунду
+    на каждый шаблон сообщения (token bucket). INFO и выше проходят всегда.
+    """
+
+    def __init__(self, rate: float = 50.0):
+        super().__init__()
+        self.rate = float(rate)
+        self.buckets: Dict[Tuple[str, object], Tuple[float, float]] = {}
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate <= 0:
+            return True
+        key = (getattr(record, 'bank', None), record.msg)
+        now = time.monotonic()
+        tokens, last = self.buckets.get(key, (self.rate, now))
+        tokens = min(self.rate, tokens + (now - last) * self.rate)
+        if tokens < 1.0:
+            self.buckets[key] = (tokens, now)
+            return False
+        self.buckets[key] = (tokens - 1.0, now)
+        return True
+
+
+def setup_logging(level: str = 'INFO', fmt: str = 'text', debug_rate: float = 50.0):
+    """Настройка корневого логгера скрапера (вызывается один раз из main)"""
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    logger.propagate = False
+    for h in list(logger.handlers):
+        logger.removeHandler(h)
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if str(fmt).lower() == 'json' else TextFormatter())
+    handler.addFilter(DebugRateLimit(debug_rate))
+    logger.addHandler(handler)
+    return logger
+
+
+def get_logger(bank: Optional[str] = None) -> logging.LoggerAdapter:
+    """
+    Логгер с контекстом банка. В горячих циклах используйте %-аргументы:
+    log.debug("rate=%s", rate) — строка не форматируется, если DEBUG выключен.
+    """
+    base = logging.getLogger(LOGGER_NAME if not bank else f"{LOGGER_NAME}.{bank}")
+    return BankAdapter(base, {'bank': bank} if bank else {})
+
+
+# без явной настройки логгер всё равно печатает INFO в stdout
+if not logging.getLogger(LOGGER_NAME).handlers:
+    setup_logging()
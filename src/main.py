@@ -1,7 +1,24 @@
-import asyncio, configparser, importlib, os
+import argparse, asyncio, configparser, contextlib, os, time
+from datetime import date
 from playwright.async_api import async_playwright
-from typing import Dict
-from .xlsx import save_all_to_xlsx
+from types import SimpleNamespace
+from typing import Dict, Tuple
+from .xlsx import prepare_frame
+from .export import DELTA, REBUILD, XLSX, ExcelExporter
+from .db import save_all_to_db
+from .aggregates import STATE_PATH, update_aggregates, write_aggregates
+from .log import get_logger, setup_logging
+from .archive import PageArchive
+from .validate import SNAPSHOT_PATH, previous_snapshot, save_snapshot, validate_rates
+from .schedule import DURATIONS_PATH, RUNS_PATH, load_durations, plan_order, save_durations, save_run_log, update_duration
+from .net import NetworkLayer, hosts_of
+from .registry import ParserManifest, get_manifest
+from .memprof import MemoryProfiler
+from . import discovery, pdf
+from .browser import STORAGE_DIR, ContextPool
+from .journal import JOURNAL_DIR, RunJournal, journal_path
+
+log = get_logger()
 
 CONFIG_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config.env'))
 
@@ -10,8 +27,13 @@ def load_config(path=CONFIG_PATH):
     cp.read(path, encoding='utf-8')
     return cp
 
-def build_parser_instances(cp) -> Dict[str, object]:
-    instances = {}
+def build_parser_plan(cp) -> Dict[str, Tuple[ParserManifest, dict, int]]:
+    """
+    Активные секции {section: (manifest, cfg, concurrency)} без импорта модулей парсеров:
+    экземпляр создаётся (create_parser в run_all), только когда банк получает слот.
+    concurrency - переопределение из config.env (0 - как в манифесте).
+    """
+    plan = {}
     general = cp['GENERAL'] if 'GENERAL' in cp else {}
     for section in cp.sections():
         if section == 'GENERAL':
@@ -25,47 +47,329 @@ def build_parser_instances(cp) -> Dict[str, object]:
         # override general timeout/user_agent if not present
         cfg['timeout'] = conf.get('timeout', general.get('timeout'))
         cfg['user_agent'] = conf.get('user_agent', general.get('user_agent'))
-        # dynamic import parser module from src.parsers.<section_lower>
-        mod_name = section.lower().replace(' ','')
+        cfg['name'] = conf.get('name')
+        cfg['url'] = conf.get('url')
+        cfg['discovery_url'] = conf.get('discovery_url')
+        cfg['discovery_pattern'] = conf.get('discovery_pattern')
+        # парсер ищется в реестре (встроенные, entry points, @register); модуль импортируется только для активных
+        # parser= позволяет использовать один парсер для нескольких секций (другой url / name)
+        manifest = get_manifest(conf.get('parser', section))
+        if manifest is None:
+            log.warning("No parser registered for %s", section)
+            continue
+        plan[section] = (manifest, cfg, max(1, int(conf['concurrency'])) if conf.get('concurrency') else 0)
+    return plan
+
+def bank_urls(plan):
+    """url-атрибуты банков для прогрева сети без создания парсеров: url из config.env, иначе из класса"""
+    urls = []
+    for manifest, cfg, _ in plan.values():
         try:
-            mod = importlib.import_module(f'src.parsers.{mod_name}')
-            class_name = section.title().replace(' ','').replace('-','') + 'Parser'
-            ParserClass = getattr(mod, class_name)
-            instances[section] = ParserClass(cfg)
+            cls = manifest.load()
         except Exception as e:
-            print(f"[WARN] Could not import parser for {section}: {e}")
-    return instances
-
-async def run_all():
-    cp = load_config()
-    print(f"[INFO] Config loaded")
-    parsers = build_parser_instances(cp)
-    print(f"[INFO] Parsers builded")
+            log.warning("Could not import parser %s: %s", manifest.target, e)
+            continue
+        urls.append(SimpleNamespace(url=cfg.get('url') or cls.url, url_dep=getattr(cls, 'url_dep', '')))
+    return urls
+
+async def run_all(replay: date = None, config_path: str = CONFIG_PATH, profile_memory: bool = False,
+                  resume: bool = False):
+    cp = load_config(config_path)
+    general = cp['GENERAL'] if 'GENERAL' in cp else {}
+    setup_logging(general.get('log_level', 'INFO'), general.get('log_format', 'text'),
+                  float(general.get('log_debug_rate', 50)))
+    log.info("Config loaded")
+    # кэши между прогонами (списки продуктов, таблицы в PDF): свои файлы у стенда src.mockserver
+    discovery.set_cache_path(general.get('discovery_cache_file', ''))
+    pdf.set_cache_path(general.get('pdf_cache_file', ''))
+    # --profile-memory: tracemalloc + RSS по этапам и банкам, отчёт рядом с output_file
+    prof = MemoryProfiler(profile_memory)
+    prof.start()
+    plan = build_parser_plan(cp)
+    parsers = {}   # созданные экземпляры: заполняется по мере старта банков
+    log.info("Parsers planned: %s", ', '.join(plan))
     max_thread = int(cp['GENERAL'].get('max_thread', 3)) if 'GENERAL' in cp else 3
     semaphore = asyncio.Semaphore(max_thread)
     all_results = {}
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True, args=['--no-sandbox','--disable-gpu'])
+    # архив страниц (опционально): сохраняем всё загруженное, либо читаем из него при replay
+    archive_dir = general.get('archive_dir', '')
+    archive = PageArchive(archive_dir, general.get('archive_retention_days', 0),
+                          general.get('archive_level', 3)) if archive_dir else None
+    if replay and not archive:
+        log.error("Replay requires archive_dir in [GENERAL]")
+        return
+
+    # журнал прогона: завершённые продукты и банки за сегодня; --resume досчитывает только недостающее
+    journal = None
+    restore = False
+    if not replay and general.get('journal', 'True').lower() in ('1','true','yes','on'):
+        path = journal_path(date.today(), general.get('journal_dir', '') or JOURNAL_DIR)
+        batch = int(general.get('journal_fsync_batch', 50))
+        interval = float(general.get('journal_fsync_interval', 1))
+        journal = RunJournal(path, batch, interval)
+        if resume and not journal.load().written:
+            restore = True
+            journal.open()
+        else:
+            if resume:
+                log.info("Today's run is already written to output, starting from scratch")
+            journal = RunJournal(path, batch, interval).open(truncate=True)
+    elif resume:
+        log.warning("--resume needs journal enabled and no --replay, running from scratch")
+
+    # бюджеты времени: на банк (bank_budget / budget в секции) и на весь прогон (run_budget), 0 - без ограничений
+    run_budget = float(general.get('run_budget', 0) or 0)
+    durations_file = general.get('durations_file', '') or DURATIONS_PATH
+    durations = load_durations(durations_file)
+    order = plan_order({name: manifest for name, (manifest, _, _) in plan.items()}, durations)
+    run_status = {}
+    net = contexts = None
 
-        async def run_parser(name, parser):
-            async with semaphore:
+    def create_parser(name):
+        """Импорт модуля и экземпляр парсера — в момент старта банка, общие ресурсы прогона подключаются здесь"""
+        manifest, cfg, concurrency = plan[name]
+        parser = manifest.create(cfg)
+        if concurrency:
+            parser.concurrency = concurrency
+        parser.archive = archive
+        parser.replay_date = replay
+        parser.net = net
+        parser.contexts = contexts
+        if journal:
+            parser.journal = journal
+            if restore:
+                parser.resumed = journal.restore(parser)
+        parsers[name] = parser
+        return parser
+
+    async def run_parser(name, browser):
+        budget = float(cp[name].get('budget', general.get('bank_budget', 0)) or 0)
+        # http-банки (fetch_mode манифеста) не открывают страниц браузера и не занимают его слотов
+        slot = semaphore if plan[name][0].fetch_mode != 'http' else contextlib.nullcontext()
+        parser = None
+        start = None
+        status = 'ok'
+        try:
+            async with slot:
                 try:
-                    print(f"[INFO] Starting {name}")
-                    products = await parser.parse(browser)
+                    parser = create_parser(name)
+                except Exception as e:
+                    log.error("Could not create parser for %s: %s", name, e)
+                    run_status[name] = {'status': 'failed', 'rows': 0, 'seconds': 0.0}
+                    return
+                done = journal.banks.get(parser.name) if journal else None
+                if done and done['status'] == 'ok':
+                    # банк полностью собран до сбоя: ставки берутся из журнала
+                    products = [r for records in parser.resumed.values() for r in records]
+                    parser.resumed = {}
                     all_results[name] = products
-                    print(f"[INFO] Finished {name} -> {len(products)} items")
+                    run_status[name] = dict(done)
+                    log.info("%s already done today, %s items from journal", name, len(products))
+                    return
+                start = time.monotonic()
+                prof.bank_start(name)
+                try:
+                    log.info("Starting %s", name)
+                    products = await asyncio.wait_for(parser.parse(browser), budget or None)
+                    log.info("Finished %s -> %s items", name, len(products))
+                except asyncio.TimeoutError:
+                    products = list(parser.results)
+                    status = 'partial'
+                    log.warning("%s exceeded budget %ss, keeping %s partial items", name, budget, len(products))
                 except Exception as e:
-                    print(f"[ERROR] {name} failed: {e}")
-                    all_results[name] = []
+                    log.error("%s failed: %s", name, e)
+                    products = list(parser.results)
+                    status = 'failed'
+        except asyncio.CancelledError:
+            # общий бюджет прогона исчерпан
+            products = list(parser.results) if parser else []
+            status = 'partial' if start else 'skipped'
+            log.warning("%s cancelled by run budget, keeping %s partial items", name, len(products))
+        elapsed = time.monotonic() - start if start else 0.0
+        prof.bank_end(name, len(products))
+        all_results[name] = products
+        run_status[name] = {'status': status, 'rows': len(products), 'seconds': round(elapsed, 1)}
+        if start and status in ('ok', 'partial'):
+            update_duration(durations, name, elapsed)
+        if journal and status == 'ok':
+            journal.bank_done(parser.name, status, products, round(elapsed, 1))
+
+    async def run_scheduled(browser):
+        # http-банки сразу, затем самые медленные по истории банки первыми занимают слоты семафора
+        tasks = [asyncio.create_task(run_parser(name, browser)) for name in order]
+        if not tasks:
+            return
+        done, pending = await asyncio.wait(tasks, timeout=run_budget or None)
+        if pending:
+            log.warning("Run budget %ss exhausted, cancelling %s banks", run_budget, len(pending))
+            for t in pending:
+                t.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
 
-        tasks = [run_parser(name, parser) for name, parser in parsers.items()]
-        await asyncio.gather(*tasks)
-        await browser.close()
+    flusher = asyncio.create_task(journal.run_flusher()) if journal else None
+    with prof.stage('parse'):
+        if replay:
+            # всё читается из архива, браузер и сеть не нужны
+            await run_scheduled(None)
+        else:
+            # общая сеть прогона: DNS-кэш и keep-alive соединения для небраузерных загрузок
+            net = NetworkLayer(general.get('user_agent'), int(general.get('timeout', 60)),
+                               dns_ttl=int(general.get('dns_cache_ttl', 600)))
+            await net.start()
+            warm_up = None
+            if general.get('net_warmup', 'True').lower() in ('1','true','yes','on'):
+                # прогрев всех хостов параллельно, пока запускается браузер
+                warm_up = asyncio.create_task(net.warm_up(hosts_of(bank_urls(plan))))
+            # браузер нужен, только если среди активных есть банки с fetch_mode='browser'
+            use_browser = any(manifest.fetch_mode != 'http' for manifest, _, _ in plan.values())
+            browser_args = ['--no-sandbox','--disable-gpu']
+            if warm_up and general.get('browser_dns_pin', 'False').lower() in ('1','true','yes','on'):
+                # браузер использует уже разрешённые адреса вместо собственных DNS-запросов
+                await warm_up
+                rules = net.browser_resolver_rules()
+                if rules:
+                    browser_args.append(f'--host-resolver-rules={rules}')
+            elif warm_up:
+                log.info("browser_dns_pin is off: warm-up speeds up only non-browser downloads")
+            try:
+                if not use_browser:
+                    log.info("Only http parsers are active, browser is not launched")
+                    if warm_up:
+                        await warm_up
+                    await run_scheduled(None)
+                else:
+                    async with async_playwright() as p:
+                        browser = await p.chromium.launch(headless=True, args=browser_args)
+                        # контексты по хостам: stealth и отпечаток один раз на контекст, состояние после антибот-проверки на диске
+                        contexts = ContextPool(
+                            browser, general.get('storage_dir', '') or STORAGE_DIR,
+                            stealth=general.get('stealth', 'True').lower() in ('1','true','yes','on'),
+                            challenge_wait=float(general.get('challenge_wait', 8)))
+                        if warm_up:
+                            await warm_up
+                        try:
+                            await run_scheduled(browser)
+                        finally:
+                            await contexts.close()
+                        await browser.close()
+            finally:
+                await net.close()
+            save_durations(durations, durations_file)
+    if flusher:
+        flusher.cancel()
+        journal.flush()
+
+    if archive:
+        if not replay:
+            archive.prune()
+        archive.close()
 
     # save excel
     out_file = cp['GENERAL'].get('output_file', 'output/Deposit_Rate_Data.xlsx') if 'GENERAL' in cp else 'output/Deposit_Rate_Data.xlsx'
-    save_all_to_xlsx(all_results, out_file)
+    memory_report = os.path.join(os.path.dirname(out_file), 'memory_profile.json')
+    memory_limit = float(general.get('memory_limit_mb', 0) or 0)
+
+    # Excel пишется в отдельном процессе (export_worker=False - в потоке), цикл событий не блокируется
+    def export_progress(kind, path, stage, rows, total):
+        if stage == 'written':
+            log.info("Export %s -> %s: %s/%s rows", kind, os.path.basename(path), rows, total)
+
+    exporter = ExcelExporter(export_progress, int(general.get('export_chunk_rows', 50000)),
+                             worker=general.get('export_worker', 'True').lower() in ('1','true','yes','on'),
+                             log_level=general.get('log_level', 'INFO'))
+    await exporter.start()
+    try:
+        # статус банка в каждой строке: partial / failed помечают неполные данные
+        # (банки, снятые до старта, не создавались и строк не дали)
+        bank_status = {parsers[name].name: info['status'] for name, info in run_status.items() if name in parsers}
+        if replay:
+            # повторный разбор прошлого дня пишется отдельно, история не трогается: полная перезапись файла
+            root, ext = os.path.splitext(out_file)
+            with prof.stage('write'):
+                await exporter.submit(REBUILD, f"{root}_replay_{replay.isoformat()}{ext}",
+                                      prepare_frame(all_results, run_date=replay, status=bank_status))
+            prof.report(memory_report, memory_limit)
+            return run_status
+
+        with prof.stage('prepare'):
+            df = prepare_frame(all_results, status=bank_status)
+            # строки уже в DataFrame: списки записей больше не нужны до конца прогона
+            all_results.clear()
+            for parser in parsers.values():
+                parser.results = []
+
+        # контроль качества: дубликаты, пустые/аномальные ставки уходят в карантин
+        quarantine = None
+        previous = None
+        validate = general.get('validate', 'True').lower() in ('1','true','yes','on')
+        snapshot_file = general.get('snapshot_file', '') or SNAPSHOT_PATH
+        if validate:
+            with prof.stage('validate'):
+                previous = previous_snapshot(out_file, snapshot_file)
+                df, quarantine = validate_rates(
+                    df, previous,
+                    rate_min=float(general.get('rate_min', 0)),
+                    rate_max=float(general.get('rate_max', 50)),
+                    max_jump=float(general.get('rate_max_jump', 3)),
+                    confirm=int(general.get('rate_jump_confirm', 2)),
+                )
+                if len(quarantine):
+                    await exporter.submit(XLSX, general.get('quarantine_file', 'output/Quarantine.xlsx'),
+                                          quarantine, sheet_name="Quarantine")
+
+        output_mode = cp['GENERAL'].get('output_mode', 'full') if 'GENERAL' in cp else 'full'
+        db_file = cp['GENERAL'].get('db_file', '') if 'GENERAL' in cp else ''
+        aggregates_file = general.get('aggregates_file', '')
+        aggregates_state = general.get('aggregates_state_file', '') or STATE_PATH
+        aggregates = None
+        with prof.stage('write'):
+            # сравнительные срезы (лучшие ставки, изменения за неделю, державні/приватні) считаются
+            # из инкрементального состояния до записи истории, чтобы засев при первом запуске её не учитывал дважды
+            if aggregates_file:
+                aggregates = await asyncio.to_thread(update_aggregates, df, out_file, aggregates_state)
+            if output_mode.lower() == 'delta':
+                # пропавшие ключи закрываются только у банков со статусом ok; карантин тоже не закрывает записи
+                complete = [parsers[name].name for name, info in run_status.items()
+                            if info['status'] == 'ok' and name in parsers]
+                held = quarantine[['bank', 'product', 'currency', 'term']] if quarantine is not None else None
+                main_write = exporter.submit(DELTA, out_file, df, complete_banks=complete, keep_open=held)
+            else:
+                main_write = exporter.submit(XLSX, out_file, df)
+            writes = [main_write,
+                      # статус прогона по банкам (ok / partial / failed / skipped) — дозапись в небольшой CSV
+                      asyncio.to_thread(save_run_log, run_status, general.get('runs_file', '') or RUNS_PATH)]
+            # база данных для BI (опционально) пишется параллельно с Excel
+            if db_file:
+                writes.append(asyncio.to_thread(save_all_to_db, df, db_file, parsers))
+            await asyncio.gather(*writes)
+            if aggregates is not None:
+                # срезы выгружаются и их состояние фиксируется только после записи истории
+                await asyncio.to_thread(write_aggregates, aggregates, aggregates_file, db_file)
+                await asyncio.to_thread(aggregates.save, aggregates_state)
+        if validate:
+            # срез для проверки скачков следующего прогона — только после успешной записи
+            await asyncio.to_thread(save_snapshot, previous, df, snapshot_file, quarantine)
+        if journal:
+            journal.mark_written()
+
+        prof.report(memory_report, memory_limit)
+        return run_status
+    finally:
+        await exporter.close()
+        prof.stop()
+        if journal:
+            journal.close()
 
 if __name__ == '__main__':
-    asyncio.run(run_all())
+    ap = argparse.ArgumentParser(prog='python -m src.main')
+    ap.add_argument('--replay', type=date.fromisoformat, default=None,
+                    help='перепарсить день YYYY-MM-DD из архива страниц (без сети)')
+    ap.add_argument('--config', default=CONFIG_PATH, help='путь к config.env')
+    ap.add_argument('--profile-memory', action='store_true',
+                    help='снимки tracemalloc и RSS по этапам и банкам -> memory_profile.json рядом с output_file')
+    ap.add_argument('--resume', action='store_true',
+                    help='продолжить прерванный сегодняшний прогон: уже собранное по журналу не загружается повторно')
+    args = ap.parse_args()
+    asyncio.run(run_all(replay=args.replay, config_path=args.config, profile_memory=args.profile_memory,
+                        resume=args.resume))
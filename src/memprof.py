@@ -0,0 +1,135 @@
+import json, os, time, tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from .log import get_logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:  # psutil не обязателен: на Linux хватает /proc и resource
+    psutil = None
+
+log = get_logger()
+
+MB = 1024 * 1024
+
+
+def current_rss_mb() -> Optional[float]:
+    """Текущий RSS процесса, МБ"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / MB
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / MB
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Пиковый RSS процесса за всё время работы, МБ"""
+    if resource is not None:
+        # Linux отдаёт килобайты
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / MB
+    return None
+
+
+def _round(value):
+    return round(value, 1) if value is not None else None
+
+
+class MemoryProfiler:
+    """
+    Режим --profile-memory: снимки tracemalloc и RSS по этапам прогона и по банкам.
+    Выключенный профайлер ничего не делает, поэтому вызовы остаются в коде всегда.
+    Банки парсятся параллельно, так что цифры по банку — прирост общей памяти за время его работы.
+    """
+
+    def __init__(self, enabled: bool = False, top: int = 10, frames: int = 1):
+        self.enabled = enabled
+        self.top = top
+        self.frames = frames
+        self.stages: List[Dict[str, Any]] = []
+        self.banks: Dict[str, Dict[str, Any]] = {}
+        self._bank_start: Dict[str, int] = {}
+        self._snapshot = None
+
+    def start(self):
+        if not self.enabled:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._snapshot = tracemalloc.take_snapshot()
+
+    def stop(self):
+        if self.enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            top = snapshot.compare_to(self._snapshot, 'lineno')[:self.top] if self._snapshot else []
+            self._snapshot = snapshot
+            self.stages.append({
+                'stage': name,
+                'seconds': round(time.monotonic() - t0, 2),
+                'traced_mb': _round(current / MB),
+                'delta_mb': _round((current - before) / MB),
+                'peak_mb': _round(peak / MB),
+                'rss_mb': _round(current_rss_mb()),
+                'peak_rss_mb': _round(peak_rss_mb()),
+                'top': [str(stat) for stat in top],
+            })
+
+    def bank_start(self, name: str):
+        if self.enabled:
+            self._bank_start[name] = tracemalloc.get_traced_memory()[0]
+
+    def bank_end(self, name: str, rows: int):
+        if not self.enabled or name not in self._bank_start:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        self.banks[name] = {
+            'rows': rows,
+            'delta_mb': _round((current - self._bank_start.pop(name)) / MB),
+            'traced_mb': _round(current / MB),
+            'peak_mb': _round(peak / MB),
+            'rss_mb': _round(current_rss_mb()),
+        }
+
+    def report(self, path: str, memory_limit_mb: float = 0) -> Optional[Dict[str, Any]]:
+        """Пишет JSON-отчёт и сводку в лог; превышение memory_limit_mb — ошибка в логе"""
+        if not self.enabled:
+            return None
+        peak = peak_rss_mb()
+        data = {'peak_rss_mb': _round(peak), 'memory_limit_mb': memory_limit_mb,
+                'stages': self.stages, 'banks': self.banks}
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        for s in self.stages:
+            log.info("Memory %s: traced %s MB (%+.1f), peak %s MB, rss %s MB",
+                     s['stage'], s['traced_mb'], s['delta_mb'] or 0, s['peak_mb'], s['rss_mb'])
+        for name, b in sorted(self.banks.items(), key=lambda kv: -(kv[1]['delta_mb'] or 0)):
+            log.info("Memory %s: %+.1f MB for %s rows", name, b['delta_mb'] or 0, b['rows'])
+        log.info("Memory report: %s (peak RSS %s MB)", path, data['peak_rss_mb'])
+        if memory_limit_mb and peak and peak > memory_limit_mb:
+            log.error("Peak RSS %.0f MB exceeds memory_limit_mb=%s", peak, memory_limit_mb)
+        return data
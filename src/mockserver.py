@@ -0,0 +1,361 @@
+"""
+Локальный детерминированный сервер-заглушка банков для нагрузочных тестов.
+
+Повторяет разметку, на которую опираются парсеры (карточки Ощадбанка, блоки и вкладки ПУМБ,
+ссылки direction-item Укрексімбанку, deposit-card и PDF-паспорта Sensbank, programs.js Приватбанку)
+для N синтетических банков. Задержка и ошибки задаются параметрами и детерминированы по url.
+
+    python -m src.mockserver serve --banks 50 --port 8765 --write-config output/mock/mock.env
+    python -m src.main --config output/mock/mock.env
+
+Бенчмарки против стенда — в bench/ (python -m bench scale --scale 5,50,500).
+"""
+import argparse, asyncio, configparser, json, os, random, zlib
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+from .log import get_logger, setup_logging
+from .xlsx import OUTPUT_DIR
+
+log = get_logger()
+
+MOCK_DIR = os.path.join(OUTPUT_DIR, 'mock')
+
+# вид разметки -> секция встроенного парсера в registry
+KINDS = ('Oschadbank', 'Pumb', 'Ukreximbank', 'Sensbank', 'Privatbank')
+CURRENCIES = ('UAH', 'USD', 'EUR')
+TERMS = (3, 6, 12, 24)
+# Укрексімбанк: сроки диапазонами дней, ровно как в term_ranges парсера
+EXIM_TERMS = ('93 - 183 дні', '184 - 367 днів', '368 - 3650 днів')
+PRIVAT_CODES = ('DEN0', 'DENK', 'DDND', 'DPSG', 'DPR0')
+
+
+class MockBank:
+    """Синтетический банк: вид разметки, продукты и ставки из seed"""
+
+    def __init__(self, idx: int, products: int, seed: int = 0, kinds=KINDS):
+        self.idx = idx
+        self.id = f"Mock{idx:04d}"
+        self.kind = kinds[idx % len(kinds)]
+        rng = random.Random(seed * 100003 + idx)
+        self.products = [f"Депозит {self.id}-{n}" for n in range(1, products + 1)]
+        self.rates = {
+            (p, c, t): round(rng.uniform(0.5, 16.0), 2)
+            for p in range(len(self.products)) for c in CURRENCIES for t in range(len(TERMS))
+        }
+
+    @property
+    def root(self) -> str:
+        return f"/bank/{self.id}"
+
+    @property
+    def start_path(self) -> str:
+        return f"{self.root}/programs.js" if self.kind == 'Privatbank' else self.listing_path
+
+    @property
+    def listing_path(self) -> str:
+        return f"{self.root}/deposits"
+
+    def rate(self, p: int, c: int, t: int) -> str:
+        return f"{self.rates[(p, CURRENCIES[c], t)]:.2f}".replace('.', ',') + '%'
+
+    # ------------------------------------------------------------
+    # Списки продуктов
+    # ------------------------------------------------------------
+    def listing(self) -> str:
+        items = []
+        for n, name in enumerate(self.products, start=1):
+            link = f"{self.root}/product/{n}"
+            if self.kind == 'Oschadbank':
+                items.append(f'<article class="all-private-deposits-card"><h3 class="base-title">{name}</h3>'
+                             f'<a href="{link}">Детальніше</a></article>')
+            elif self.kind == 'Pumb':
+                items.append(f'<div class="deposit-list-card"><div class="deposit-list-head">'
+                             f'<div class="deposit-list-title">Депозит {name}</div></div>\n'
+                             f'<div class="deposit-list-body"><a href="{link}">Детальніше</a></div></div>')
+            elif self.kind == 'Ukreximbank':
+                items.append(f'<a href="{link}" class="direction-item wide-item">'
+                             f'<h3 class="direction-text">Депозит «{name}»</h3></a>')
+            elif self.kind == 'Sensbank':
+                items.append(f'<article class="deposit-card"><h3 class="base-title">{name}</h3>'
+                             f'<div class="deposit-card__content text">На термін від 3 місяців</div>'
+                             f'<a href="{link}">Детальніше</a></article>')
+        body = '\n'.join(items)
+        if self.kind == 'Oschadbank':
+            body = f'<section class="all-private-deposits">{body}</section>'
+        elif self.kind == 'Sensbank':
+            body = f'<section class="deposit-list">{body}</section>'
+        return f'<html><body>{body}</body></html>'
+
+    def sitemap(self, base_url: str) -> str:
+        """
+        sitemap.xml (discovery_url банков вида Oschadbank): продукты, посторонние страницы и снятый продукт,
+        которого уже нет на странице списка; названий в нём нет
+        """
+        locs = [f"{base_url}{self.listing_path}", f"{base_url}/about"]
+        locs += [f"{base_url}{self.root}/product/{n}" for n in range(1, len(self.products) + 2)]
+        body = ''.join(f'<url><loc>{loc}</loc></url>' for loc in locs)
+        return f'<?xml version="1.0" encoding="UTF-8"?><urlset>{body}</urlset>'
+
+    def programs_js(self) -> str:
+        programs = [{
+            "code": PRIVAT_CODES[p % len(PRIVAT_CODES)],
+            "name": name,
+            "rates": [{"duration": term,
+                       "curr": {c: {"rate": self.rates[(p, c, t)]} for c in CURRENCIES}}
+                      for t, term in enumerate(TERMS)],
+        } for p, name in enumerate(self.products)]
+        return f"var programs = {json.dumps(programs, ensure_ascii=False)};\n"
+
+    # ------------------------------------------------------------
+    # Страницы продуктов
+    # ------------------------------------------------------------
+    def product(self, n: int) -> Optional[str]:
+        p = n - 1
+        if not 0 <= p < len(self.products):
+            return None
+        if self.kind == 'Oschadbank':
+            head = ''.join(f'<th>{c}</th>' for c in CURRENCIES)
+            rows = ''.join(f'<tr><td>{term} міс.</td>' + ''.join(f'<td>{self.rate(p, c, t)}</td>' for c in range(3)) + '</tr>'
+                           for t, term in enumerate(TERMS))
+            body = (f'<section class="block-table-rates"><table><thead><tr><th>Термін</th>{head}</tr></thead>'
+                    f'<tbody>{rows}</tbody></table></section>')
+        elif self.kind == 'Pumb':
+            tabs = ''.join(f'<a data-id="tab{c}"><span>{cur}</span></a>' for c, cur in enumerate(CURRENCIES))
+            panes = ''.join(
+                f'<div class="tab-pane" data-id="tab{c}">'
+                f'<div class="row header-row">' + ''.join(f'<div class="col">{term} міс.</div>' for term in TERMS) + '</div>'
+                f'<div class="row">' + ''.join(f'<div class="col">{self.rate(p, c, t)}</div>' for t in range(len(TERMS))) + '</div>'
+                f'</div>' for c in range(3))
+            body = f'<section class="deposit-rates"><div class="tabs-btns-wr">{tabs}</div>{panes}</section>'
+        elif self.kind == 'Ukreximbank':
+            head = ''.join(f'<th>{c}</th>' for c in CURRENCIES)
+            rows = ''.join(f'<tr><td>{term}</td>' + ''.join(f'<td>{self.rate(p, c, t)}</td>' for c in range(3)) + '</tr>'
+                           for t, term in enumerate(EXIM_TERMS))
+            body = f"<div class='additional-info text-block'><table><tr><th>Строк</th>{head}</tr>{rows}</table></div>"
+        elif self.kind == 'Sensbank':
+            body = (f'<p><a href="/upload/PASPORT_PRODUKTA_{self.id}_{n}.pdf" target="_blank">'
+                    f'Паспорт продукта {self.products[p]}</a></p>')
+        else:
+            return None
+        return f'<html><body><h1>{self.products[p]}</h1>{body}</body></html>'
+
+    def passport_pdf(self, n: int) -> Optional[bytes]:
+        p = n - 1
+        if self.kind != 'Sensbank' or not 0 <= p < len(self.products):
+            return None
+        table = [['Term'] + list(CURRENCIES)]
+        table += [[f'{term} month'] + [self.rate(p, c, t) for c in range(3)] for t, term in enumerate(TERMS)]
+        return pdf_table(table)
+
+
+def pdf_table(table: List[List[str]], cell_w: int = 100, cell_h: int = 20) -> bytes:
+    """Минимальный одностраничный PDF с таблицей в рамках (Helvetica, только ASCII)"""
+    x0, y0 = 50, 750
+    ops = ['0.5 w']
+    rows, cols = len(table), len(table[0])
+    for r in range(rows + 1):
+        y = y0 - r * cell_h
+        ops.append(f'{x0} {y} m {x0 + cols * cell_w} {y} l S')
+    for c in range(cols + 1):
+        x = x0 + c * cell_w
+        ops.append(f'{x} {y0} m {x} {y0 - rows * cell_h} l S')
+    for r, row in enumerate(table):
+        for c, text in enumerate(row):
+            text = str(text).replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+            ops.append(f'BT /F1 10 Tf {x0 + c * cell_w + 5} {y0 - (r + 1) * cell_h + 6} Td ({text}) Tj ET')
+    stream = '\n'.join(ops).encode('latin-1')
+
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R >> >> >>',
+        b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % i + obj + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % off for off in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _fraction(path: str, salt: str) -> float:
+    """Детерминированное число [0, 1) по url: одинаковые запросы ведут себя одинаково"""
+    return (zlib.crc32(f"{salt}:{path}".encode()) & 0xffffffff) / 2 ** 32
+
+
+def make_app(banks: int = 5, products: int = 5, seed: int = 0,
+             latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, kinds=KINDS) -> web.Application:
+    """
+    latency/jitter - задержка ответа, секунды (latency + jitter * [0, 1) по url);
+    error_rate     - доля url, которые всегда отвечают 500;
+    kinds          - виды разметки по кругу (только Privatbank - прогон без браузера).
+    """
+    registry: Dict[str, MockBank] = {b.id: b for b in (MockBank(i, products, seed, kinds)
+                                                        for i in range(1, banks + 1))}
+    stats = {'requests': 0, 'errors': 0}
+
+    @web.middleware
+    async def inject(request, handler):
+        stats['requests'] += 1
+        path = request.path
+        delay = latency + jitter * _fraction(path, 'latency')
+        if delay:
+            await asyncio.sleep(delay)
+        if error_rate and _fraction(path, f'error{seed}') < error_rate:
+            stats['errors'] += 1
+            raise web.HTTPInternalServerError(text='mock error')
+        return await handler(request)
+
+    def bank_of(request) -> MockBank:
+        bank = registry.get(request.match_info['bank'])
+        if bank is None:
+            raise web.HTTPNotFound()
+        return bank
+
+    async def listing(request):
+        bank = bank_of(request)
+        if bank.kind == 'Privatbank':
+            raise web.HTTPNotFound()
+        return web.Response(text=bank.listing(), content_type='text/html')
+
+    async def sitemap(request):
+        bank = bank_of(request)
+        if bank.kind != 'Oschadbank':
+            raise web.HTTPNotFound()
+        return web.Response(text=bank.sitemap(f"{request.scheme}://{request.host}"), content_type='application/xml')
+
+    async def programs(request):
+        bank = bank_of(request)
+        if bank.kind != 'Privatbank':
+            raise web.HTTPNotFound()
+        return web.Response(text=bank.programs_js(), content_type='application/javascript')
+
+    async def product(request):
+        html = bank_of(request).product(int(request.match_info['n']))
+        if html is None:
+            raise web.HTTPNotFound()
+        return web.Response(text=html, content_type='text/html')
+
+    async def passport(request):
+        pdf = bank_of(request).passport_pdf(int(request.match_info['n']))
+        if pdf is None:
+            raise web.HTTPNotFound()
+        return web.Response(body=pdf, content_type='application/pdf')
+
+    async def index(request):
+        return web.Response(text='mock banks: %d' % len(registry))
+
+    app = web.Application(middlewares=[inject])
+    app['banks'] = registry
+    app['stats'] = stats
+    app.router.add_route('*', '/', index)
+    app.router.add_get('/bank/{bank}/deposits', listing)
+    app.router.add_get('/bank/{bank}/programs.js', programs)
+    app.router.add_get('/bank/{bank}/sitemap.xml', sitemap)
+    app.router.add_get(r'/bank/{bank}/product/{n:\d+}', product)
+    # парсер Sensbank ищет паспорта только в /upload/ от корня сайта
+    app.router.add_get(r'/upload/PASPORT_PRODUKTA_{bank:Mock\d+}_{n:\d+}.pdf', passport)
+    return app
+
+
+def write_config(path: str, base_url: str, banks: Dict[str, MockBank], base_config: str = None,
+                 out_dir: str = MOCK_DIR):
+    """
+    config.env для run_all: GENERAL из основного конфига, по секции на синтетический банк.
+    Все файлы и кэши прогона (журнал, снимок, агрегаты, списки продуктов, статус) — в out_dir,
+    рабочее состояние в output/ стенд не трогает.
+    """
+    from .main import CONFIG_PATH, load_config
+    src = load_config(base_config or CONFIG_PATH)
+    cp = configparser.ConfigParser(interpolation=None)
+    cp['GENERAL'] = dict(src['GENERAL']) if 'GENERAL' in src else {}
+    cp['GENERAL'].update({
+        'output_file': os.path.join(out_dir, 'Mock_Rate_Data.xlsx'),
+        'quarantine_file': os.path.join(out_dir, 'Mock_Quarantine.xlsx'),
+        'durations_file': os.path.join(out_dir, 'durations.json'),
+        'snapshot_file': os.path.join(out_dir, 'snapshot.pkl'),
+        'runs_file': os.path.join(out_dir, 'Mock_Runs.csv'),
+        'journal_dir': os.path.join(out_dir, 'journal'),
+        'storage_dir': os.path.join(out_dir, 'storage'),
+        'discovery_cache_file': os.path.join(out_dir, 'allurls.json'),
+        'pdf_cache_file': os.path.join(out_dir, 'pdf_tables.json'),
+        'aggregates_state_file': os.path.join(out_dir, 'aggregates.pkl'),
+        'db_file': '',
+        'archive_dir': '',
+    })
+    if cp['GENERAL'].get('aggregates_file'):
+        cp['GENERAL']['aggregates_file'] = os.path.join(out_dir, 'Mock_Rate_Comparison.xlsx')
+    for bank in banks.values():
+        cp[bank.id] = {
+            'active': 'True',
+            'parser': bank.kind,
+            'name': bank.id,
+            'url': base_url.rstrip('/') + bank.start_path,
+        }
+        if bank.kind == 'Oschadbank':
+            # вместо sitemap настоящего сайта - sitemap стенда
+            cp[bank.id]['discovery_url'] = f"{base_url.rstrip('/')}{bank.root}/sitemap.xml"
+            cp[bank.id]['discovery_pattern'] = r'/product/\d+$'
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        cp.write(f)
+    return path
+
+
+async def _start(app, host: str, port: int) -> web.AppRunner:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def _kinds(value: str):
+    kinds = tuple(k.strip() for k in value.split(',') if k.strip())
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        raise SystemExit(f"Unknown --kinds: {', '.join(sorted(unknown))} (known: {', '.join(KINDS)})")
+    return kinds or KINDS
+
+
+async def serve(args):
+    app = make_app(args.banks, args.products, args.seed, args.latency, args.jitter, args.error_rate,
+                   _kinds(args.kinds))
+    runner = await _start(app, args.host, args.port)
+    base_url = f"http://{args.host}:{args.port}"
+    if args.write_config:
+        write_config(args.write_config, base_url, app['banks'])
+        log.info("Config written: %s", args.write_config)
+    log.info("Mock server with %s banks on %s", args.banks, base_url)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(prog='python -m src.mockserver')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    p = sub.add_parser('serve')
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8765)
+    p.add_argument('--banks', type=int, default=5)
+    p.add_argument('--products', type=int, default=5, help='продуктов на банк')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--kinds', default=','.join(KINDS),
+                   help='виды разметки через запятую (Privatbank - только http, без Chromium)')
+    p.add_argument('--latency', type=float, default=0.0, help='задержка ответа, секунды')
+    p.add_argument('--jitter', type=float, default=0.0, help='добавка к задержке до N секунд (детерминированно по url)')
+    p.add_argument('--error-rate', type=float, default=0.0, help='доля url, отвечающих 500')
+    p.add_argument('--write-config', default=None, help='записать config.env для run_all')
+    args = ap.parse_args()
+    setup_logging('INFO')
+    asyncio.run(serve(args))
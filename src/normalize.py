@@ -0,0 +1,69 @@
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# Одна скомпилированная альтернатива на все валюты: имя группы = ISO-код
+CURRENCY_RE = re.compile(
+    r"(?P<UAH>\bгрн|гривн\w*|\buah\b|₴)"
+    r"|(?P<USD>\busd\b|долар\w*(?:\s*сша)?|\$)"
+    r"|(?P<EUR>\beur\b|євро|€)",
+    re.I,
+)
+
+# Срок: число или диапазон чисел с необязательной единицей (дні / міс / рік, рус. и англ. варианты)
+TERM_RE = re.compile(
+    r"(\d+)(?:\s*[-–—]\s*(\d+))?\s*"
+    r"(?P<unit>д(?:н|ен|і|ня|ей)\w*|day\w*|міс\w*|мес\w*|month\w*|m\b|р(?:ік|ок|оки|оків|оку)\b|л(?:ет|іт)\b|year\w*|y\b)?",
+    re.I,
+)
+
+DAYS_IN_MONTH = 30.4375
+
+
+def _to_months(value: int, unit: Optional[str]) -> int:
+    unit = (unit or '').lower()
+    if unit.startswith(('д', 'day')):
+        return max(1, round(value / DAYS_IN_MONTH))
+    if unit.startswith(('р', 'л', 'year', 'y')):
+        return value * 12
+    return value  # без единицы и для "міс" — месяцы
+
+
+@lru_cache(maxsize=4096)
+def find_currency(text: str) -> Optional[str]:
+    """ISO-код валюты по тексту ячейки / заголовка ('Долар США' -> 'USD')"""
+    if not text:
+        return None
+    m = CURRENCY_RE.search(text)
+    return m.lastgroup if m else None
+
+
+@lru_cache(maxsize=4096)
+def parse_term_days(text: str) -> Tuple[int, ...]:
+    """Сырые числа срока: '93 - 183 дні' -> (93, 183), '12 міс' -> (12,)"""
+    m = TERM_RE.search(text or '')
+    if not m:
+        return ()
+    return tuple(int(g) for g in m.groups()[:2] if g)
+
+
+@lru_cache(maxsize=4096)
+def parse_terms(text: str) -> Tuple[int, ...]:
+    """
+    Срок(и) в месяцах: '12 місяців' -> (12,), '1 рік' -> (12,), '93 - 183 дні' -> (3, 6).
+    Пустой кортеж, если в тексте нет срока.
+    """
+    m = TERM_RE.search(text or '')
+    if not m:
+        return ()
+    unit = m.group('unit')
+    return tuple(_to_months(int(g), unit) for g in m.groups()[:2] if g)
+
+
+@lru_cache(maxsize=4096)
+def normalize_cell(raw: str) -> Tuple[Tuple[int, ...], Optional[str]]:
+    """
+    Сырой текст ячейки -> (сроки в месяцах, валюта): '12 місяців (грн)' -> ((12,), 'UAH').
+    Кэшируется: в таблицах и между страницами одного банка тексты ячеек повторяются.
+    """
+    return parse_terms(raw), find_currency(raw)
@@ -1,4 +1,6 @@
 from ..generic import GenericBankParser
+from ..normalize import normalize_cell
+from ..records import RateRecord
 from typing import Dict, List, Any
 import json
 import re
@@ -11,13 +13,15 @@ class PrivatbankParser(GenericBankParser):
     group_1: str = 'Державний'
     url_dep: str = r'https://deposits.privatbank.ua/static/app/open.htm'
     url: str = r'https://deposits.privatbank.ua/static/app/js/programs.js'
+    fetch_mode: str = 'http'   # programs.js — обычный JS-файл, браузер не нужен
 
     def __init__(self, config=None):
         cfg = config or {}
         super().__init__(cfg)
 
-    async def parse_detail(self, browser: Browser, main_html: str) -> List[Dict[str, Any]]:
-        rows: List[Dict[str, Any]] = []
+    async def parse_detail(self, browser: Browser, main_html: str) -> List[RateRecord]:
+        rows: List[RateRecord] = []
+        programs = []
 
         # используем регулярку, чтобы вытащить содержимое массива
         match = re.search(r'var programs\s*=\s*(\[.*?\]);', main_html, re.DOTALL)
@@ -28,19 +32,15 @@ class PrivatbankParser(GenericBankParser):
         for program in programs:
             if program.get("code") in ('DEN0','DENK','DDND','DPSG','DPR0'):
                 product_name = program.get("name")
+                infos = []
                 for rate_info in program.get("rates", []):
                     term = rate_info.get("duration")
                     for currency, value in rate_info.get("curr", {}).items():
-                        rows.append({
-                            "product": product_name,
+                        infos.append({
                             "term": term,
-                            "currency": currency.upper(),
+                            "currency": normalize_cell(currency)[1] or currency.upper(),
                             "rate": value.get("rate"),
-                            "bank": self.name,
-                            "full_name": self.full_name,
-                            "nkb": self.nkb,
-                            "group_1": self.group_1,
-                            "source_url": self.url_dep
                         })
+                rows.extend(self.make_records(infos, product_name, self.url_dep))
 
         return rows
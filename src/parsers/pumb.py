@@ -1,10 +1,26 @@
 from ..generic import GenericBankParser
+from ..tables import TableSpec, has_class, extract_rates
 import re
 from typing import Dict, List, Any, Optional
 from bs4 import BeautifulSoup
 from playwright.async_api import Page, Browser
 from urllib.parse import urlparse
 
+# Таблица ставок: вкладка на каждую валюту, сроки в строке-заголовке, ставки в следующих строках.
+# Строки внутри div.transparent-table пропускаются.
+RATES_SPEC = TableSpec(
+    section=f"//section[{has_class('deposit-rates')}]",
+    layout="term_columns",
+    groups=f".//div[{has_class('tab-pane')}]",
+    group_labels=f".//div[{has_class('tabs-btns-wr')}]//a[@data-id]",
+    group_label_text="./span/text()",   # только прямой текст, без <sup>, <i> и т.п.
+    rows=f".//div[{has_class('row')} and not(ancestor::div[{has_class('transparent-table')}])]",
+    header=f"self::*[{has_class('header-row')}]",
+    cells=f".//div[{has_class('col')}]",
+    rate_marker="%",
+    term_pattern=r"(\d+)\s*міс",     # в заголовке бывают суммы ("від 1000 грн"), сроки только в месяцах
+)
+
 class PumbParser(GenericBankParser):
     name: str = r'Pumb'
     full_name: str = r'АТ "ПУМБ"'
@@ -65,131 +81,17 @@ class PumbParser(GenericBankParser):
 
         except Exception as e:
             # Логируем ошибку и возвращаем то, что успели собрать
-            print(f"[ERROR] [{self.name}] extract_allurls failed: {e}")
+            self.log.error("extract_allurls failed: %s", e)
             return []
         return result
 
     async def dep_info(self, html: str) -> List[Dict[str, Any]]:
         """
-        Ищем  и парсим таблицу внутри 
+        Ищем section.deposit-rates и парсим вкладки валют (через RATES_SPEC).
         Возвращаем список словарей [{'term':..., 'currency':..., 'rate':...}, ...]
         """
-        # Список для хранения результатов
-        results: List[Dict[str, Any]] = []
-        # Маппинг названий валют в ISO
-        currency_map = {
-            "Гривня": "UAH",
-            "Долар США": "USD",
-            "Євро": "EUR"
-        }
-        curr = {}
-
         try:
-            block = re.search(r'<section class="line-tab tabs-wr deposit-rates">.*?<\/section>', html, re.S)
-            htm = block.group(0)
-
-            soup = BeautifulSoup(htm, "html.parser")
-            
-            # Находим все <a ... data-id="..."><span>Валюта</span></a>
-            for a in soup.select("div.tabs-btns-wr a[data-id]"):
-                data_id = a.get("data-id")
-                span = a.find("span")
-                # достаём только прямой текст, игнорируя теги <sup>, <i>, и т.п.
-                span_text = "".join(span.find_all(text=True, recursive=False)).strip()
-                iso = currency_map.get(span_text)
-                if iso:
-                    curr[data_id] = iso
-
-            # Находим все блоки tab-pane
-            for tab in soup.select("div.tab-pane"):
-                data_id = tab.get("data-id")
-                currency = curr.get(data_id)
-                if not currency:
-                    continue
-            
-                # берём только те header-row, что НЕ находятся внутри transparent-table
-                headers = []
-                for hdr in tab.select(".row.header-row"):
-                    if hdr.find_parent("div", class_="transparent-table"):
-                        continue  # пропускаем "прозрачные" таблицы
-
-                # Заголовки (term)
-                    terms = []
-                    for col in hdr.select(".col"):
-                        text = col.get_text(" ", strip=True)
-                        m = re.search(r'(\d+)\s*міс', text)
-                        if m:
-                            terms.append(m.group(1))
-
-#                    print(terms)
-            
-                    # Ставки (rate)
-                    # ищем соответствующую строку со ставками
-                    for row in tab.select(".row:not(.header-row)"):
-                        if row.find_parent("div", class_="transparent-table"):
-                            continue
-            
-                        rates = []
-                        for col in row.select(".col"):
-                            text = col.get_text(" ", strip=True)
-                            if "%" in text:
-                                rate = text.replace("%", "").replace(",", ".").strip()
-                                rates.append(rate)
-            
-                        # соединяем terms и rates по индексам
-                        for term, rate in zip(terms, rates):
-                            results.append({
-                                "currency": currency,
-                                "term": term,
-                                "rate": rate
-                            })
-
-            return results
+            return extract_rates(html, RATES_SPEC)
         except Exception as e:
-            print(f"[ERROR] [{self.name}] dep_info failed: {e}")
+            self.log.error("dep_info failed: %s", e)
             return []
-
-    async def parse_detail(self, browser: Browser, main_html: str) -> List[Dict[str, Any]]:
-        result: List[Dict[str, Any]] = []
-
-        # Формируем AllUrls (await т.к. метод асинхронный)
-        try:
-            self.AllUrls = await self.extract_allurls(main_html)
-        except Exception as e:
-            print(f"[ERROR] [{self.name}] extract_allurls raised: {e}")
-            return result
-
-        if not self.AllUrls:
-            print(f"[WARNING] [{self.name}] No deposit products found.")
-            return result
-
-        # Перебираем словарь {product_name: product_url}
-        for idx, (product_name, product_url) in enumerate(self.AllUrls.items(), start=1):
-            print(f"[DEBUG] [{self.name}] ({idx}/{len(self.AllUrls)}) Processing '{product_name}' -> {product_url}")
-            try:
-                html = await self.fetch_page(browser, product_url, timeout=self.timeout)
-                if not html:
-                    print(f"[WARN] [{self.name}] Empty html for {product_name}")
-                    continue
-
-                infos = await self.dep_info(html)   # await т.к. dep_info — async
-#                print(infos)
-                if not infos:
-                    print(f"[WARN] [{self.name}] infos returned empty for {product_name}")
-                    continue
-
-                # нормализуем записи и добавляем метаданные
-                for inf in infos:
-                    if isinstance(inf, dict):
-                        inf["bank"] = self.name
-                        inf["full_name"] = self.full_name
-                        inf["nkb"] = self.nkb
-                        inf["group_1"] = self.group_1
-                        inf["product"] = product_name
-                        inf["source_url"] = product_url
-                        result.append(inf)
-
-            except Exception as e:
-                print(f"[ERROR] [{self.name}] Error processing {product_name}: {e}")
-
-        return result
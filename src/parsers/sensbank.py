@@ -1,15 +1,14 @@
 from ..generic import GenericBankParser
+from ..pdf import extract_rate_tables
+from ..tables import rate_records
 import re
 from typing import Dict, List, Any, Optional
 
 import aiohttp
 import asyncio
-import pdfplumber
-import io
 
 from bs4 import BeautifulSoup
 from playwright.async_api import Page, Browser
-import pandas as pd
 
 from urllib.parse import urlparse
 
@@ -43,155 +42,59 @@ class SensbankParser(GenericBankParser):
         """Закрывает асинхронную сессию"""
         if self.session:
             await self.session.close()
+            self.session = None
 
     async def download_pdf(self, url: str) -> Optional[bytes]:
         """
         Асинхронно загружает PDF из интернета
         """
-        if not self.session:
-            await self.create_session()
-        
+        if self.replay_date:
+            return self.archive.get(self.name, url, self.replay_date) if self.archive else None
+
         try:
-            async with self.session.get(url) as response:
-                response.raise_for_status()
-                return await response.read()
+            if self.net:
+                # общая сессия прогона: DNS и TLS-соединение с сервером уже прогреты
+                content = await self.net.get_bytes(url, timeout=30)
+            else:
+                if not self.session:
+                    await self.create_session()
+                async with self.session.get(url) as response:
+                    response.raise_for_status()
+                    content = await response.read()
+            self.archive_content(url, content)
+            return content
         except Exception as e:
-            print(f"Ошибка при загрузке PDF: {e}")
+            self.log.error("Ошибка при загрузке PDF: %s", e)
             return None
 
-    async def parse_rates_from_pdf(self, pdf_content: bytes) -> List[Dict[str, Any]]:
+    async def parse_rates_from_pdf(self, pdf_content: bytes, cache_key: Optional[str] = None) -> List[Dict[str, Any]]:
         """
-        Извлекает данных из PDF (выполняется в отдельном потоке)
+        Извлекает данных из PDF (выполняется в отдельном потоке).
+        Таблицы ставок ищутся на любой странице, их положение кэшируется по cache_key (url).
         """
-#        print(pdf_content)
         loop = asyncio.get_event_loop()
         
         def sync_extract_text():
-#            text = ""
             result: List[Dict[str, Any]] = []
             try:
-                with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
-#                    for page in pdf.pages:
-#                        page_text = page.extract_text()
-#                        if page_text:
-#                            text += page_text + "\n"
-                     page = pdf.pages[0]
-
-                    # Шаг 3. Извлекаем таблицы с указанной страницы
-                     tables = page.extract_tables()
-                     if not tables:
-                         print(f"[ERROR] Таблицы не найдены на странице {page_number + 1}")
-                         return None
-                     table = tables[1]
-
-                     df = pd.DataFrame(table[1:], columns=table[0])
-                     # Убедимся в названиях столбцов
-                     # ['Термін', 'UAH', 'USD', 'EUR']
-                     df.columns = ["term_raw", "UAH", "USD", "EUR"]
-#                     print(f"df= {df}")
-                     # Шаг 4. Преобразуем в список словарей
-                     for _, row in df.iterrows():
-                         # Извлекаем только первую цифру из term
-
-                         term_raw = str(row.get("term_raw", "")).strip()  # гарантируем строку
-
-                         if not term_raw:
-                             continue  # пропускаем пустую строку
-
-                         match = re.search(r"(\d+)", term_raw)
-                         if not match:
-                             continue  # если нет цифры, пропускаем
-
-#                         if row["term_raw"]:
-#                             match = re.search(r"(\d+)", row["term_raw"])
-#                         if not match:
-#                             continue
-                         term = int(match.group(1))
-#                         print(f"term= {term}")
-                         # Проходим по валютам
-                         for currency in ["UAH", "USD", "EUR"]:
-                             rate_raw = str(row[currency]).strip().replace("%", "").replace(",", ".")
-#                             print(f"rate_raw= {rate_raw}")
-                             if rate_raw == "" or rate_raw.lower() == "nan":
-                                 continue
-                             try:
-                                 rate = float(rate_raw)
-                                 print(f"rate= {rate}")
-                             except ValueError:
-                                 continue
-
-                             result.append({
-                                 "term": term,
-                                 "currency": currency,
-                                 "rate": rate
-                             })
-                             print(f"result= {result}")
-                     return result
-
+                for table in extract_rate_tables(pdf_content, cache_key):
+                    # первая колонка — срок (берётся начало диапазона), остальные — валюты по заголовку
+                    # ['Термін', 'UAH', 'USD', 'EUR']; пустые и нечисловые ставки отбрасываются
+                    records = rate_records(table[0], table[1:], first_term_only=True)
+                    result.extend(r for r in records if r['rate'] is not None)
             except Exception as e:
-                print(f"Ошибка при извлечении данных из PDF: {e}")
+                self.log.error("Ошибка при извлечении данных из PDF: %s", e)
             return result
         
         return await loop.run_in_executor(None, sync_extract_text)
 
-    async def parse_rates_from_pdf_new(self, pdf_content: bytes) -> List[Dict[str, Any]]:
-        """
-        Извлекает данных  из PDF (выполняется в отдельном потоке)
-        """
-        result: List[Dict[str, Any]] = []
-        try:
-            with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
-                 page = pdf.pages[0]
-                # Шаг 3. Извлекаем таблицы с указанной страницы
-                 tables = page.extract_tables()
-                 if not tables:
-                     print(f"Таблицы не найдены на странице {page_number + 1}")
-                     return None
-                 table = tables[1]
-
-
-                 df = pd.DataFrame(table[1:], columns=table[0])
-
-                 # Убедимся в названиях столбцов
-                 # ['Термін', 'UAH', 'USD', 'EUR']
-                 df.columns = ["term_raw", "UAH", "USD", "EUR"]
-
-                 # Шаг 4. Преобразуем в список словарей
-                 for _, row in df.iterrows():
-                     # Извлекаем только первую цифру из term
-                     match = re.search(r"(\d+)", row["term_raw"])
-                     if not match:
-                         continue
-                     term = int(match.group(1))
-
-                     # Проходим по валютам
-                     for currency in ["UAH", "USD", "EUR"]:
-                         rate_raw = str(row[currency]).strip().replace("%", "").replace(",", ".")
-                         if rate_raw == "" or rate_raw.lower() == "nan":
-                             continue
-                         try:
-                             rate = float(rate_raw)
-                         except ValueError:
-                             continue
-
-                         result.append({
-                             "term": term,
-                             "currency": currency,
-                             "rate": rate
-                         })
-
-                 return result
-
-        except Exception as e:
-            print(f"Ошибка при извлечении данных из PDF: {e}")
-        return result
-
     async def extract_allurls(self, html: str) -> Dict[str, str]:
         """
         Парсим главную страницу и возвращаем словарь {title: absolute_url}.
         Использует self.url для формирования абсолютных ссылок.
         """
         result: Dict[str, str] = {}
+        soup = None
         try:
             soup = BeautifulSoup(html, "html.parser")
 
@@ -227,78 +130,48 @@ class SensbankParser(GenericBankParser):
 
         except Exception as e:
             # Логируем ошибку и возвращаем то, что успели собрать
-            print(f"[ERROR] [{self.name}] extract_allurls failed: {e}")
+            self.log.error("extract_allurls failed: %s", e)
+        finally:
+            # дерево BeautifulSoup состоит из циклических ссылок: без decompose живёт до сборки мусора
+            if soup is not None:
+                soup.decompose()
         return result
 
     async def dep_info(self, url: str) -> List[Dict[str, Any]]:
         """
         Основной метод для получения данных о депозитных ставках
         """
-        print(f"[INFO] Load PDF -> {url}")
+        self.log.info("Load PDF -> %s", url)
         pdf_content = await self.download_pdf(url)
-        await self.close_session()
 
         if not pdf_content:
-            print(f"[WARNING] Failed to load PDF ({url})")
+            self.log.warning("Failed to load PDF (%s)", url)
             return []
                 
-        print("Парсинг данных...")
-        rates_data = await self.parse_rates_from_pdf(pdf_content)
+        self.log.debug("Парсинг данных...")
+        rates_data = await self.parse_rates_from_pdf(pdf_content, cache_key=url)
         
         return rates_data
 
-    async def parse_detail(self, browser: Browser, main_html: str) -> List[Dict[str, Any]]:
-        result: List[Dict[str, Any]] = []
-
-        # Формируем AllUrls (await т.к. метод асинхронный)
-        try:
-            self.AllUrls = await self.extract_allurls(main_html)
-        except Exception as e:
-            print(f"[ERROR] [{self.name}] extract_allurls raised: {e}")
-            return result
-
-        if not self.AllUrls:
-            print(f"[WARNING] [{self.name}] No deposit products found.")
-            return result
-
-        # Перебираем словарь {product_name: product_url}
-        for idx, (product_name, product_url) in enumerate(self.AllUrls.items(), start=1):
-            print(f"[DEBUG] [{self.name}] ({idx}/{len(self.AllUrls)}) Processing '{product_name}' -> {product_url}")
-            try:
-                html = await self.fetch_page(browser, product_url, timeout=self.timeout)
-                if not html:
-                    print(f"[WARN] [{self.name}] Empty html for {product_name}")
-                    continue
-
-                pattern = r'<a href="(/upload/PASPORT_PRODUKTA_.*?.pdf)".*?>Паспорт продукта.*?'+product_name+'</a>'
-                match = re.search(pattern,html)
-                if match:
-                    link = match.group(1)
-                    # если относительная — собрать абсолютный URL
-                    if link.startswith("/"):
-                        base = urlparse(self.url)
-                        link = f"{base.scheme}://{base.netloc}{link}"
-                else:
-                    print(f"[WARN] [{self.name}] not found pdf-link for {product_name}")
-                    continue                    
-
-                infos = await self.dep_info(link)   # await т.к. dep_info — async
-                if not infos:
-                    print(f"[WARN] [{self.name}] infos returned empty for {product_name}")
-                    continue
-
-                # нормализуем записи и добавляем метаданные
-                for inf in infos:
-                    if isinstance(inf, dict):
-                        inf["bank"] = self.name
-                        inf["full_name"] = self.full_name
-                        inf["nkb"] = self.nkb
-                        inf["group_1"] = self.group_1
-                        inf["product"] = product_name
-                        inf["source_url"] = product_url
-                        result.append(inf)
+    async def product_infos(self, browser: Browser, product_name: str, product_url: str) -> List[Dict[str, Any]]:
+        """Ставки продукта берутся из PDF-паспорта, ссылка на который есть на странице продукта"""
+        html = await self.fetch(browser, product_url, timeout=self.timeout)
+        if not html:
+            self.log.warning("Empty html for %s", product_name)
+            return []
 
-            except Exception as e:
-                print(f"[ERROR] [{self.name}] Error processing {product_name}: {e}")
+        pattern = r'<a href="(/upload/PASPORT_PRODUKTA_.*?.pdf)".*?>Паспорт продукта.*?'+re.escape(product_name)+'</a>'
+        match = re.search(pattern,html)
+        if not match:
+            self.log.warning("not found pdf-link for %s", product_name)
+            return []
+        link = match.group(1)
+        # если относительная — собрать абсолютный URL
+        if link.startswith("/"):
+            base = urlparse(self.url)
+            link = f"{base.scheme}://{base.netloc}{link}"
 
-        return result
+        try:
+            return await self.dep_info(link)   # await т.к. dep_info — async
+        finally:
+            await self.close_session()   # собственная сессия (без общей) живёт не дольше продукта
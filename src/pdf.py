@@ -0,0 +1,126 @@
+import io, json, os, re, threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import pdfplumber
+
+from .log import get_logger
+from .normalize import normalize_cell
+from .xlsx import OUTPUT_DIR
+
+log = get_logger()
+
+DEFAULT_CACHE_PATH = os.path.join(OUTPUT_DIR, '.cache', 'pdf_tables.json')
+CACHE_PATH = DEFAULT_CACHE_PATH
+
+# Дешёвая проверка текста страницы: есть ли на ней что-то похожее на таблицу ставок
+PROBE_RE = re.compile(r"(UAH|USD|EUR|грн|гривн|долар|євро)", re.I)
+
+Table = List[List[Optional[str]]]
+
+_cache_lock = threading.Lock()
+_cache: Optional[Dict[str, List[Tuple[int, int]]]] = None
+
+
+def set_cache_path(path: str = ''):
+    """Файл кэша расположения таблиц в PDF (pdf_cache_file в [GENERAL]; пусто - по умолчанию), читается заново"""
+    global CACHE_PATH, _cache
+    with _cache_lock:
+        CACHE_PATH = path or DEFAULT_CACHE_PATH
+        _cache = None
+
+
+def _load_cache() -> Dict[str, List[Tuple[int, int]]]:
+    global _cache
+    if _cache is None:
+        try:
+            with open(CACHE_PATH, encoding='utf-8') as f:
+                _cache = {k: [tuple(loc) for loc in v] for k, v in json.load(f).items()}
+        except (OSError, ValueError):
+            _cache = {}
+    return _cache
+
+
+def _save_cache(key: str, locations: List[Tuple[int, int]]):
+    with _cache_lock:
+        cache = _load_cache()
+        if cache.get(key) == locations:
+            return
+        cache[key] = locations
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        tmp = CACHE_PATH + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, CACHE_PATH)
+
+
+def is_rate_table(table: Table) -> bool:
+    """Таблица ставок: в заголовке есть валюта, хотя бы в одной строке первая ячейка — срок"""
+    if not table or len(table) < 2:
+        return False
+    if not any(normalize_cell(str(c or ''))[1] for c in table[0][1:]):
+        return False
+    return any(row and normalize_cell(str(row[0] or ''))[0] for row in table[1:])
+
+
+def _release(page):
+    """Объекты разметки страницы pdfplumber кэширует до закрытия документа — сбрасываем сразу"""
+    close = getattr(page, 'close', None) or getattr(page, 'flush_cache', None)
+    if close:
+        close()
+
+
+def _page_tables(pdf, page_idx: int) -> List[Table]:
+    page = pdf.pages[page_idx]
+    try:
+        return page.extract_tables() or []
+    finally:
+        _release(page)
+
+
+def find_rate_tables(pdf, cache_key: Optional[str] = None) -> List[Table]:
+    """
+    Ищем таблицы ставок на любых страницах PDF.
+    1) если для cache_key уже известны (страница, таблица) — сразу берём их;
+    2) иначе по каждой странице дешёвый текстовый пробник, и только для страниц-кандидатов
+       запускается дорогой extract_tables. Найденные позиции запоминаются в кэше.
+    """
+    if cache_key:
+        cached = _load_cache().get(cache_key)
+        if cached:
+            tables = []
+            try:
+                by_page: Dict[int, List[Table]] = {}
+                for page_idx, table_idx in cached:
+                    if page_idx not in by_page:
+                        by_page[page_idx] = _page_tables(pdf, page_idx)
+                    tables.append(by_page[page_idx][table_idx])
+            except IndexError:
+                tables = []
+            if tables and all(is_rate_table(t) for t in tables):
+                return tables
+            log.debug("PDF table cache miss for %s, rescanning", cache_key)
+
+    found: List[Table] = []
+    locations: List[Tuple[int, int]] = []
+    for page_idx, page in enumerate(pdf.pages):
+        text = page.extract_text() or ''
+        if not PROBE_RE.search(text):
+            _release(page)
+            continue
+        for table_idx, table in enumerate(_page_tables(pdf, page_idx)):
+            if is_rate_table(table):
+                found.append(table)
+                locations.append((page_idx, table_idx))
+
+    if cache_key and locations:
+        _save_cache(cache_key, locations)
+    return found
+
+
+def extract_rate_tables(pdf_content: bytes, cache_key: Optional[str] = None) -> List[Table]:
+    """Таблицы ставок из PDF (синхронно, вызывать в executor)"""
+    with pdfplumber.open(io.BytesIO(pdf_content)) as pdf:
+        tables = find_rate_tables(pdf, cache_key)
+    if not tables:
+        log.warning("Rate tables not found in PDF %s", cache_key or '')
+    return tables
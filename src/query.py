@@ -0,0 +1,240 @@
+import argparse, os
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+import pandas as pd
+
+from .xlsx import OUTPUT_DIR
+from .delta import HISTORY_SHEET
+
+SHEET_NAME = "Select Rates"
+KEY_COLS = ['bank', 'product', 'currency', 'term']
+META_COLS = ['nkb', 'full_name', 'group_1', 'source_url']
+
+Key = Tuple[str, str, str, str]
+
+
+def _to_date(value) -> Optional[date]:
+    """Приводим строку / datetime / Timestamp к date"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.to_datetime(value, dayfirst=False).date()
+
+
+def _norm_term(term) -> Optional[str]:
+    """'12', 12, '12m' -> '12m' (так term хранится в xlsx)"""
+    if term is None or term == '':
+        return None
+    term = str(term).strip()
+    return term if term.endswith('m') else f"{term}m"
+
+
+class RateIndex:
+    """
+    Индекс по истории ставок.
+    Ключ (bank, product, currency, term) -> отсортированные по дате ряды (dates, rates),
+    плюс вторичные индексы по каждому полю ключа, чтобы не сканировать всю историю.
+    История дельта-режима (колонка valid_to) хранит и конец каждого интервала: ставка действует
+    с date до valid_to (не включая), открытая запись (valid_to пуст) - до сих пор.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.series: Dict[Key, Tuple[List[date], List[float]]] = {}
+        self.ends: Dict[Key, List[Optional[date]]] = {}
+        self.meta: Dict[Key, Dict[str, Any]] = {}
+        self.by_field: Dict[str, Dict[str, set]] = {c: {} for c in KEY_COLS}
+        self.dates: List[date] = []
+        self.intervals = df is not None and 'valid_to' in df.columns
+        self.columns = KEY_COLS + META_COLS + ['date', 'rate'] + (['valid_to'] if self.intervals else [])
+        if df is None or df.empty:
+            return
+
+        df = df.copy()
+        df['date'] = pd.to_datetime(df['date']).dt.date
+        if self.intervals:
+            valid_to = pd.to_datetime(df['valid_to'])
+            df['valid_to'] = [None if pd.isna(v) else v.date() for v in valid_to]
+        df['term'] = df['term'].map(_norm_term)
+        df = df.sort_values('date', kind='stable')
+
+        for key, grp in df.groupby(KEY_COLS, sort=False, dropna=False):
+            key = tuple(str(k) for k in key)
+            # при нескольких записях за день оставляем последнюю
+            grp = grp.drop_duplicates('date', keep='last')
+            self.series[key] = (grp['date'].tolist(), grp['rate'].tolist())
+            if self.intervals:
+                self.ends[key] = grp['valid_to'].tolist()
+            last = grp.iloc[-1]
+            self.meta[key] = {c: last[c] for c in META_COLS if c in grp.columns}
+            for field, value in zip(KEY_COLS, key):
+                self.by_field[field].setdefault(value, set()).add(key)
+
+        self.dates = sorted(df['date'].unique())
+
+    def keys(self, bank=None, product=None, currency=None, term=None) -> List[Key]:
+        """Отбор ключей через вторичные индексы (пересечение множеств)"""
+        filters = {'bank': bank, 'product': product, 'currency': currency, 'term': _norm_term(term)}
+        selected = None
+        for field, value in filters.items():
+            if value is None:
+                continue
+            found = self.by_field[field].get(str(value), set())
+            selected = found if selected is None else selected & found
+            if not selected:
+                return []
+        if selected is None:
+            selected = self.series.keys()
+        return sorted(selected)
+
+    def _row(self, key: Key, d: date, rate, i: int = -1) -> Dict[str, Any]:
+        row = dict(zip(KEY_COLS, key))
+        row.update(self.meta.get(key, {}))
+        row['date'] = d
+        row['rate'] = rate
+        if self.intervals:
+            row['valid_to'] = self.ends[key][i]
+        return row
+
+    def _open_on(self, key: Key, i: int, d: date) -> bool:
+        """Запись i ещё действует на дату d (в истории без valid_to - всегда)"""
+        if not self.intervals:
+            return True
+        end = self.ends[key][i]
+        return end is None or d < end
+
+    def rate_on(self, key: Key, d: date):
+        """
+        Ставка, действовавшая на дату d (последняя известная не позже d).
+        В дельта-режиме после valid_to записи ставки нет: (None, None).
+        """
+        dates, rates = self.series[key]
+        i = bisect_right(dates, d)
+        return (dates[i - 1], rates[i - 1]) if i and self._open_on(key, i - 1, d) else (None, None)
+
+    def get_rates(self, bank=None, currency=None, term=None, date_range=None, product=None) -> pd.DataFrame:
+        """
+        Ставки за период, по строке на запись истории, не по строке на день: в обычной истории это ежедневные
+        срезы, в дельта-режиме - интервалы (date = valid_from, valid_to), пересекающиеся с периодом,
+        включая начатый до его начала.
+        """
+        start, end = (date_range or (None, None))
+        start, end = _to_date(start), _to_date(end)
+        rows = []
+        for key in self.keys(bank=bank, product=product, currency=currency, term=term):
+            dates, rates = self.series[key]
+            lo = bisect_left(dates, start) if start else 0
+            if self.intervals and lo and self._open_on(key, lo - 1, start):
+                lo -= 1
+            hi = bisect_right(dates, end) if end else len(dates)
+            for i in range(lo, hi):
+                rows.append(self._row(key, dates[i], rates[i], i))
+        return pd.DataFrame(rows, columns=self.columns)
+
+    def latest(self, **filters) -> pd.DataFrame:
+        rows = []
+        for key in self.keys(**filters):
+            dates, rates = self.series[key]
+            rows.append(self._row(key, dates[-1], rates[-1]))
+        return pd.DataFrame(rows, columns=self.columns)
+
+    def diff(self, date_a, date_b, **filters) -> pd.DataFrame:
+        """Изменения ставок между двумя датами (as-of на каждую дату)"""
+        date_a, date_b = _to_date(date_a), _to_date(date_b)
+        rows = []
+        for key in self.keys(**filters):
+            _, rate_a = self.rate_on(key, date_a)
+            _, rate_b = self.rate_on(key, date_b)
+            if rate_a == rate_b or (pd.isna(rate_a) and pd.isna(rate_b)):
+                continue
+            row = dict(zip(KEY_COLS, key))
+            row['rate_a'] = rate_a
+            row['rate_b'] = rate_b
+            row['change'] = None if rate_a is None or rate_b is None else rate_b - rate_a
+            rows.append(row)
+        return pd.DataFrame(rows, columns=KEY_COLS + ['rate_a', 'rate_b', 'change'])
+
+
+def load_history(path: Optional[str] = None) -> pd.DataFrame:
+    path = path or os.path.join(OUTPUT_DIR, 'Deposit_Rate_Data.xlsx')
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=KEY_COLS + META_COLS + ['date', 'rate'])
+    sheets = pd.ExcelFile(path).sheet_names
+    if SHEET_NAME not in sheets and HISTORY_SHEET in sheets:
+        # дельта-режим: интервалы valid_from..valid_to, конец нужен, чтобы закрытая запись не действовала вечно
+        df = pd.read_excel(path, sheet_name=HISTORY_SHEET)
+        return df.rename(columns={'valid_from': 'date'})
+    return pd.read_excel(path, sheet_name=SHEET_NAME)
+
+
+_index_cache: Dict[str, Tuple[float, RateIndex]] = {}
+
+
+def get_index(path: Optional[str] = None) -> RateIndex:
+    """Индекс строится один раз и перестраивается только при изменении файла"""
+    path = path or os.path.join(OUTPUT_DIR, 'Deposit_Rate_Data.xlsx')
+    mtime = os.path.getmtime(path) if os.path.exists(path) else 0.0
+    cached = _index_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    index = RateIndex(load_history(path))
+    _index_cache[path] = (mtime, index)
+    return index
+
+
+def get_rates(bank=None, currency=None, term=None, date_range=None, product=None, path=None) -> pd.DataFrame:
+    return get_index(path).get_rates(bank=bank, currency=currency, term=term, date_range=date_range, product=product)
+
+
+def latest(path=None, **filters) -> pd.DataFrame:
+    return get_index(path).latest(**filters)
+
+
+def diff(date_a, date_b, path=None, **filters) -> pd.DataFrame:
+    return get_index(path).diff(date_a, date_b, **filters)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m src.query', description='Запросы к истории депозитных ставок')
+    ap.add_argument('--file', default=None, help='xlsx с историей (по умолчанию output/Deposit_Rate_Data.xlsx)')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+
+    def add_filters(p):
+        p.add_argument('--bank')
+        p.add_argument('--product')
+        p.add_argument('--currency')
+        p.add_argument('--term', help='срок в месяцах: 12 или 12m')
+
+    p_rates = sub.add_parser('rates', help='ставки за период')
+    add_filters(p_rates)
+    p_rates.add_argument('--from', dest='date_from')
+    p_rates.add_argument('--to', dest='date_to')
+
+    p_latest = sub.add_parser('latest', help='последние известные ставки')
+    add_filters(p_latest)
+
+    p_diff = sub.add_parser('diff', help='изменения между двумя датами')
+    p_diff.add_argument('date_a')
+    p_diff.add_argument('date_b')
+    add_filters(p_diff)
+
+    args = ap.parse_args(argv)
+    filters = dict(bank=args.bank, product=args.product, currency=args.currency, term=args.term)
+
+    if args.cmd == 'rates':
+        df = get_rates(date_range=(args.date_from, args.date_to), path=args.file, **filters)
+    elif args.cmd == 'latest':
+        df = latest(path=args.file, **filters)
+    else:
+        df = diff(args.date_a, args.date_b, path=args.file, **filters)
+
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(df.to_string(index=False) if not df.empty else '(no rows)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+import sys
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow не обязателен, нужен только для to_arrow()
+    pa = None
+
+META_FIELDS = ('bank', 'nkb', 'full_name', 'group_1', 'product', 'source_url')
+RATE_FIELDS = ('term', 'currency', 'rate')
+
+# продуктов в кэше метаданных: с запасом на все продукты всех банков одного прогона
+META_CACHE_SIZE = 16384
+
+
+class ProductMeta(NamedTuple):
+    """Метаданные продукта — один экземпляр на продукт, общий для всех его ставок"""
+    bank: str
+    nkb: int
+    full_name: str
+    group_1: str
+    product: str
+    source_url: str
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@lru_cache(maxsize=META_CACHE_SIZE)
+def product_meta(bank, nkb, full_name, group_1, product, source_url) -> ProductMeta:
+    """
+    ProductMeta с интернированными строками; одинаковые продукты возвращают один объект.
+    Кэш ограничен META_CACHE_SIZE, так что долгоживущий процесс (сервер, повторные прогоны) не копит
+    метаданные исчезнувших продуктов; вытесненный продукт просто получит новый объект.
+    """
+    return ProductMeta(*map(_intern, (bank, nkb, full_name, group_1, product, source_url)))
+
+
+@dataclass(frozen=True, slots=True)
+class RateRecord:
+    """Одна ставка: ссылка на метаданные продукта + срок, валюта, ставка"""
+    meta: ProductMeta
+    term: Any
+    currency: Optional[str]
+    rate: Optional[float]
+
+    def __getitem__(self, key: str):
+        # совместимость со старым кодом, работавшим со словарями
+        if key in RATE_FIELDS:
+            return getattr(self, key)
+        if key in META_FIELDS:
+            return getattr(self.meta, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def as_dict(self) -> Dict[str, Any]:
+        row = self.meta._asdict()
+        row.update(term=self.term, currency=self.currency, rate=self.rate)
+        return row
+
+
+class RateBatch:
+    """
+    Колоночное хранение ставок: метаданные продукта хранятся один раз,
+    строки ссылаются на них индексом; ставки лежат в плотном массиве float64.
+    """
+    __slots__ = ('metas', '_meta_idx', 'codes', 'terms', 'currencies', 'rates')
+
+    def __init__(self, records: Iterable[RateRecord] = ()):
+        self.metas: List[ProductMeta] = []
+        self._meta_idx: Dict[ProductMeta, int] = {}
+        self.codes = array('i')
+        self.terms: List[Any] = []
+        self.currencies: List[Optional[str]] = []
+        self.rates = array('d')
+        self.extend(records)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def append(self, meta: ProductMeta, term, currency, rate):
+        idx = self._meta_idx.get(meta)
+        if idx is None:
+            idx = self._meta_idx[meta] = len(self.metas)
+            self.metas.append(meta)
+        self.codes.append(idx)
+        self.terms.append(term)
+        self.currencies.append(_intern(currency))
+        try:
+            self.rates.append(float(rate))
+        except (TypeError, ValueError):
+            self.rates.append(np.nan)
+
+    def extend(self, records: Iterable[RateRecord]):
+        for r in records:
+            self.append(r.meta, r.term, r.currency, r.rate)
+
+    def _codes(self) -> np.ndarray:
+        return np.frombuffer(self.codes, dtype=np.int32) if len(self.codes) else np.empty(0, np.int32)
+
+    def _rates(self) -> np.ndarray:
+        return np.frombuffer(self.rates, dtype=np.float64) if len(self.rates) else np.empty(0, np.float64)
+
+    def to_pandas(self, categorical: bool = False) -> pd.DataFrame:
+        """
+        DataFrame без копирования строк: метаданные разворачиваются через коды,
+        rate — представление над буфером массива.
+        """
+        codes = self._codes()
+        data = {}
+        for pos, name in enumerate(META_FIELDS):
+            values = [m[pos] for m in self.metas]
+            if not values:
+                data[name] = np.empty(0, object)
+            elif categorical:
+                cat_codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+                data[name] = pd.Categorical.from_codes(cat_codes[codes], categories=uniques)
+            else:
+                data[name] = np.asarray(values, dtype=object)[codes]
+        data['term'] = self.terms
+        data['currency'] = self.currencies
+        data['rate'] = self._rates()
+        return pd.DataFrame(data)
+
+    def to_arrow(self):
+        """pyarrow.Table: метаданные как dictionary-колонки, rate — без копирования буфера"""
+        if pa is None:
+            raise ImportError("RateBatch.to_arrow() requires pyarrow (pip install pyarrow)")
+        indices = pa.array(self._codes(), type=pa.int32())
+        columns = {
+            name: pa.DictionaryArray.from_arrays(indices, pa.array([m[pos] for m in self.metas]))
+            for pos, name in enumerate(META_FIELDS)
+        }
+        columns['term'] = pa.array([str(t) for t in self.terms])
+        columns['currency'] = pa.array(self.currencies, type=pa.string())
+        columns['rate'] = pa.array(self._rates(), from_pandas=True)
+        return pa.table(columns)
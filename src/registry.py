@@ -0,0 +1,129 @@
+import importlib
+from dataclasses import dataclass
+from importlib.metadata import entry_points
+from typing import Dict, List, Optional
+
+from .log import get_logger
+
+log = get_logger()
+
+# Сторонние пакеты объявляют парсеры в pyproject.toml:
+#   [project.entry-points."bank_rates.parsers"]
+#   Mybank = "mypkg.manifests:MYBANK"      # ParserManifest (или класс парсера)
+ENTRY_POINT_GROUP = 'bank_rates.parsers'
+
+
+@dataclass(frozen=True)
+class ParserManifest:
+    """
+    Описание парсера без импорта его модуля:
+    section      - секция config.env;
+    target       - 'module:Class' (модуль относительно пакета src, если начинается с '.');
+    fetch_mode   - 'browser' (Playwright) или 'http' (простой GET);
+    concurrency  - сколько страниц продуктов банка можно грузить параллельно;
+    ready_selector - CSS-селектор, появление которого означает, что страница готова;
+    cacheable    - можно ли переиспользовать ранее загруженные страницы/списки продуктов.
+    """
+    section: str
+    target: str
+    fetch_mode: str = 'browser'
+    concurrency: int = 1
+    ready_selector: Optional[str] = None
+    cacheable: bool = True
+
+    def load(self) -> type:
+        """Импорт класса парсера (только в момент, когда он действительно нужен)"""
+        module, _, attr = self.target.partition(':')
+        mod = importlib.import_module(module, package=__package__)
+        return getattr(mod, attr)
+
+    def create(self, config=None):
+        parser = self.load()(config)
+        parser.manifest = self
+        parser.fetch_mode = self.fetch_mode
+        parser.concurrency = max(1, int(self.concurrency))
+        parser.ready_selector = self.ready_selector
+        parser.cacheable = self.cacheable
+        return parser
+
+
+BUILTIN: List[ParserManifest] = [
+    ParserManifest('Oschadbank', '.parsers.oschadbank:OschadbankParser',
+                   concurrency=2,
+                   ready_selector='section.all-private-deposits, section.block-table-rates'),
+    ParserManifest('Privatbank', '.parsers.privatbank:PrivatbankParser',
+                   fetch_mode='http'),
+    ParserManifest('Sensbank', '.parsers.sensbank:SensbankParser',
+                   ready_selector='section.deposit-list, a[href*="PASPORT_PRODUKTA"]'),
+    ParserManifest('Ukreximbank', '.parsers.ukreximbank:UkreximbankParser',
+                   concurrency=2,
+                   ready_selector='a.direction-item, div.additional-info'),
+    ParserManifest('Pumb', '.parsers.pumb:PumbParser',
+                   concurrency=2,
+                   ready_selector='div.deposit-list-card, section.deposit-rates'),
+]
+
+_registry: Dict[str, ParserManifest] = {}
+_loaded = False
+
+
+def _key(section: str) -> str:
+    return section.lower().replace(' ', '')
+
+
+def register_manifest(manifest: ParserManifest) -> ParserManifest:
+    key = _key(manifest.section)
+    if key in _registry and _registry[key].target != manifest.target:
+        log.warning("Parser for %s re-registered: %s -> %s", manifest.section, _registry[key].target, manifest.target)
+    _registry[key] = manifest
+    return manifest
+
+
+def register(section: str, **capabilities):
+    """
+    Декоратор для класса парсера:
+        @register('Mybank', fetch_mode='http', concurrency=4)
+        class MybankParser(GenericBankParser): ...
+    """
+    def wrap(cls):
+        register_manifest(ParserManifest(section, f"{cls.__module__}:{cls.__qualname__}", **capabilities))
+        return cls
+    return wrap
+
+
+def _load_plugins():
+    """Встроенные манифесты (если секция не переопределена через @register) и entry points"""
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    for manifest in BUILTIN:
+        _registry.setdefault(_key(manifest.section), manifest)
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            obj = ep.load()
+            if isinstance(obj, ParserManifest):
+                register_manifest(obj)
+            elif isinstance(obj, type):
+                # класс парсера: возможности берутся из атрибутов класса
+                register_manifest(ParserManifest(
+                    ep.name, f"{obj.__module__}:{obj.__qualname__}",
+                    fetch_mode=getattr(obj, 'fetch_mode', 'browser'),
+                    concurrency=getattr(obj, 'concurrency', 1),
+                    ready_selector=getattr(obj, 'ready_selector', None),
+                    cacheable=getattr(obj, 'cacheable', True),
+                ))
+            else:
+                log.warning("Entry point %s is not a ParserManifest or class", ep.name)
+        except Exception as e:
+            log.warning("Could not load parser entry point %s: %s", ep.name, e)
+
+
+def manifests() -> Dict[str, ParserManifest]:
+    """Все известные парсеры {section_key: manifest}: встроенные, entry points, @register"""
+    _load_plugins()
+    return dict(_registry)
+
+
+def get_manifest(section: str) -> Optional[ParserManifest]:
+    return manifests().get(_key(section))
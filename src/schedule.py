@@ -0,0 +1,64 @@
+import csv, json, os
+from datetime import datetime
+from typing import Any, Dict, List
+
+from .xlsx import OUTPUT_DIR
+
+DURATIONS_PATH = os.path.join(OUTPUT_DIR, '.cache', 'durations.json')
+RUNS_PATH = os.path.join(OUTPUT_DIR, 'Runs.csv')
+RUNS_HEADER = ['run_at', 'bank', 'status', 'rows', 'seconds']
+
+
+def load_durations(path: str = DURATIONS_PATH) -> Dict[str, float]:
+    """Историческая длительность парсинга каждого банка, секунды"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return {k: float(v) for k, v in json.load(f).items()}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_durations(durations: Dict[str, float], path: str = DURATIONS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({k: round(v, 2) for k, v in durations.items()}, f, indent=1)
+    os.replace(tmp, path)
+
+
+def save_run_log(run_status: Dict[str, Dict[str, Any]], path: str = RUNS_PATH, run_date: datetime = None) -> str:
+    """
+    Дописываем статус прогона по банкам (ok / partial / failed / skipped) в отдельный небольшой CSV:
+    дозапись строк в конец файла, книга с историей ставок для этого не открывается.
+    """
+    if not run_status:
+        return path
+    run_at = (run_date or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')
+    new = not os.path.exists(path)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    # BOM только в начале нового файла, чтобы Excel открыл кириллицу
+    with open(path, 'a', newline='', encoding='utf-8-sig' if new else 'utf-8') as f:
+        writer = csv.writer(f)
+        if new:
+            writer.writerow(RUNS_HEADER)
+        for bank, info in run_status.items():
+            writer.writerow([run_at, bank, info['status'], info['rows'], info['seconds']])
+    return path
+
+
+def update_duration(durations: Dict[str, float], name: str, seconds: float, alpha: float = 0.5):
+    """Сглаживаем (EMA), чтобы один выброс не перестраивал весь порядок"""
+    old = durations.get(name)
+    durations[name] = seconds if old is None else alpha * seconds + (1 - alpha) * old
+
+
+def plan_order(manifests: Dict[str, Any], durations: Dict[str, float]) -> List[str]:
+    """
+    Порядок старта по манифестам {section: ParserManifest}: http-банки не занимают слотов браузера и стартуют
+    сразу; браузерные — самые медленные по истории первыми, новые (без истории) — в начале, их длительность
+    неизвестна. При равной длительности раньше стартует банк с большим concurrency.
+    """
+    def key(name):
+        manifest = manifests[name]
+        return manifest.fetch_mode == 'http', durations.get(name, float('inf')), manifest.concurrency
+    return sorted(manifests, key=key, reverse=True)
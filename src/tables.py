@@ -0,0 +1,303 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from lxml import etree, html as lxml_html
+
+from .log import get_logger
+from .normalize import CURRENCY_RE, DAYS_IN_MONTH, TERM_RE, normalize_cell, parse_term_days
+
+log = get_logger()
+
+RATE_COLUMNS = ['term', 'currency', 'rate']
+
+# до стольких строк таблица разбирается по ячейкам (кэш normalize_cell): rate_frame стоит ~6 мс накладных
+# расходов pandas на таблицу и догоняет разбор по ячейкам только к ~10 тыс. строк (python -m bench split).
+# Страницы банков и паспорта продуктов (единицы-десятки строк) всегда идут по ячейкам
+SMALL_TABLE_ROWS = 10000
+
+
+def has_class(name: str) -> str:
+    """XPath-условие: у элемента есть css-класс name"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+@dataclass
+class TableSpec:
+    """
+    Декларативное описание таблицы ставок банка (срок × валюта).
+    Все XPath компилируются один раз при создании спецификации,
+    сроки и валюты распознаются общим модулем normalize.
+
+    layout:
+      term_rows    — срок в первой ячейке строки, валюты в заголовке (<th>) таблицы;
+                     если валютных колонок нет — валюта ищется в тексте срока
+      term_columns — сроки в строке-заголовке, ставки в следующих строках,
+                     валюта задаётся группой (вкладкой) через groups/group_labels
+    """
+    section: str                                   # XPath секции с таблицей (берётся первая)
+    rows: str                                      # XPath строк (относительно секции или группы)
+    cells: str                                     # XPath ячеек строки
+    header: str = ''                               # term_rows: ячейки заголовка; term_columns: признак строки-заголовка
+    layout: str = 'term_rows'
+    groups: str = ''                               # XPath групп (вкладок) внутри секции
+    group_key: str = '@data-id'                    # ключ, связывающий группу с подписью
+    group_labels: str = ''                         # XPath подписей групп (относительно секции)
+    group_label_text: str = './/text()'            # текстовые узлы подписи
+    term_ranges: Dict[Tuple[int, int], Tuple[int, ...]] = field(default_factory=dict)  # (день_от, день_до) -> месяцы
+    rate_marker: str = ''                          # учитывать только ячейки с этим текстом ('%')
+    term_pattern: str = ''                         # term_columns: регулярка ячейки-срока банка (r'(\d+)\s*міс')
+
+    def __post_init__(self):
+        x = etree.XPath
+        self._section = x(self.section)
+        self._rows = x(self.rows)
+        self._cells = x(self.cells)
+        self._header = x(self.header) if self.header else None
+        self._groups = x(self.groups) if self.groups else None
+        self._group_key = x(f"string({self.group_key})")
+        self._group_labels = x(self.group_labels) if self.group_labels else None
+        self._group_label_text = x(self.group_label_text)
+        self._term_pattern = re.compile(self.term_pattern, re.I) if self.term_pattern else None
+
+    # --- нормализация ячеек ---
+
+    def currency(self, text: str) -> Optional[str]:
+        return normalize_cell(text)[1]
+
+    def terms(self, text: str) -> Tuple[int, ...]:
+        """Срок(и) в месяцах из текста ячейки; пустой кортеж — не срок"""
+        if self._term_pattern is not None and not self._term_pattern.search(text):
+            return ()   # число без единицы банка ("від 1000 грн") сроком не считается
+        return _terms(text, self.term_ranges)
+
+
+def _terms(text: str, term_ranges: Dict[Tuple[int, ...], Tuple[int, ...]] = None) -> Tuple[int, ...]:
+    if term_ranges:
+        override = term_ranges.get(parse_term_days(text))
+        if override:
+            return override
+    return normalize_cell(text)[0]
+
+
+def cell_text(el) -> str:
+    """Текст элемента без лишних пробелов (аналог get_text(' ', strip=True))"""
+    return ' '.join(t.strip() for t in el.itertext() if t.strip())
+
+
+RATE_JUNK_RE = re.compile(r'[\s%]')
+
+
+def parse_rate(text: str) -> Optional[float]:
+    text = RATE_JUNK_RE.sub('', text).replace(',', '.')
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def rate_values(text: pd.Series) -> pd.Series:
+    """Векторный аналог parse_rate: '10,5 %' -> 10.5, пусто / нечисловое -> NaN"""
+    text = text.fillna('').astype(str).str.replace(RATE_JUNK_RE, '', regex=True).str.replace(',', '.', regex=False)
+    return pd.to_numeric(text, errors='coerce').astype(float)
+
+
+def _by_unique(values, parse):
+    """
+    Разбор колонки через её уникальные значения: в таблицах ставок сроки и ставки повторяются,
+    поэтому строковые операции идут по десяткам уникальных текстов, а не по каждой ячейке.
+    parse(Series уникальных) -> Series/DataFrame той же длины; None / NaN в values -> NaN.
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = parse(pd.Series(uniques, dtype=object))
+    return parsed.reindex(codes).reset_index(drop=True)   # код -1 (пропуск) в индексе нет -> NaN
+
+
+def term_currency(text: pd.Series) -> pd.Series:
+    """Векторный аналог find_currency: ISO-код по имени сработавшей группы CURRENCY_RE, иначе NaN"""
+    found = text.fillna('').astype(str).str.extract(CURRENCY_RE).notna()
+    return found.idxmax(axis=1).where(found.any(axis=1))
+
+
+def term_months(text: pd.Series, term_ranges: Dict[Tuple[int, ...], Tuple[int, ...]] = None) -> pd.DataFrame:
+    """
+    Векторный аналог TableSpec.terms для колонки текстов: колонка 0 — срок (начало диапазона) в месяцах,
+    колонка 1 — конец диапазона; NaN, если срока / диапазона нет.
+    """
+    found = text.str.extract(TERM_RE)
+    raw = pd.DataFrame({0: pd.to_numeric(found[0], errors='coerce'), 1: pd.to_numeric(found[1], errors='coerce')})
+    unit = found['unit'].fillna('').str.lower()
+    days = unit.str.startswith(('д', 'day')).to_numpy(dtype=bool)
+    years = unit.str.startswith(('р', 'л', 'year', 'y')).to_numpy(dtype=bool)
+    months = pd.DataFrame({k: np.select([days, years], [np.maximum(1, np.round(v / DAYS_IN_MONTH)), v * 12], v)
+                           for k, v in ((k, raw[k].to_numpy(dtype=float)) for k in raw)}, index=text.index)
+    # диапазоны дней банка -> сроки в месяцах (по сырым числам, как parse_term_days)
+    for key, override in (term_ranges or {}).items():
+        hit = raw[0] == key[0]
+        hit &= (raw[1] == key[1]) if len(key) > 1 else raw[1].isna()
+        for k in range(max(len(override), months.shape[1])):
+            months.loc[hit, k] = override[k] if k < len(override) else np.nan
+    return months
+
+
+def rate_frame(header: Sequence[Optional[str]], rows: Sequence[Sequence[Optional[str]]],
+               term_ranges: Dict[Tuple[int, ...], Tuple[int, ...]] = None,
+               first_term_only: bool = False) -> pd.DataFrame:
+    """
+    Таблица «срок × валюта» -> DataFrame [term, currency, rate]; общий разбор для HTML-таблиц и PDF.
+    Первая колонка — срок, валюта колонки — по заголовку. Если валютных колонок в заголовке нет,
+    валюта ищется в тексте срока ("12 місяців (грн)"), а ставка берётся из второй колонки.
+    Без построчного цикла: валютные колонки сворачиваются в длинный вид одним reshape (melt в порядке строк),
+    сроки разбираются str.extract по TERM_RE, ставки — заменой по колонке и pd.to_numeric
+    (нераспознанная ставка — NaN); строковые операции идут только по уникальным текстам ячеек.
+    Строки короче двух ячеек и без срока пропускаются; диапазон сроков даёт строку на каждую границу
+    (first_term_only — только начало диапазона). Если разные тексты сроков дают одинаковые месяцы
+    ("1 рік" и "366 днів" -> 12), остаётся первая по таблице строка; повтор того же текста не сливается
+    и уходит в проверку дубликатов (validate).
+    """
+    rows = [r for r in rows if len(r) >= 2]
+    header_currencies = _header_currencies(header)
+    if not rows:
+        return pd.DataFrame(columns=RATE_COLUMNS)
+
+    table = pd.DataFrame(rows, dtype=object)     # короткие строки дополняются None
+    columns = [i for i in header_currencies if i < table.shape[1]] if header_currencies else [1]
+    if not columns:
+        return pd.DataFrame(columns=RATE_COLUMNS)
+
+    # широкий блок ставок -> длинный: (строка, колонка) построчно, как melt с сортировкой по строке
+    n, m = len(table), len(columns)
+    row = np.repeat(np.arange(n), m)
+    pos = np.tile(np.arange(m), n)
+    lengths = np.fromiter(map(len, rows), dtype=np.int64, count=n)
+    keep = np.asarray(columns)[pos] < lengths[row]     # ячейки, которых в строке нет, ставок не дают
+    row, pos = row[keep], pos[keep]
+    rate = _by_unique(table[columns].to_numpy().ravel()[keep], rate_values).to_numpy()
+
+    term_text = table[0].to_numpy()
+    if header_currencies:
+        currency = np.array([header_currencies[i] for i in columns], dtype=object)[pos]
+    else:
+        currency = _by_unique(term_text, term_currency).to_numpy()[row]
+
+    months = _by_unique(term_text, lambda text: term_months(text.fillna('').astype(str), term_ranges))
+    parts = []
+    for k in months.columns[:1] if first_term_only else months.columns:
+        part = pd.DataFrame({'_row': row, '_k': k, '_text': term_text[row], 'term': months[k].to_numpy()[row],
+                             'currency': currency, 'rate': rate})
+        parts.append(part[part['term'].notna()])
+    out = parts[0] if len(parts) == 1 else pd.concat(parts).sort_values(['_row', '_k'], kind='stable')
+    first = out.groupby(['term', 'currency'], sort=False, dropna=False)['_text'].transform('first')
+    merged = out['_text'] != first
+    if merged.any():
+        log.debug("Term collision: %s rows merged into an earlier term with the same months", int(merged.sum()))
+    return out.loc[~merged, RATE_COLUMNS].astype({'term': np.int64}).reset_index(drop=True)
+
+
+def _header_currencies(header: Sequence[Optional[str]]) -> Dict[int, str]:
+    found = {i: normalize_cell(str(h or ''))[1] for i, h in enumerate(header) if i > 0}
+    return {i: c for i, c in found.items() if c}
+
+
+def rate_records(header: Sequence[Optional[str]], rows: Sequence[Sequence[Optional[str]]],
+                 term_ranges: Dict[Tuple[int, ...], Tuple[int, ...]] = None,
+                 first_term_only: bool = False) -> List[Dict[str, Any]]:
+    """
+    То же, что frame_records(rate_frame(...)). Таблицы до SMALL_TABLE_ROWS строк разбираются по ячейкам
+    через кэш normalize_cell, большие — векторно через rate_frame.
+    """
+    if len(rows) > SMALL_TABLE_ROWS:
+        return frame_records(rate_frame(header, rows, term_ranges, first_term_only))
+    return _cell_records(header, rows, term_ranges, first_term_only)
+
+
+def _cell_records(header: Sequence[Optional[str]], rows: Sequence[Sequence[Optional[str]]],
+                  term_ranges: Dict[Tuple[int, ...], Tuple[int, ...]] = None,
+                  first_term_only: bool = False) -> List[Dict[str, Any]]:
+    """Разбор по ячейкам через кэш normalize_cell"""
+    header_currencies = _header_currencies(header)
+    results = []
+    seen = {}   # (срок, валюта) -> текст срока, давший его первым
+    for row in rows:
+        if len(row) < 2:
+            continue
+        text = str(row[0] or '')
+        terms = _terms(text, term_ranges)
+        if first_term_only:
+            terms = terms[:1]
+        if not terms:
+            continue
+        if header_currencies:
+            cells = [(header_currencies[i], row[i]) for i in header_currencies if i < len(row)]
+        else:
+            cells = [(normalize_cell(text)[1], row[1])]
+        for term in terms:
+            for currency, cell in cells:
+                first = seen.setdefault((term, currency), text)
+                if first != text:
+                    log.debug("Term collision: '%s' merged into '%s' (%sm %s)", text, first, term, currency)
+                    continue
+                rate = parse_rate(str(cell)) if cell is not None else None
+                results.append({"term": term, "currency": currency, "rate": None if rate != rate else rate})
+    return results
+
+
+def frame_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """DataFrame [term, currency, rate] -> [{'term', 'currency', 'rate'}, ...], NaN -> None"""
+    currency = frame['currency'].astype(object).where(frame['currency'].notna(), None)
+    rate = frame['rate'].astype(object).where(frame['rate'].notna(), None)
+    return [{"term": t, "currency": c, "rate": r}
+            for t, c, r in zip(frame['term'].tolist(), currency.tolist(), rate.tolist())]
+
+
+def _term_rows(spec: TableSpec, section) -> List[Dict[str, Any]]:
+    headers = [cell_text(h) for h in spec._header(section)] if spec._header is not None else []
+    rows = [[cell_text(td) for td in spec._cells(row)] for row in spec._rows(section)]
+    return rate_records(headers, rows, spec.term_ranges)
+
+
+def _term_columns(spec: TableSpec, section) -> List[Dict[str, Any]]:
+    results = []
+    labels = {}
+    if spec._group_labels is not None:
+        for el in spec._group_labels(section):
+            value = spec._group_label_text(el)
+            text = ''.join(value) if isinstance(value, list) else str(value)
+            labels[spec._group_key(el)] = spec.currency(text.strip())
+
+    groups = spec._groups(section) if spec._groups is not None else [section]
+    for group in groups:
+        currency = labels.get(spec._group_key(group)) if labels else None
+        if labels and not currency:
+            continue
+        # вкладка - та же таблица «срок × валюта» с одной колонкой ставок: строки [текст срока, ставка]
+        # разбираются общим rate_records (кэш normalize_cell, слияние совпавших сроков)
+        term_texts: List[str] = []
+        pairs: List[List[str]] = []
+        for row in spec._rows(group):
+            texts = [cell_text(c) for c in spec._cells(row)]
+            if spec._header is not None and spec._header(row):
+                term_texts = [text for text in texts if spec.terms(text)]
+                continue
+            rates = [t for t in texts if not spec.rate_marker or spec.rate_marker in t]
+            pairs.extend([term, rate] for term, rate in zip(term_texts, rates))
+        results.extend(rate_records(['', currency or ''], pairs, spec.term_ranges, first_term_only=True))
+    return results
+
+
+def extract_rates(html: str, spec: TableSpec) -> List[Dict[str, Any]]:
+    """
+    Разбор таблицы ставок по спецификации банка за один проход по дереву.
+    Возвращает [{'term': ..., 'currency': ..., 'rate': ...}, ...]
+    """
+    if not html:
+        return []
+    root = lxml_html.fromstring(html)
+    sections = spec._section(root)
+    if not sections:
+        return []
+    if spec.layout == 'term_columns':
+        return _term_columns(spec, sections[0])
+    return _term_rows(spec, sections[0])
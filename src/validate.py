@@ -0,0 +1,143 @@
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .log import get_logger
+from .query import get_index
+from .xlsx import OUTPUT_DIR
+
+log = get_logger()
+
+# последние ставки по ключам для проверки скачков: маленький файл рядом с кэшами вместо чтения всей истории
+SNAPSHOT_PATH = os.path.join(OUTPUT_DIR, '.cache', 'snapshot.pkl')
+
+KEY_COLS = ['bank', 'product', 'currency', 'term']
+# в срезе, кроме опорной ставки: ставка, отложенная в карантин как скачок, и сколько прогонов подряд она повторилась
+SNAPSHOT_COLS = KEY_COLS + ['rate', 'pending', 'seen']
+REASONS = np.array(['', 'duplicate', 'missing_rate', 'out_of_range', 'jump'], dtype=object)
+
+
+def _key_codes(frames) -> np.ndarray:
+    """
+    Целочисленный код составного ключа (bank, product, currency, term), общий для всех frames.
+    Номер группы, а не произведение кардинальностей колонок: код не превышает числа строк и не переполняется.
+    """
+    combined = pd.concat([f[KEY_COLS].astype(str) for f in frames], ignore_index=True)
+    return combined.groupby(KEY_COLS, sort=False, dropna=False).ngroup().to_numpy(dtype=np.int64)
+
+
+def validate_rates(df: pd.DataFrame, previous: Optional[pd.DataFrame] = None,
+                   rate_min: float = 0.0, rate_max: float = 50.0,
+                   max_jump: float = 3.0, confirm: int = 2) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Проверка качества перед записью (векторно, без циклов по строкам):
+    - дубликаты по (bank, product, currency, term) — остаётся первая строка;
+    - rate пустой или вне [rate_min, rate_max];
+    - скачок относительно прошлого среза больше чем в max_jump раз (в любую сторону).
+      Скачок, повторившийся с той же ставкой confirm прогонов подряд (считая текущий), считается настоящим
+      изменением и проходит; 0 - скачки не подтверждаются никогда.
+    Возвращает (чистые строки, карантин с колонкой reason).
+    """
+    if df.empty:
+        return df, df.assign(reason=pd.Series(dtype=object))
+
+    has_prev = previous is not None and not previous.empty and max_jump and max_jump > 1
+    codes = _key_codes([df, previous] if has_prev else [df])
+    cur_codes = codes[:len(df)]
+
+    # код причины на строку (0 — строка в порядке), первая сработавшая проверка побеждает
+    flag = np.zeros(len(df), dtype=np.int8)
+    flag[pd.Index(cur_codes).duplicated(keep='first')] = 1
+
+    rate = pd.to_numeric(df['rate'], errors='coerce').to_numpy(dtype=float)
+    with np.errstate(invalid='ignore'):
+        flag[(flag == 0) & np.isnan(rate)] = 2
+        flag[(flag == 0) & ((rate < rate_min) | (rate > rate_max))] = 3
+
+    if has_prev:
+        prev_codes = codes[len(df):]
+        prev_rates = pd.to_numeric(previous['rate'], errors='coerce').to_numpy(dtype=float)
+        # последнее значение по ключу в прошлом срезе
+        last = ~pd.Index(prev_codes[::-1]).duplicated(keep='first')
+        prev_index = pd.Index(prev_codes[::-1][last])
+        pos = prev_index.get_indexer(cur_codes)
+        prev_rate = np.where(pos >= 0, prev_rates[::-1][last][pos], np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = rate / prev_rate
+            jump = (prev_rate > 0) & ((ratio > max_jump) | (ratio < 1.0 / max_jump))
+        flag[(flag == 0) & jump] = 4
+        if confirm and 'pending' in previous.columns:
+            # та же ставка уже стояла в карантине прошлых прогонов: после confirm наблюдений - новая опорная
+            pending = pd.to_numeric(previous['pending'], errors='coerce').to_numpy(dtype=float)[::-1][last]
+            seen = pd.to_numeric(previous['seen'], errors='coerce').fillna(0).to_numpy()[::-1][last]
+            prev_pending = np.where(pos >= 0, pending[pos], np.nan)
+            prev_seen = np.where(pos >= 0, seen[pos], 0)
+            confirmed = (flag == 4) & (rate == prev_pending) & (prev_seen + 1 >= confirm)
+            if confirmed.any():
+                log.info("Validation: %s rate jumps repeated in %s runs, accepted as changes",
+                         int(confirmed.sum()), confirm)
+                flag[confirmed] = 0
+
+    bad = flag > 0
+    quarantine = df[bad].assign(reason=REASONS[flag[bad]])
+    clean = df[~bad]
+    if len(quarantine):
+        log.warning("Validation: %s of %s rows quarantined (%s)", len(quarantine), len(df),
+                    quarantine['reason'].value_counts().to_dict())
+    return clean, quarantine
+
+
+def _snapshot(frame: pd.DataFrame) -> pd.DataFrame:
+    """Ключи (строками) + rate, pending, seen; последняя строка по ключу"""
+    snap = frame.reindex(columns=SNAPSHOT_COLS).astype({c: str for c in KEY_COLS})
+    snap['pending'] = pd.to_numeric(snap['pending'], errors='coerce')
+    snap['seen'] = pd.to_numeric(snap['seen'], errors='coerce').fillna(0).astype(int)
+    return snap.drop_duplicates(KEY_COLS, keep='last').reset_index(drop=True)
+
+
+def previous_snapshot(out_file: str, path: str = SNAPSHOT_PATH) -> Optional[pd.DataFrame]:
+    """
+    Последние известные ставки по каждому ключу. Читаются из файла-спутника path, который обновляет
+    save_snapshot после записи прогона; вся история (out_file) читается, только пока спутника нет.
+    """
+    try:
+        return pd.read_pickle(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        log.warning("Snapshot %s unreadable, rebuilding from history: %s", path, e)
+    if not os.path.exists(out_file):
+        return None
+    try:
+        return _snapshot(get_index(out_file).latest())
+    except Exception as e:
+        log.warning("Previous snapshot unavailable: %s", e)
+        return None
+
+
+def save_snapshot(previous: Optional[pd.DataFrame], written: pd.DataFrame, path: str = SNAPSHOT_PATH,
+                  quarantine: Optional[pd.DataFrame] = None) -> None:
+    """
+    Спутник := прошлый срез + записанные строки прогона (по ключу побеждает новое значение, отложенная ставка
+    сбрасывается). Ставки, ушедшие в карантин как скачок, опорную ставку не меняют: они запоминаются в pending,
+    seen считает повторы той же ставки подряд (см. confirm в validate_rates).
+    """
+    frames = [_snapshot(f) for f in (previous, written) if f is not None and not f.empty]
+    if not frames:
+        return
+    snap = _snapshot(pd.concat(frames, ignore_index=True))
+    if quarantine is not None and len(quarantine):
+        jumps = quarantine.loc[quarantine['reason'] == 'jump', KEY_COLS + ['rate']]
+        jumps = jumps.astype({c: str for c in KEY_COLS}).drop_duplicates(KEY_COLS, keep='last')
+        snap = snap.merge(jumps.rename(columns={'rate': 'observed'}), on=KEY_COLS, how='left')
+        hit = snap['observed'].notna().to_numpy()
+        same = (snap['pending'] == snap['observed']).to_numpy()
+        snap.loc[hit, 'seen'] = np.where(same[hit], snap.loc[hit, 'seen'] + 1, 1)
+        snap.loc[hit, 'pending'] = snap.loc[hit, 'observed']
+        snap = snap.drop(columns='observed')
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = path + '.tmp'
+    snap.to_pickle(tmp)
+    os.replace(tmp, path)
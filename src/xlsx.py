@@ -1,41 +1,61 @@
 import pandas as pd
 from datetime import datetime
 from openpyxl.utils import get_column_letter
-from openpyxl import load_workbook
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 import os
+from .log import get_logger
+from .records import RateBatch, RateRecord
+
+log = get_logger()
 
 OUTPUT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'output'))
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def save_all_to_xlsx(all_products, out_path=None):
-    out_path = out_path or os.path.join(OUTPUT_DIR, 'Deposit_Rate_Data.xlsx')
+COLUMNS = [
+    'bank', 'nkb', 'full_name', 'group_1', 'product',
+    'date', 'day', 'month', 'year', 'week',
+    'currency', 'term', 'rate', 'source_url', 'status'
+]
+
+DATE_FORMAT = "DD.MM.YYYY"
+RATE_FORMAT = "0.00"
 
+def prepare_frame(all_products, run_date=None, status=None):
+    """
+    Собираем результаты парсеров {bank: [RateRecord | dict]} в DataFrame с колонками COLUMNS.
+    status: {bank: статус прогона банка} -> колонка status (partial — банк не уложился в бюджет), по умолчанию ok
+    """
     # === Формируем новые данные в DataFrame ===
+    batch = RateBatch()
     all_rows = []
     for bank, products in all_products.items():
         if not products:
             continue
         for prod in products:
+            if isinstance(prod, RateRecord):
+                batch.append(prod.meta, prod.term, prod.currency, prod.rate)
+                continue
             if 'bank' not in prod or not prod['bank']:
                 prod['bank'] = bank
             all_rows.append(prod)
 
-    df = pd.DataFrame(all_rows)
+    frames = [f for f in (batch.to_pandas(), pd.DataFrame(all_rows)) if not f.empty]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
     # Гарантируем наличие всех колонок
-    cols = [
-        'bank', 'nkb', 'full_name', 'group_1', 'product',
-        'date', 'day', 'month', 'year', 'week',
-        'currency', 'term', 'rate', 'source_url'
-    ]
-    for c in cols:
+    for c in COLUMNS:
         if c not in df.columns:
             df[c] = ''
 
-    df = df[cols]
+    df = df[COLUMNS]
+
+    # банки и продукты обрабатываются параллельно: порядок строк фиксируется, чтобы выгрузки были сравнимы
+    df = df.sort_values(['bank', 'product', 'term', 'currency'], kind='stable', ignore_index=True,
+                        key=lambda col: pd.to_numeric(col, errors='coerce') if col.name == 'term' else col)
 
     # Добавляем текущую дату
-    df['date'] = pd.to_datetime(datetime.now().date())
+    df['date'] = pd.to_datetime(run_date or datetime.now().date())
 
     # day, month, year, week
     df['day'] = df['date'].dt.day
@@ -49,7 +69,14 @@ def save_all_to_xlsx(all_products, out_path=None):
     # Конвертируем rate в float
     df['rate'] = pd.to_numeric(df['rate'], errors='coerce')
 
-    sheet_name = "Select Rates"
+    df['status'] = df['bank'].map(status or {}).fillna('ok').astype(str)
+    return df
+
+def save_all_to_xlsx(all_products, out_path=None, run_date=None, sheet_name="Select Rates"):
+    """all_products: {bank: [rows]} или уже подготовленный prepare_frame DataFrame"""
+    out_path = out_path or os.path.join(OUTPUT_DIR, 'Deposit_Rate_Data.xlsx')
+
+    df = all_products if isinstance(all_products, pd.DataFrame) else prepare_frame(all_products, run_date)
 
     # === Проверяем, существует ли файл и лист ===
     file_exists = os.path.exists(out_path)
@@ -84,6 +111,12 @@ def save_all_to_xlsx(all_products, out_path=None):
 
         worksheet = writer.sheets[sheet_name]
 
+        # колонки, добавленные после создания листа (status): подписываем их в заголовке
+        if startrow > 0:
+            for idx, name in enumerate(df.columns, start=1):
+                if worksheet.cell(row=1, column=idx).value is None:
+                    worksheet.cell(row=1, column=idx).value = name
+
         # Форматирование колонки date
         date_col_idx = df.columns.get_loc('date') + 1
         date_col_letter = get_column_letter(date_col_idx)
@@ -98,5 +131,93 @@ def save_all_to_xlsx(all_products, out_path=None):
             for cell in row:
                 cell.number_format = "0.00"
 
-    print(f"Saved Excel -> {out_path}")
+    log.info("Saved Excel -> %s", out_path)
+    return out_path
+
+def iter_chunks(df, size=50000):
+    """DataFrame частями по size строк (минимум одна часть, даже для пустого)"""
+    if df.empty:
+        yield df
+        return
+    for start in range(0, len(df), size):
+        yield df.iloc[start:start + size]
+
+def _copy_cell(ws, cell):
+    if cell.value is None:
+        return None
+    number_format = getattr(cell, 'number_format', 'General')
+    if number_format and number_format != 'General':
+        out = WriteOnlyCell(ws, cell.value)
+        out.number_format = number_format
+        return out
+    return cell.value
+
+def _append_frame(ws, frame, fmt_idx):
+    """Строки DataFrame в write-only лист; fmt_idx: {номер колонки: number_format}"""
+    values = frame.astype(object).where(frame.notna(), None)
+    for row in values.itertuples(index=False, name=None):
+        if fmt_idx:
+            row = list(row)
+            for i, number_format in fmt_idx.items():
+                if row[i] is not None:
+                    cell = WriteOnlyCell(ws, row[i])
+                    cell.number_format = number_format
+                    row[i] = cell
+        ws.append(row)
+
+def _format_index(frame, formats):
+    return {frame.columns.get_loc(c): f for c, f in (formats or {}).items() if c in frame.columns}
+
+def save_sheets_to_xlsx(sheets, out_path, formats=None):
+    """Новая книга из нескольких небольших листов {имя листа: DataFrame} (write-only, файл перезаписывается)"""
+    workbook = Workbook(write_only=True)
+    for name, frame in sheets.items():
+        ws = workbook.create_sheet(name)
+        ws.append(list(frame.columns))
+        _append_frame(ws, frame, _format_index(frame, formats))
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    tmp = out_path + '.tmp'
+    workbook.save(tmp)
+    os.replace(tmp, out_path)
+    log.info("Saved Excel -> %s", out_path)
+    return out_path
+
+def write_sheet_streaming(out_path, sheet_name, frames, formats=None, progress=None):
+    """
+    Полная перезапись листа в режиме write-only: строки пишутся потоком по частям (frames),
+    остальные листы книги копируются построчно из read-only книги. Память не растёт с размером листа.
+    formats: {колонка: number_format}; progress(rows_written) вызывается после каждой части.
+    """
+    formats = formats or {}
+    source = load_workbook(out_path, read_only=True) if os.path.exists(out_path) else None
+    names = list(source.sheetnames) if source else []
+    if sheet_name not in names:
+        names.append(sheet_name)
+
+    workbook = Workbook(write_only=True)
+    written = 0
+    try:
+        for name in names:
+            ws = workbook.create_sheet(name)
+            if name != sheet_name:
+                src = source[name]
+                src.reset_dimensions()
+                for row in src.iter_rows():
+                    ws.append([_copy_cell(ws, c) for c in row])
+                continue
+            fmt_idx = None
+            for frame in frames:
+                if fmt_idx is None:
+                    ws.append(list(frame.columns))
+                    fmt_idx = _format_index(frame, formats)
+                _append_frame(ws, frame, fmt_idx)
+                written += len(frame)
+                if progress:
+                    progress(written)
+    finally:
+        if source:
+            source.close()
+    tmp = out_path + '.tmp'
+    workbook.save(tmp)
+    os.replace(tmp, out_path)
     return out_path
@@ -0,0 +1,113 @@
+"""
+Эталонные фрагменты страниц банков и ожидаемые строки ставок для общего движка таблиц (src/tables.py),
+страницы для распознавания проверок антибот-защиты (src/browser.py).
+
+Разметка повторяет сайты банков вместе с «шумом», который парсеры должны пропускать: строки без срока,
+вложенные теги, &nbsp;, div.transparent-table у ПУМБ.
+"""
+from typing import Any, List, Tuple
+
+
+# --- Ощадбанк: section.block-table-rates, срок в первой колонке, валюты в <th> ---
+# "Без терміну" не содержит срока: такие строки движок отбрасывает (раньше срок писался сырым текстом);
+# "366 днів" = 12 міс. совпадает с уже прочитанным сроком "12 місяців" и сливается в него
+OSCHADBANK_HTML = """
+<section class="block-table-rates container">
+  <h2 class="block-title">Процентні ставки</h2>
+  <table class="table">
+    <thead><tr><th>Строк вкладу</th><th>Гривня</th><th>Долар США</th><th>Євро</th></tr></thead>
+    <tbody>
+      <tr><td>3 місяці</td><td>11,00%</td><td>1,00%</td><td>0,50%</td></tr>
+      <tr><td><span>6 місяців</span></td><td>12,50%</td><td>1,50%</td><td>0,75%</td></tr>
+      <tr><td>12 місяців</td><td>13,00 %</td><td>2,00%</td><td>—</td></tr>
+      <tr><td>366 днів</td><td>13,50%</td><td>2,10%</td><td>0,80%</td></tr>
+      <tr><td>Без терміну</td><td>3,00%</td><td>0,10%</td><td>0,01%</td></tr>
+      <tr><td colspan="4">* ставки для вкладів, оформлених онлайн</td></tr>
+    </tbody>
+  </table>
+</section>
+"""
+
+# --- ПУМБ: вкладка на валюту, сроки в строке-заголовке, ставки ниже; transparent-table пропускается,
+# сумма в заголовке ("від 1000 грн") сроком не считается ---
+PUMB_HTML = """
+<section class="line-tab tabs-wr deposit-rates">
+  <div class="tabs-btns-wr">
+    <a href="#" data-id="uah" class="active"><span>Гривня<sup>1</sup></span></a>
+    <a href="#" data-id="usd"><span>Долар США</span></a>
+    <a href="#" data-id="pln"><span>Злотий</span></a>
+  </div>
+  <div class="tab-pane active" data-id="uah">
+    <div class="row header-row"><div class="col">Строк</div><div class="col">Сума від 1000 грн</div>
+      <div class="col">3 міс.</div><div class="col">6 міс.</div><div class="col">12 міс.</div></div>
+    <div class="row"><div class="col">Ставка</div><div class="col">12,5%</div>
+      <div class="col">13%</div><div class="col">13,5 %</div></div>
+    <div class="transparent-table">
+      <div class="row header-row"><div class="col">1 міс.</div></div>
+      <div class="row"><div class="col">5%</div></div>
+    </div>
+  </div>
+  <div class="tab-pane" data-id="usd">
+    <div class="row header-row"><div class="col">Строк</div><div class="col">6 міс.</div>
+      <div class="col">12 міс.</div></div>
+    <div class="row"><div class="col">Ставка</div><div class="col">1,5%</div><div class="col">2%</div></div>
+  </div>
+  <div class="tab-pane" data-id="pln">
+    <div class="row header-row"><div class="col">3 міс.</div></div>
+    <div class="row"><div class="col">1%</div></div>
+  </div>
+</section>
+"""
+
+# --- Укрексімбанк: div.additional-info, сроки диапазонами дней, ставки с точкой и &nbsp; ---
+UKREXIMBANK_HTML = """
+<div class="additional-info text-block">
+  <p>Процентні ставки, % річних</p>
+  <table>
+    <tr><th>Строк</th><th>Гривня</th><th>Долар США</th><th>Євро</th></tr>
+    <tr><td>93 - 183 дні</td><td>10.00&nbsp;%</td><td>1.00%</td><td>0.50%</td></tr>
+    <tr><td><p>184 - 367 днів</p></td><td>11.50%</td><td>1.50%</td><td>0.75%</td></tr>
+    <tr><td>368 - 3650 днів</td><td>12.00%</td><td>2.00%</td><td>1.00%</td></tr>
+  </table>
+</div>
+"""
+
+# (секция конфига, модуль парсера со спецификацией RATES_SPEC, html, ожидаемые (term, currency, rate))
+TABLE_FIXTURES: List[Tuple[str, str, str, List[Tuple[int, str, Any]]]] = [
+    ('Oschadbank', 'src.parsers.oschadbank', OSCHADBANK_HTML, [
+        (3, 'UAH', 11.0), (3, 'USD', 1.0), (3, 'EUR', 0.5),
+        (6, 'UAH', 12.5), (6, 'USD', 1.5), (6, 'EUR', 0.75),
+        (12, 'UAH', 13.0), (12, 'USD', 2.0), (12, 'EUR', None),
+    ]),
+    ('Pumb', 'src.parsers.pumb', PUMB_HTML, [
+        (3, 'UAH', 12.5), (6, 'UAH', 13.0), (12, 'UAH', 13.5),
+        (6, 'USD', 1.5), (12, 'USD', 2.0),
+    ]),
+    ('Ukreximbank', 'src.parsers.ukreximbank', UKREXIMBANK_HTML, [
+        (3, 'UAH', 10.0), (3, 'USD', 1.0), (3, 'EUR', 0.5),
+        (6, 'UAH', 10.0), (6, 'USD', 1.0), (6, 'EUR', 0.5),
+        (7, 'UAH', 11.5), (7, 'USD', 1.5), (7, 'EUR', 0.75),
+        (12, 'UAH', 11.5), (12, 'USD', 1.5), (12, 'EUR', 0.75),
+        (13, 'UAH', 12.0), (13, 'USD', 2.0), (13, 'EUR', 1.0),
+        (121, 'UAH', 12.0), (121, 'USD', 2.0), (121, 'EUR', 1.0),
+    ]),
+]
+
+
+# --- Страницы для is_challenge (src/browser.py): (описание, html, код ответа, ожидаемый результат) ---
+# Обычная страница с формой заявки и виджетом капчи - не проверка; тот же виджет при 403 - проверка
+PRODUCT_WITH_CAPTCHA_HTML = """
+<html><head><title>Депозит Стандарт</title><script src="https://www.google.com/recaptcha/api.js"></script></head>
+<body><section class="block-table-rates"><table><tr><th>Строк</th><th>Гривня</th></tr>
+<tr><td>3 місяці</td><td>11,00%</td></tr></table></section>
+<form class="deposit-request"><input name="phone"><div class="g-recaptcha" data-sitekey="x"></div></form></body></html>
+"""
+
+CHALLENGE_FIXTURES: List[Tuple[str, str, int, bool]] = [
+    ('product page with captcha widget', PRODUCT_WITH_CAPTCHA_HTML, 200, False),
+    ('captcha widget on 403', PRODUCT_WITH_CAPTCHA_HTML, 403, True),
+    ('hcaptcha on 429', '<div class="h-captcha" data-sitekey="x"></div>', 429, True),
+    ('cloudflare interstitial', '<title>Just a moment...</title><div id="cf-challenge-running"></div>', 200, True),
+    ('ddos-guard on 503', '<title>DDoS-Guard</title><div id="ddos-guard"></div>', 503, True),
+    ('plain product page', OSCHADBANK_HTML, 200, False),
+]
@@ -0,0 +1,10 @@
+import pytest
+
+from src.browser import is_challenge
+
+from .fixtures import CHALLENGE_FIXTURES
+
+
+@pytest.mark.parametrize('name, html, status, expected', CHALLENGE_FIXTURES, ids=[f[0] for f in CHALLENGE_FIXTURES])
+def test_is_challenge(name, html, status, expected):
+    assert is_challenge(html, status) is expected
@@ -0,0 +1,45 @@
+import sqlite3
+
+import pandas as pd
+
+from src.db import save_all_to_db
+
+
+def _run(rows, date='2025-03-01') -> pd.DataFrame:
+    return pd.DataFrame([{'date': pd.Timestamp(date), 'bank': bank, 'nkb': nkb, 'full_name': f'АТ {bank}',
+                          'group_1': 'Приватний', 'product': 'Депозит', 'currency': 'UAH', 'term': '12m',
+                          'rate': rate, 'source_url': ''} for bank, nkb, rate in rows])
+
+
+def _rates(path):
+    con = sqlite3.connect(path)
+    try:
+        return sorted(con.execute("SELECT bank, nkb, rate FROM v_rates"))
+    finally:
+        con.close()
+
+
+def test_sections_sharing_nkb_kept_apart(tmp_path):
+    path = str(tmp_path / 'rates.sqlite')
+    save_all_to_db(_run([('Privat', 46, 10.0), ('Privat_Business', 46, 9.0), ('NoCode', '', 8.0)]), path)
+    assert _rates(path) == [('NoCode', None, 8.0), ('Privat', 46, 10.0), ('Privat_Business', 46, 9.0)]
+
+
+def test_changed_nkb_updates_bank(tmp_path):
+    path = str(tmp_path / 'rates.sqlite')
+    save_all_to_db(_run([('Privat', 46, 10.0)]), path)
+    save_all_to_db(_run([('Privat', 47, 11.0)], date='2025-03-02'), path)
+    assert _rates(path) == [('Privat', 47, 10.0), ('Privat', 47, 11.0)]
+
+
+def test_old_schema_migrated(tmp_path):
+    path = str(tmp_path / 'rates.sqlite')
+    con = sqlite3.connect(path)
+    con.executescript("""
+        CREATE TABLE banks (bank_id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, full_name TEXT, group_1 TEXT);
+        INSERT INTO banks VALUES (46, 'Privat', 'АТ Privat', 'Приватний');
+        CREATE VIEW v_rates AS SELECT bank_id AS nkb FROM banks;
+    """)
+    con.close()
+    save_all_to_db(_run([('Privat', 46, 10.0), ('Other', 46, 9.0)]), path)
+    assert _rates(path) == [('Other', 46, 9.0), ('Privat', 46, 10.0)]
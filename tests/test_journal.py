@@ -0,0 +1,21 @@
+import threading
+
+from src import journal as journal_module
+from src.journal import RunJournal
+
+
+def test_fsync_runs_off_calling_thread(tmp_path, monkeypatch):
+    threads = []
+    fsync = journal_module.os.fsync
+    monkeypatch.setattr(journal_module.os, 'fsync', lambda fd: (threads.append(threading.current_thread()), fsync(fd)))
+    path = str(tmp_path / 'journal.jsonl')
+    journal = RunJournal(path, batch=2).open(truncate=True)
+    for n in range(5):
+        journal.product_done('B', f'P{n}', f'/p/{n}', [{'term': 12, 'currency': 'UAH', 'rate': 10.0 + n}])
+    journal.bank_done('B', 'ok', [])
+    journal.close()
+    assert threads and threading.current_thread() not in threads
+
+    loaded = RunJournal(path).load()
+    assert len(loaded.units) == 5 and loaded.banks['B']['status'] == 'ok'
+    assert loaded.units[('B', 'P4', '/p/4')] == [[12, 'UAH', 14.0]]
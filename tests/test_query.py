@@ -0,0 +1,39 @@
+from datetime import date
+
+import pandas as pd
+
+from src.query import RateIndex
+
+KEY = ('B', 'P', 'UAH', '12m')
+
+
+def _history(rows, intervals=True) -> pd.DataFrame:
+    df = pd.DataFrame([{'bank': 'B', 'product': 'P', 'currency': 'UAH', 'term': '12m', 'rate': rate,
+                        'date': pd.Timestamp(start), 'valid_to': pd.Timestamp(end) if end else pd.NaT}
+                       for start, end, rate in rows])
+    return df if intervals else df.drop(columns='valid_to')
+
+
+def test_rate_on_respects_valid_to():
+    index = RateIndex(_history([('2025-03-01', '2025-03-10', 10.0), ('2025-03-10', '2025-03-20', 11.0)]))
+    assert index.rate_on(KEY, date(2025, 3, 9)) == (date(2025, 3, 1), 10.0)
+    assert index.rate_on(KEY, date(2025, 3, 10)) == (date(2025, 3, 10), 11.0)
+    assert index.rate_on(KEY, date(2025, 3, 20)) == (None, None)
+    assert index.rate_on(KEY, date(2025, 2, 1)) == (None, None)
+
+
+def test_open_record_and_daily_history_stay_as_of():
+    index = RateIndex(_history([('2025-03-01', None, 10.0)]))
+    assert index.rate_on(KEY, date(2026, 1, 1)) == (date(2025, 3, 1), 10.0)
+    daily = RateIndex(_history([('2025-03-01', None, 10.0)], intervals=False))
+    assert daily.rate_on(KEY, date(2026, 1, 1)) == (date(2025, 3, 1), 10.0)
+
+
+def test_get_rates_returns_intervals_overlapping_range():
+    index = RateIndex(_history([('2025-03-01', '2025-03-10', 10.0), ('2025-03-10', '2025-03-20', 11.0),
+                                ('2025-04-01', None, 12.0)]))
+    got = index.get_rates(date_range=('2025-03-05', '2025-03-25'))
+    assert got[['date', 'valid_to', 'rate']].values.tolist() == [
+        [date(2025, 3, 1), date(2025, 3, 10), 10.0], [date(2025, 3, 10), date(2025, 3, 20), 11.0]]
+    got = index.get_rates(date_range=('2025-03-25', '2025-04-05'))
+    assert got['rate'].tolist() == [12.0]
@@ -0,0 +1,34 @@
+import importlib
+import random
+
+import pytest
+
+from src import tables
+from src.tables import extract_rates, frame_records, rate_frame, rate_records
+
+from .fixtures import TABLE_FIXTURES
+
+
+@pytest.mark.parametrize('name, module, html, expected', TABLE_FIXTURES, ids=[f[0] for f in TABLE_FIXTURES])
+def test_fixture_pages(name, module, html, expected):
+    spec = importlib.import_module(module).RATES_SPEC
+    got = [(r['term'], r['currency'], r['rate']) for r in extract_rates(html, spec)]
+    assert got == expected
+
+
+def _table(rows: int, seed: int = 0):
+    rnd = random.Random(seed)
+    terms = ['3 міс', '6 місяців', '1 рік', '2 роки', '93 - 183 дні', '12 місяців (грн)', 'Без терміну', '']
+    rates = ['10,5 %', '1,25%', '—', '', None]
+    return [['Термін', 'Гривня', 'Долар США', 'Євро']] + [
+        [rnd.choice(terms)] + [rnd.choice(rates) for _ in range(3)] for _ in range(rows)]
+
+
+@pytest.mark.parametrize('first_term_only', [False, True])
+def test_rate_records_matches_rate_frame(first_term_only, monkeypatch):
+    table = _table(500)
+    expected = frame_records(rate_frame(table[0], table[1:], first_term_only=first_term_only))
+    monkeypatch.setattr(tables, 'SMALL_TABLE_ROWS', len(table))
+    assert rate_records(table[0], table[1:], first_term_only=first_term_only) == expected
+    monkeypatch.setattr(tables, 'SMALL_TABLE_ROWS', 0)
+    assert rate_records(table[0], table[1:], first_term_only=first_term_only) == expected
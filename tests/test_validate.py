@@ -0,0 +1,40 @@
+import pandas as pd
+
+from src.validate import previous_snapshot, save_snapshot, validate_rates
+
+
+def _run(rate: float) -> pd.DataFrame:
+    return pd.DataFrame([{'bank': 'B', 'product': 'P', 'currency': 'UAH', 'term': '12m', 'rate': rate}])
+
+
+def _step(rate, previous, path, **kwargs):
+    df = _run(rate)
+    clean, quarantine = validate_rates(df, previous, **kwargs)
+    save_snapshot(previous, clean, path, quarantine)
+    return clean, quarantine, previous_snapshot('', path)
+
+
+def test_jump_accepted_after_confirm_runs(tmp_path):
+    path = str(tmp_path / 'snapshot.pkl')
+    _, _, previous = _step(10.0, None, path)
+    clean, quarantine, previous = _step(40.0, previous, path)
+    assert clean.empty and list(quarantine['reason']) == ['jump']
+    clean, quarantine, previous = _step(40.0, previous, path)
+    assert list(clean['rate']) == [40.0] and quarantine.empty
+    assert previous['rate'].tolist() == [40.0]
+
+
+def test_jump_count_restarts_on_other_rate(tmp_path):
+    path = str(tmp_path / 'snapshot.pkl')
+    _, _, previous = _step(10.0, None, path)
+    _, _, previous = _step(40.0, previous, path)
+    clean, _, previous = _step(45.0, previous, path)
+    assert clean.empty and previous['seen'].tolist() == [1]
+
+
+def test_jump_never_confirmed_with_zero(tmp_path):
+    path = str(tmp_path / 'snapshot.pkl')
+    _, _, previous = _step(10.0, None, path)
+    for _ in range(3):
+        clean, _, previous = _step(40.0, previous, path, confirm=0)
+        assert clean.empty